@@ -1,70 +1,157 @@
 # Practica 1 - Empleados y horarios
+#
+# Sin argumentos pide los datos por teclado, como siempre. Con --lotes lee
+# consultas JSON (una por línea) y responde una por línea, sin volver a
+# arrancar el programa para cada una:
+#
+#   {"empleados": [["Ana", 8, 14], ["Juan", 9, 17]], "hora_referencia": 8}
+#   {"hora_referencia": 9}            (con --datos, usa los empleados del fichero)
 
-# Solicitar número de empleados y validar
-while True:
-    try:
-        num_trabajadores = int(input("¿Cuántos empleados vas a introducir? "))
-        if num_trabajadores > 0:
-            break
-        else:
-            print("El número debe ser mayor que 0.")
-    except ValueError:
-        print("Introduce un número válido.")
-
-# Solicitar hora de referencia y validar
-while True:
-    try:
-        hora_referencia = int(input("Introduce la hora de referencia (0-23): "))
-        if 0 <= hora_referencia <= 23:
-            break
-        else:
-            print("La hora debe estar entre 0 y 23.")
-    except ValueError:
-        print("Introduce una hora válida.")
+import argparse
+import json
+import sys
 
-contador_entradas = 0
-salida_mas_temprana = 24  # Valor imposible como inicialización
-nombre_salida_temprana = ""
 
-contador = 0
-while contador < num_trabajadores:
-    nombre_empleado = input(f"Nombre del empleado {contador+1}: ")
-
-    # Validar hora de entrada
+# Pide un entero por teclado hasta que sea válido
+def pedir_entero(mensaje, valido, error, error_formato):
     while True:
         try:
-            hora_entrada = int(input("Hora de entrada (0-23): "))
-            if 0 <= hora_entrada <= 23:
-                break
-            else:
-                print("La hora debe estar entre 0 y 23.")
+            valor = int(input(mensaje))
+            if valido(valor):
+                return valor
+            print(error)
         except ValueError:
-            print("Introduce una hora válida.")
+            print(error_formato)
+
+
+# True si valor es una hora entera entre 0 y 23 (bool es subclase de int: true/false del JSON no valen)
+def es_hora(valor):
+    return isinstance(valor, int) and not isinstance(valor, bool) and 0 <= valor <= 23
+
+
+# Valida un empleado (nombre, entrada, salida); devuelve un mensaje de error o None
+def validar_empleado(nombre, hora_entrada, hora_salida):
+    if not es_hora(hora_entrada):
+        return f"{nombre}: la hora de entrada debe estar entre 0 y 23."
+    if not es_hora(hora_salida) or hora_salida <= hora_entrada:
+        return f"{nombre}: la hora de salida debe estar entre 0 y 23 y ser mayor que la de entrada."
+    return None
+
+
+# Cuenta las entradas hasta la hora de referencia y busca la salida más temprana
+def resumen(empleados, hora_referencia):
+    contador_entradas = 0
+    salida_mas_temprana = 24  # Valor imposible como inicialización
+    nombre_salida_temprana = ""
+
+    for nombre_empleado, hora_entrada, hora_salida in empleados:
+        # Contar empleados que entran antes o a la hora de referencia
+        if hora_entrada <= hora_referencia:
+            contador_entradas += 1
+
+        # Determinar la salida más temprana
+        if hora_salida < salida_mas_temprana:
+            salida_mas_temprana = hora_salida
+            nombre_salida_temprana = nombre_empleado
+
+    return contador_entradas, nombre_salida_temprana, salida_mas_temprana
 
-    # Validar hora de salida
-    while True:
-        try:
-            hora_salida = int(input("Hora de salida (0-23): "))
-            if 0 <= hora_salida <= 23 and hora_salida > hora_entrada:
-                break
-            else:
-                print("La hora de salida debe estar entre 0 y 23 y ser mayor que la de entrada.")
-        except ValueError:
-            print("Introduce una hora válida.")
 
-    # Contar empleados que entran antes o a la hora de referencia
-    if hora_entrada <= hora_referencia:
-        contador_entradas += 1
+# Programa interactivo
+def main():
+    # Solicitar número de empleados y validar
+    num_trabajadores = pedir_entero("¿Cuántos empleados vas a introducir? ", lambda n: n > 0,
+                                    "El número debe ser mayor que 0.", "Introduce un número válido.")
 
-    # Determinar la salida más temprana
-    if hora_salida < salida_mas_temprana:
-        salida_mas_temprana = hora_salida
-        nombre_salida_temprana = nombre_empleado
+    # Solicitar hora de referencia y validar
+    hora_referencia = pedir_entero("Introduce la hora de referencia (0-23): ", lambda h: 0 <= h <= 23,
+                                   "La hora debe estar entre 0 y 23.", "Introduce una hora válida.")
 
-    contador += 1
+    empleados = []
+    contador = 0
+    while contador < num_trabajadores:
+        nombre_empleado = input(f"Nombre del empleado {contador+1}: ")
 
-print(f"\nEmpleados que entraron antes o a la hora de referencia: {contador_entradas}")
-if nombre_salida_temprana != "":
-    print(f"El empleado que salió más temprano fue {nombre_salida_temprana} a las {salida_mas_temprana}.")
-else:
-    print("No se registraron salidas.")
\ No newline at end of file
+        # Validar hora de entrada
+        hora_entrada = pedir_entero("Hora de entrada (0-23): ", lambda h: 0 <= h <= 23,
+                                    "La hora debe estar entre 0 y 23.", "Introduce una hora válida.")
+
+        # Validar hora de salida
+        hora_salida = pedir_entero("Hora de salida (0-23): ", lambda h: 0 <= h <= 23 and h > hora_entrada,
+                                   "La hora de salida debe estar entre 0 y 23 y ser mayor que la de entrada.",
+                                   "Introduce una hora válida.")
+
+        empleados.append((nombre_empleado, hora_entrada, hora_salida))
+        contador += 1
+
+    contador_entradas, nombre_salida_temprana, salida_mas_temprana = resumen(empleados, hora_referencia)
+    print(f"\nEmpleados que entraron antes o a la hora de referencia: {contador_entradas}")
+    if nombre_salida_temprana != "":
+        print(f"El empleado que salió más temprano fue {nombre_salida_temprana} a las {salida_mas_temprana}.")
+    else:
+        print("No se registraron salidas.")
+
+
+# Convierte y valida una lista JSON de empleados [nombre, entrada, salida]
+def cargar_empleados(lista):
+    empleados = [tuple(e) for e in lista]
+    for empleado in empleados:
+        if len(empleado) != 3:
+            raise ValueError(f"cada empleado es [nombre, entrada, salida], no {list(empleado)}")
+        error = validar_empleado(*empleado)
+        if error:
+            raise ValueError(error)
+    return empleados
+
+
+# Responde una consulta del modo por lotes
+def responder(consulta, empleados=None):
+    if "empleados" in consulta:
+        empleados = cargar_empleados(consulta["empleados"])
+    if not empleados:
+        raise ValueError("no hay empleados: indica 'empleados' o arranca con --datos")
+    hora_referencia = consulta.get("hora_referencia")
+    if not es_hora(hora_referencia):
+        raise ValueError("hora_referencia debe ser un entero entre 0 y 23")
+
+    contador_entradas, nombre, salida = resumen(empleados, hora_referencia)
+    return {"entradas": contador_entradas,
+            "salida_mas_temprana": {"nombre": nombre, "hora": salida} if nombre else None}
+
+
+# Modo por lotes: una consulta JSON por línea de entrada, una respuesta por línea de salida
+def procesar_lotes(entrada, salida, empleados=None):
+    for linea in entrada:
+        if not linea.strip():
+            continue
+        respuesta = {"id": None}
+        try:
+            consulta = json.loads(linea)
+            respuesta["id"] = consulta.get("id")
+            respuesta.update(ok=True, resultado=responder(consulta, empleados))
+        except Exception as e:
+            respuesta.update(ok=False, error=str(e))
+        salida.write(json.dumps(respuesta, ensure_ascii=False) + "\n")
+    salida.flush()
+
+
+# Punto de entrada del programa
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Empleados y horarios")
+    parser.add_argument("--lotes", nargs="?", const="-", metavar="FICHERO",
+                        help="responde consultas JSON (una por línea) desde FICHERO o stdin")
+    parser.add_argument("--datos", help="JSON con la lista de empleados [nombre, entrada, salida]")
+    args = parser.parse_args()
+
+    if args.lotes is None:
+        main()
+    else:
+        empleados = None
+        if args.datos:
+            with open(args.datos, encoding="utf-8") as f:
+                empleados = cargar_empleados(json.load(f))
+        if args.lotes == "-":
+            procesar_lotes(sys.stdin, sys.stdout, empleados)
+        else:
+            with open(args.lotes, encoding="utf-8") as f:
+                procesar_lotes(f, sys.stdout, empleados)
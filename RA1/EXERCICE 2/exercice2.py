@@ -1,16 +1,40 @@
 # Practica 2 - Gestión de horarios del personal
 
+import argparse
+import contextlib
 import json
 import os
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # sin NumPy, MotorOcupacion usa listas
+    np = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from diario import DiarioEscritura  # noqa: E402
+
+MINUTOS_DIA = 24 * 60
+COMPACTAR_CADA = 1000  # cambios en el diario que disparan una compactación en segundo plano
+
 
 # Clase para gestionar los horarios del personal
 class Horarios:
+    # Cambios en un diario (diario.py, compartido con el mini-CRM): guardar un cambio
+    # es añadir una línea en vez de reescribir todo el JSON. Cada cambio fija o
+    # quita un empleado, así que aplicarlo dos veces no cambia nada.
     def __init__(self, archivo=None):
         # Si no se indica archivo, se guarda dentro de la carpeta del script
         if archivo is None:
             archivo = os.path.join(os.path.dirname(__file__), "horarios.json")
 
         self.archivo = archivo
+        self.diario = DiarioEscritura(archivo + ".wal")
+        self._compactacion = None
+        self._indice = None
+        self._ocupacion = None
 
         # Datos iniciales
         self.datos = {
@@ -24,21 +48,299 @@ class Horarios:
             "Pablo": ("11", "19")
         }
 
-        # Si ya existe el archivo, cargamos los datos
+        # Si ya existe el archivo, cargamos los datos; si no, se guardan los iniciales
+        # con los cambios que hubiera en el diario (guardar() lo vacía)
         if os.path.exists(self.archivo):
             self.cargar()
         else:
+            self._aplicar_diario()
             self.guardar()
 
     def guardar(self):
-        # Guarda los horarios en un archivo JSON
-        with open(self.archivo, "w", encoding="utf-8") as f:
-            json.dump(self.datos, f, ensure_ascii=False, indent=4)
+        # Guarda los horarios completos en el archivo JSON y vacía el diario (compactación)
+        self.compactar()
+
+    def compactar(self, en_segundo_plano=False):
+        # Escribe una base nueva con los datos actuales (archivo temporal + os.replace,
+        # que es atómico) y después descarta el diario. Devuelve False si ya había una en curso.
+        if self._compactacion is not None and self._compactacion.is_alive():
+            return False
+        self.diario.rotar()
+        datos = dict(self.datos)
+
+        def escribir():
+            tmp = self.archivo + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(datos, f, ensure_ascii=False, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.archivo)
+            self.diario.descartar_rotado()
+
+        if en_segundo_plano:
+            self._compactacion = threading.Thread(target=escribir, name="compactacion")
+            self._compactacion.start()
+        else:
+            escribir()
+        return True
+
+    def _compactar_si_toca(self):
+        # Después de aplicar el cambio en memoria, que la compactación copia los datos actuales
+        if self.diario.num_registros >= COMPACTAR_CADA:
+            self.compactar(en_segundo_plano=True)
 
     def cargar(self):
-        # Carga los horarios desde el archivo JSON
+        # Carga los horarios desde el archivo JSON y aplica los cambios del diario
         with open(self.archivo, "r", encoding="utf-8") as f:
             self.datos = json.load(f)
+        self._aplicar_diario()
+
+    def _aplicar_diario(self):
+        for registro in self.diario.registros():
+            if registro.get("op") == "establecer":
+                self.datos[registro["nombre"]] = (registro["entrada"], registro["salida"])
+            elif registro.get("op") == "quitar":
+                self.datos.pop(registro["nombre"], None)
+        self._indice = None
+        self._ocupacion = None
+
+    def indice(self):
+        # Índice de turnos de los datos actuales (se construye al pedirlo la primera vez)
+        if self._indice is None:
+            self._indice = IndiceTurnos(self.datos)
+        return self._indice
+
+    def ocupacion(self):
+        # Curva de ocupación por minuto; se mantiene al día con establecer() y quitar()
+        if self._ocupacion is None:
+            self._ocupacion = MotorOcupacion(self.datos)
+        return self._ocupacion
+
+    def establecer(self, nombre, entrada, salida, persistir=True):
+        # Da de alta o cambia el horario de un empleado. Devuelve False si alguna hora no es válida.
+        if validar_hora(entrada) is None or validar_hora(salida) is None:
+            return False
+        if persistir:
+            self.diario.anotar([{"op": "establecer", "nombre": nombre, "entrada": entrada, "salida": salida}])
+        anterior = self.datos.get(nombre)
+        self.datos[nombre] = (entrada, salida)
+        self._indice = None
+        if self._ocupacion is not None:
+            if anterior is not None:
+                self._ocupacion.quitar_turno(*anterior)
+            self._ocupacion.agregar_turno(entrada, salida)
+        if persistir:
+            self._compactar_si_toca()
+        return True
+
+    def quitar(self, nombre, persistir=True):
+        # Elimina el horario de un empleado. Devuelve False si no existía.
+        if nombre not in self.datos:
+            return False
+        if persistir:
+            self.diario.anotar([{"op": "quitar", "nombre": nombre}])
+        anterior = self.datos.pop(nombre)
+        self._indice = None
+        if self._ocupacion is not None:
+            self._ocupacion.quitar_turno(*anterior)
+        if persistir:
+            self._compactar_si_toca()
+        return True
+
+
+# Índice de turnos: responde en O(log n) cuántos han llegado, cuántos están
+# trabajando y la ocupación en una franja, sin recorrer los horarios.
+class IndiceTurnos:
+    def __init__(self, datos):
+        # datos: nombre -> (entrada, salida), como Horarios.datos. Las horas no
+        # válidas se ignoran; un turno que acaba antes de empezar cruza la medianoche.
+        entradas = []
+        inicios, finales = [], []
+        descansos = []  # (salida, entrada) de los turnos que cruzan la medianoche
+        for entrada, salida in datos.values():
+            e = validar_hora(entrada)
+            if e is None:
+                continue
+            entradas.append(e)
+            partes = tramos(entrada, salida)
+            for inicio, fin in partes:
+                inicios.append(inicio)
+                finales.append(fin)
+            if len(partes) == 2:
+                descansos.append((partes[1][1], partes[0][0]))
+
+        self.entradas = sorted(entradas)
+        self.inicios = sorted(inicios)
+        self.finales = sorted(finales)
+
+        # Un turno de noche son dos tramos: en_franja lo contaría dos veces si la franja
+        # toca los dos, es decir, si su descanso [salida, entrada) cae dentro de
+        # (desde, hasta). Para contarlos, los descansos van ordenados por salida y un
+        # árbol de mezcla guarda las entradas de cada bloque ordenadas: O(log² n).
+        descansos.sort()
+        self._salidas_noche = [s for s, _ in descansos]
+        m = len(descansos)
+        self._arbol_noche = [[] for _ in range(m)] + [[e] for _, e in descansos]
+        for i in range(m - 1, 0, -1):
+            self._arbol_noche[i] = sorted(self._arbol_noche[2 * i] + self._arbol_noche[2 * i + 1])
+
+        # Perfil de ocupación (barrido): ocupacion[i] personas en [tiempos[i], tiempos[i+1])
+        cambios = {}
+        for t in inicios:
+            cambios[t] = cambios.get(t, 0) + 1
+        for t in finales:
+            cambios[t] = cambios.get(t, 0) - 1
+        self.tiempos = sorted(cambios)
+        self.ocupacion = []
+        actual = 0
+        for t in self.tiempos:
+            actual += cambios[t]
+            self.ocupacion.append(actual)
+
+        # Tablas dispersas para máximo y mínimo de ocupación en cualquier rango en O(1)
+        self._maximos = self._tabla_dispersa(max)
+        self._minimos = self._tabla_dispersa(min)
+
+    def _tabla_dispersa(self, f):
+        niveles = [self.ocupacion]
+        salto = 1
+        while 2 * salto <= len(self.ocupacion):
+            previo = niveles[-1]
+            niveles.append([f(previo[i], previo[i + salto]) for i in range(len(previo) - salto)])
+            salto *= 2
+        return niveles
+
+    def _consulta(self, niveles, f, i, j):
+        # f de ocupacion[i..j] (ambos incluidos)
+        nivel = (j - i + 1).bit_length() - 1
+        return f(niveles[nivel][i], niveles[nivel][j - (1 << nivel) + 1])
+
+    def llegados(self, hora):
+        # Empleados con entrada <= hora
+        return bisect_right(self.entradas, hora)
+
+    def en_turno(self, hora):
+        # Empleados trabajando a esa hora: entrada <= hora < salida
+        return bisect_right(self.inicios, hora) - bisect_right(self.finales, hora)
+
+    def en_franja(self, desde, hasta):
+        # Empleados que trabajan en algún momento de [desde, hasta)
+        tramos_en_franja = bisect_left(self.inicios, hasta) - bisect_right(self.finales, desde)
+        return tramos_en_franja - self._noches_con_dos_tramos(desde, hasta)
+
+    def _noches_con_dos_tramos(self, desde, hasta):
+        # Turnos de noche con desde < salida y entrada < hasta (sus dos tramos tocan la franja)
+        m = len(self._salidas_noche)
+        i, j = bisect_right(self._salidas_noche, desde) + m, 2 * m
+        total = 0
+        while i < j:
+            if i & 1:
+                total += bisect_left(self._arbol_noche[i], hasta)
+                i += 1
+            if j & 1:
+                j -= 1
+                total += bisect_left(self._arbol_noche[j], hasta)
+            i //= 2
+            j //= 2
+        return total
+
+    def _segmentos(self, desde, hasta):
+        # Índices del perfil que cubren [desde, hasta); i == -1 si incluye el tramo inicial vacío
+        if desde > hasta:
+            raise ValueError(f"rango no válido: desde ({desde}) es posterior a hasta ({hasta})")
+        return bisect_right(self.tiempos, desde) - 1, bisect_left(self.tiempos, hasta) - 1
+
+    def ocupacion_maxima(self, desde, hasta):
+        # Máximo de personas trabajando a la vez en [desde, hasta); con desde == hasta, en ese instante
+        i, j = self._segmentos(desde, hasta)
+        if desde == hasta:
+            return self.en_turno(desde)
+        if j < 0:
+            return 0
+        return self._consulta(self._maximos, max, max(i, 0), j)
+
+    def ocupacion_minima(self, desde, hasta):
+        # Mínimo de personas trabajando a la vez en [desde, hasta); con desde == hasta, en ese instante
+        i, j = self._segmentos(desde, hasta)
+        if desde == hasta:
+            return self.en_turno(desde)
+        if i < 0:
+            return 0
+        return self._consulta(self._minimos, min, i, j)
+
+
+# Histograma de ocupación: personas trabajando en cada minuto del día.
+# Se construye con un array de diferencias (+1 al entrar, -1 al salir) y su suma
+# acumulada; después cada alta, baja o cambio de turno solo toca los minutos
+# de ese turno, así que la curva, el pico y las franjas flojas están siempre listos.
+class MotorOcupacion:
+    def __init__(self, datos):
+        diferencias = [0] * (MINUTOS_DIA + 1)
+        for entrada, salida in datos.values():
+            for inicio, fin in tramos_en_minutos(entrada, salida):
+                diferencias[inicio] += 1
+                diferencias[fin] -= 1
+        if np is not None:
+            self._curva = np.cumsum(np.array(diferencias[:MINUTOS_DIA], dtype=np.int32))
+        else:
+            self._curva = []
+            actual = 0
+            for d in diferencias[:MINUTOS_DIA]:
+                actual += d
+                self._curva.append(actual)
+        self._pico = None
+
+    def _sumar(self, entrada, salida, delta):
+        for inicio, fin in tramos_en_minutos(entrada, salida):
+            if np is not None:
+                self._curva[inicio:fin] += delta
+            else:
+                for minuto in range(inicio, fin):
+                    self._curva[minuto] += delta
+        self._pico = None
+
+    def agregar_turno(self, entrada, salida):
+        self._sumar(entrada, salida, 1)
+
+    def quitar_turno(self, entrada, salida):
+        self._sumar(entrada, salida, -1)
+
+    def curva(self):
+        # Personas trabajando en cada minuto (índice 0 = 00:00, 1439 = 23:59); no modificar
+        return self._curva
+
+    def en_minuto(self, minuto):
+        return int(self._curva[minuto])
+
+    def pico(self):
+        # (minuto, personas) del primer minuto con más gente trabajando
+        if self._pico is None:
+            if np is not None:
+                minuto = int(np.argmax(self._curva))
+            else:
+                minuto = max(range(MINUTOS_DIA), key=self._curva.__getitem__)
+            self._pico = (minuto, int(self._curva[minuto]))
+        return self._pico
+
+    def franjas_insuficientes(self, minimo, desde=0, hasta=MINUTOS_DIA):
+        # Franjas [inicio, fin) en minutos, dentro de [desde, hasta), con menos de `minimo` personas
+        if np is not None:
+            faltan = np.zeros(hasta - desde + 2, dtype=np.int8)
+            faltan[1:-1] = self._curva[desde:hasta] < minimo
+            bordes = np.flatnonzero(np.diff(faltan)) + desde
+            return [(int(a), int(b)) for a, b in zip(bordes[::2], bordes[1::2])]
+        franjas = []
+        inicio = None
+        for minuto in range(desde, hasta):
+            if self._curva[minuto] < minimo:
+                if inicio is None:
+                    inicio = minuto
+            elif inicio is not None:
+                franjas.append((inicio, minuto))
+                inicio = None
+        if inicio is not None:
+            franjas.append((inicio, hasta))
+        return franjas
 
 
 # Función para mostrar los registros por pantalla
@@ -64,8 +366,23 @@ def validar_hora(hora_str):
         return None
 
 
+# Tramos [inicio, fin) en horas de un turno; el que acaba antes de empezar cruza la
+# medianoche y se parte en dos. Sin tramos si alguna hora no es válida o son iguales.
+def tramos(entrada, salida):
+    e, s = validar_hora(entrada), validar_hora(salida)
+    if e is None or s is None or s == e:
+        return []
+    if s > e:
+        return [(e, s)]
+    return [(e, 24.0), (0.0, s)] if s > 0 else [(e, 24.0)]
+
+
+def tramos_en_minutos(entrada, salida):
+    return [(round(inicio * 60), round(fin * 60)) for inicio, fin in tramos(entrada, salida)]
+
+
 # Cuenta cuántos empleados ya han entrado a cierta hora
-def contar_entradas(horarios):
+def contar_entradas(horarios, indice=None):
     while True:
         hora_usuario = input("Introduce una hora (ej. 08 o 08:30): ").strip()
         hora_valida = validar_hora(hora_usuario)
@@ -76,18 +393,16 @@ def contar_entradas(horarios):
         else:
             break
 
-    contador = 0
-    for nombre, (entrada, _) in horarios.items():
-        entrada_valida = validar_hora(entrada)
-        if entrada_valida is not None and entrada_valida <= hora_valida:
-            contador += 1
+    if indice is None:
+        indice = IndiceTurnos(horarios)
+    contador = indice.llegados(hora_valida)
 
     print(f"\nA las {hora_usuario} han llegado {contador} empleado(s).\n")
 
 
 # Menú principal
-def menu():
-    horarios = Horarios()
+def menu(archivo=None):
+    horarios = Horarios(archivo)
 
     while True:
         print("====== MENÚ PRINCIPAL ======")
@@ -99,7 +414,7 @@ def menu():
         if opcion == "1":
             mostrar_registros(horarios.datos)
         elif opcion == "2":
-            contar_entradas(horarios.datos)
+            contar_entradas(horarios.datos, horarios.indice())
         elif opcion == "3":
             print("¡Hasta luego!")
             break
@@ -107,6 +422,103 @@ def menu():
             print("Opción no válida, intenta otra vez.\n")
 
 
+# Modo por lotes: consultas JSON (una por línea) sobre unos horarios ya cargados.
+# Las horas pueden ir como "08:30" o como número (8.5).
+def _hora(valor):
+    if isinstance(valor, str):
+        hora = validar_hora(valor)
+    elif isinstance(valor, (int, float)) and 0 <= valor <= 24:
+        hora = float(valor)
+    else:
+        hora = None
+    if hora is None:
+        raise ValueError(f"hora no válida: {valor!r}")
+    return hora
+
+
+def _hhmm(minuto):
+    return f"{minuto // 60:02d}:{minuto % 60:02d}"
+
+
+def _pico(horarios, consulta):
+    minuto, personas = horarios.ocupacion().pico()
+    return {"hora": _hhmm(minuto), "personas": personas}
+
+
+def _insuficientes(horarios, consulta):
+    desde = round(_hora(consulta.get("desde", 0)) * 60)
+    hasta = round(_hora(consulta.get("hasta", 24)) * 60)
+    franjas = horarios.ocupacion().franjas_insuficientes(consulta["minimo"], desde, hasta)
+    return [[_hhmm(a), _hhmm(b)] for a, b in franjas]
+
+
+def _establecer(horarios, consulta):
+    if not horarios.establecer(consulta["nombre"], consulta["entrada"], consulta["salida"]):
+        raise ValueError("hora de entrada o salida no válida")
+    return True
+
+
+CONSULTAS = {
+    "registros": lambda h, c: h.datos,
+    "llegados": lambda h, c: h.indice().llegados(_hora(c["hora"])),
+    "en_turno": lambda h, c: h.indice().en_turno(_hora(c["hora"])),
+    "en_franja": lambda h, c: h.indice().en_franja(_hora(c["desde"]), _hora(c["hasta"])),
+    "ocupacion": lambda h, c: {"maxima": h.indice().ocupacion_maxima(_hora(c["desde"]), _hora(c["hasta"])),
+                               "minima": h.indice().ocupacion_minima(_hora(c["desde"]), _hora(c["hasta"]))},
+    "pico": _pico,
+    "insuficientes": _insuficientes,
+    "establecer": _establecer,
+    "quitar": lambda h, c: h.quitar(c["nombre"]),
+}
+
+
+def responder(horarios, consulta):
+    op = consulta.get("op")
+    if op not in CONSULTAS:
+        raise ValueError(f"op desconocida {op!r}; opciones: {', '.join(CONSULTAS)}")
+    try:
+        return CONSULTAS[op](horarios, consulta)
+    except KeyError as e:
+        raise ValueError(f"falta el campo {e.args[0]!r}") from None
+
+
+def procesar_lotes(horarios, entrada, salida):
+    for linea in entrada:
+        if not linea.strip():
+            continue
+        respuesta = {"id": None}
+        try:
+            consulta = json.loads(linea)
+            respuesta["id"] = consulta.get("id")
+            respuesta.update(ok=True, resultado=responder(horarios, consulta))
+        except Exception as e:
+            respuesta.update(ok=False, error=str(e))
+        salida.write(json.dumps(respuesta, ensure_ascii=False) + "\n")
+    salida.flush()
+
+
+def main_lotes(origen="-", archivo=None):
+    # Los avisos (p. ej. un diario dañado) van a stderr: stdout queda solo para las respuestas
+    salida = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        horarios = Horarios(archivo)
+        if origen == "-":
+            procesar_lotes(horarios, sys.stdin, salida)
+        else:
+            with open(origen, encoding="utf-8") as f:
+                procesar_lotes(horarios, f, salida)
+
+
 # Punto de entrada del programa
 if __name__ == "__main__":
-    menu()
+    parser = argparse.ArgumentParser(description="Gestión de horarios del personal")
+    parser.add_argument("--lotes", nargs="?", const="-", metavar="FICHERO",
+                        help="responde consultas JSON (una por línea) desde FICHERO o stdin; "
+                             '{"op": "llegados", "hora": "08:30"}')
+    parser.add_argument("--archivo", help="fichero JSON de horarios (por defecto horarios.json)")
+    args = parser.parse_args()
+
+    if args.lotes is None:
+        menu()
+    else:
+        main_lotes(args.lotes, args.archivo)
@@ -1,10 +1,63 @@
+import argparse
+import contextlib
 import csv
+import json
 import os
+import re
+import sys
+import unicodedata
+from abc import ABC, abstractmethod
+from array import array
+from datetime import date
+from itertools import compress, islice
+from operator import lt
+
+# instrumentacion.py está en la raíz del repositorio, compartido con los otros programas
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from instrumentacion import Metricas, perfilador  # noqa: E402
+
+# HORARIOS_VERIFICAR=1: cada consulta de Empleado compara la caché con un recálculo completo
+VERIFICAR_CACHE = os.environ.get("HORARIOS_VERIFICAR") == "1"
+TAM_BUFFER = 1 << 20  # buffer de escritura de los informes de una pasada
+TAM_BLOQUE = 10_000  # filas de horarios.csv que se validan de una vez
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+# HORARIOS_METRICAS=fichero: tiempos por fase y contadores, exportados al salir (.prom = Prometheus)
+# HORARIOS_PERFIL=prefijo: los puntos de entrada se ejecutan bajo cProfile y tracemalloc
+
+
+# Instrumentación (ver instrumentacion.py)
+METRICAS = Metricas(os.environ.get("HORARIOS_METRICAS"), "horarios")
+perfilar = perfilador("HORARIOS_PERFIL")
+
+
+# Tabla de nombres: cada nombre distinto se guarda una sola vez y se identifica por un entero
+class Internador:
+    """Asigna un id entero (0, 1, 2...) a cada cadena distinta."""
+
+    __slots__ = ("ids", "nombres")
+
+    def __init__(self):
+        self.ids = {}
+        self.nombres = []
+
+    def id(self, nombre: str) -> int:
+        """Devuelve el id de nombre, dándolo de alta si es nuevo."""
+        i = self.ids.get(nombre)
+        if i is None:
+            i = self.ids[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+        return i
+
+    def __len__(self):
+        return len(self.nombres)
+
 
 # Clase RegistroHorario
 class RegistroHorario:
     """Representa un registro de horario de un empleado en un día concreto."""
 
+    __slots__ = ("empleado", "dia", "entrada", "salida")
+
     def __init__(self, empleado: str, dia: str, entrada: int, salida: int):
         self.empleado = empleado
         self.dia = dia
@@ -16,31 +69,588 @@ class RegistroHorario:
         return self.salida - self.entrada
 
 
+# Almacén columnar de registros compartido por el gestor y sus empleados
+class TablaRegistros:
+    """Registros en arrays paralelos: id de empleado, id de día, entrada y salida.
+
+    Unos 10 bytes por registro frente a los cientos de un RegistroHorario con sus
+    cadenas. Se comporta como una secuencia de RegistroHorario, que se crean al
+    acceder a cada posición.
+    """
+
+    __slots__ = ("empleados", "dias", "empleado", "dia", "entrada", "salida")
+
+    def __init__(self):
+        self.empleados = Internador()
+        self.dias = Internador()
+        self.empleado = array("I")
+        self.dia = array("H")
+        self.entrada = array("h")
+        self.salida = array("h")
+
+    def agregar(self, empleado: str, dia: str, entrada: int, salida: int) -> int:
+        """Añade un registro y devuelve su posición."""
+        self.empleado.append(self.empleados.id(empleado))
+        self.dia.append(self.dias.id(dia))
+        self.entrada.append(entrada)
+        self.salida.append(salida)
+        return len(self.entrada) - 1
+
+    def __len__(self):
+        return len(self.entrada)
+
+    def __getitem__(self, pos: int) -> RegistroHorario:
+        return RegistroHorario(self.empleados.nombres[self.empleado[pos]], self.dias.nombres[self.dia[pos]],
+                               self.entrada[pos], self.salida[pos])
+
+    def __iter__(self):
+        empleados, dias = self.empleados.nombres, self.dias.nombres
+        for e, d, h_entrada, h_salida in zip(self.empleado, self.dia, self.entrada, self.salida):
+            yield RegistroHorario(empleados[e], dias[d], h_entrada, h_salida)
+
+
+class CacheDesfasada(RuntimeError):
+    """Con HORARIOS_VERIFICAR=1, un valor cacheado de Empleado no coincide con el recálculo."""
+
+
 # Clase Empleado
 class Empleado:
-    """Almacena los registros de un empleado y permite calcular estadísticas."""
+    """Almacena los registros de un empleado y permite calcular estadísticas.
+
+    Los registros viven en una TablaRegistros (la del gestor, o una propia si el
+    empleado se crea suelto); el empleado solo guarda sus posiciones en ella.
+    Las horas totales y los registros por día se mantienen al añadir, así que
+    horas_totales() y dias_trabajados() son O(1).
+    """
 
-    def __init__(self, nombre: str):
+    __slots__ = ("nombre", "tabla", "posiciones", "_horas", "_registros_por_dia")
+
+    def __init__(self, nombre: str, tabla: TablaRegistros = None):
         self.nombre = nombre
-        self.registros = []
+        self.tabla = tabla if tabla is not None else TablaRegistros()
+        self.posiciones = array("I")
+        self._horas = 0
+        self._registros_por_dia = {}  # id de día -> nº de registros ese día
 
     def agregar_registro(self, registro: RegistroHorario):
         """Añade un nuevo registro de horario al empleado."""
-        self.registros.append(registro)
+        self.agregar_posicion(self.tabla.agregar(registro.empleado, registro.dia,
+                                                 registro.entrada, registro.salida))
+
+    def agregar_posicion(self, pos: int):
+        """Asocia al empleado un registro que ya está en la tabla compartida."""
+        self.posiciones.append(pos)
+        self._horas += self.tabla.salida[pos] - self.tabla.entrada[pos]
+        dia = self.tabla.dia[pos]
+        self._registros_por_dia[dia] = self._registros_por_dia.get(dia, 0) + 1
+
+    @property
+    def registros(self):
+        """Registros del empleado, en el orden en que se añadieron."""
+        return [self.tabla[pos] for pos in self.posiciones]
 
     def horas_totales(self) -> int:
         """Suma todas las horas trabajadas en la semana."""
-        return sum(r.duracion() for r in self.registros)
+        if VERIFICAR_CACHE and self._horas != self.recalcular_horas():
+            raise CacheDesfasada(f"caché de horas desfasada para {self.nombre}: "
+                                 f"{self._horas} frente a {self.recalcular_horas()}")
+        return self._horas
 
     def dias_trabajados(self) -> int:
         """Cuenta los días distintos que trabajó el empleado."""
-        return len({r.dia for r in self.registros})
+        if VERIFICAR_CACHE and len(self._registros_por_dia) != self.recalcular_dias():
+            raise CacheDesfasada(f"caché de días desfasada para {self.nombre}: "
+                                 f"{len(self._registros_por_dia)} frente a {self.recalcular_dias()}")
+        return len(self._registros_por_dia)
+
+    def recalcular_horas(self) -> int:
+        """horas_totales() recorriendo todos los registros (para comprobar la caché)."""
+        entrada, salida = self.tabla.entrada, self.tabla.salida
+        return sum(salida[pos] - entrada[pos] for pos in self.posiciones)
+
+    def recalcular_dias(self) -> int:
+        """dias_trabajados() recorriendo todos los registros (para comprobar la caché)."""
+        dia = self.tabla.dia
+        return len({dia[pos] for pos in self.posiciones})
 
     def fila_csv(self):
         """Devuelve una lista con los datos para escribir en el CSV de resumen."""
         return [self.nombre, self.dias_trabajados(), self.horas_totales()]
 
 
+# Índice de bits: qué empleados trabajaron cada día
+class Conjunto:
+    """Conjunto de empleados de un IndiceDias, guardado como entero de bits.
+
+    El bit i corresponde al empleado con id i. Se combina con & (y), | (o),
+    - (diferencia) y ~ (complemento respecto a todos los empleados); len() cuenta
+    y al iterar devuelve los nombres.
+    """
+
+    __slots__ = ("indice", "bits")
+
+    def __init__(self, indice: "IndiceDias", bits: int):
+        self.indice = indice
+        self.bits = bits
+
+    def __and__(self, otro):
+        return Conjunto(self.indice, self.bits & otro.bits)
+
+    def __or__(self, otro):
+        return Conjunto(self.indice, self.bits | otro.bits)
+
+    def __sub__(self, otro):
+        return Conjunto(self.indice, self.bits & ~otro.bits)
+
+    def __invert__(self):
+        return Conjunto(self.indice, self.indice.universo & ~self.bits)
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __contains__(self, nombre):
+        i = self.indice.empleados.ids.get(nombre)
+        return i is not None and (self.bits >> i) & 1 == 1
+
+    def __iter__(self):
+        nombres, bits = self.indice.empleados.nombres, self.bits
+        while bits:
+            bajo = bits & -bits
+            yield nombres[bajo.bit_length() - 1]
+            bits ^= bajo
+
+
+class IndiceDias:
+    """Para cada día, el conjunto de bits de los empleados que trabajaron.
+
+    Los ids de empleado y de día son los de la TablaRegistros, así que los
+    conjuntos de cualquier día ocupan como mucho nº de empleados / 8 bytes y las
+    consultas (todos, alguno, ninguno y los operadores de Conjunto) son
+    operaciones sobre enteros, sin recorrer registros.
+    """
+
+    def __init__(self, tabla: TablaRegistros):
+        self.empleados = tabla.empleados
+        self.universo = (1 << len(tabla.empleados)) - 1
+        # Cada día se construye en un bytearray (poner un bit es O(1)) y se pasa a int al final
+        mapas = [bytearray((len(tabla.empleados) + 7) // 8) for _ in range(len(tabla.dias))]
+        for e, d in zip(tabla.empleado, tabla.dia):
+            mapas[d][e >> 3] |= 1 << (e & 7)
+        # Los días se guardan por _clave_dia: "Miércoles" y "miercoles" son el mismo
+        self.bits = {}
+        self.nombres = {}  # clave -> nombre del día tal como aparece en el fichero
+        for nombre, mapa in zip(tabla.dias.nombres, mapas):
+            clave = _clave_dia(nombre)
+            self.bits[clave] = self.bits.get(clave, 0) | int.from_bytes(mapa, "little")
+            self.nombres.setdefault(clave, nombre)
+
+    def _bits(self, dia: str) -> int:
+        return self.bits.get(_clave_dia(dia), 0)
+
+    def aparece(self, dia: str) -> bool:
+        """True si alguien trabajó ese día."""
+        return _clave_dia(dia) in self.bits
+
+    def dia(self, dia: str) -> Conjunto:
+        """Empleados que trabajaron ese día (vacío si el día no aparece)."""
+        return Conjunto(self, self._bits(dia))
+
+    def todos(self, dias) -> Conjunto:
+        """Empleados que trabajaron todos los días indicados."""
+        bits = self.universo
+        for dia in dias:
+            bits &= self._bits(dia)
+        return Conjunto(self, bits)
+
+    def alguno(self, dias) -> Conjunto:
+        """Empleados que trabajaron al menos uno de los días indicados."""
+        bits = 0
+        for dia in dias:
+            bits |= self._bits(dia)
+        return Conjunto(self, bits)
+
+    def ninguno(self, dias) -> Conjunto:
+        """Empleados que no trabajaron ninguno de los días indicados."""
+        return ~self.alguno(dias)
+
+    def contar(self, conjunto: Conjunto) -> int:
+        return len(conjunto)
+
+    def dias(self, desde: str = None, hasta: str = None, entre_semana: bool = None):
+        """Días del índice entre desde y hasta (inclusive), en orden.
+
+        Los días pueden ser nombres de DIAS_SEMANA (con o sin tildes) o fechas
+        YYYY-MM-DD; se devuelven con el nombre que tienen en el fichero.
+        entre_semana=True deja solo lunes a viernes y False solo fines de semana.
+        Un desde o hasta que no es un día lanza ValueError.
+        """
+        minimo = _clave_dia(desde) if desde is not None else None
+        maximo = _clave_dia(hasta) if hasta is not None else None
+        elegidos = []
+        for clave in sorted(self.bits):
+            if (minimo is not None and clave < minimo) or (maximo is not None and clave > maximo):
+                continue
+            if entre_semana is not None and (_dia_semana(clave) < 5) != entre_semana:
+                continue
+            elegidos.append(self.nombres[clave])
+        return elegidos
+
+
+def normalizar_dia(dia: str) -> str:
+    """Nombre de día para comparar: sin tildes, sin espacios alrededor y en minúsculas."""
+    descompuesto = unicodedata.normalize("NFKD", dia.strip())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+_POSICION_DIA = {normalizar_dia(dia): i for i, dia in enumerate(DIAS_SEMANA)}
+
+
+def _clave_dia(dia: str):
+    """Clave de orden de un día: (0, posición en la semana) o (1, ordinal de la fecha).
+
+    Es la única forma de comparar días: "Miércoles", "miercoles" y " MIERCOLES"
+    dan la misma clave. Lanza ValueError si no es ni un día de la semana ni una
+    fecha YYYY-MM-DD.
+    """
+    if isinstance(dia, str):
+        posicion = _POSICION_DIA.get(normalizar_dia(dia))
+        if posicion is not None:
+            return (0, posicion)
+        try:
+            return (1, date.fromisoformat(dia.strip()).toordinal())
+        except ValueError:
+            pass
+    raise ValueError(f"día no válido {dia!r}: se espera un día de la semana o una fecha YYYY-MM-DD")
+
+
+def _claves_todos_ninguno(todos, ninguno):
+    """Claves distintas de los días de todos y de ninguno, en orden de aparición.
+
+    Un día en las dos listas es una consulta contradictoria (nadie puede haber
+    trabajado y no trabajado el mismo día): lanza ValueError en vez de devolver
+    un vacío que parezca un resultado.
+    """
+    claves_todos = list(dict.fromkeys(map(_clave_dia, todos)))
+    claves_ninguno = list(dict.fromkeys(map(_clave_dia, ninguno)))
+    comunes = set(claves_todos) & set(claves_ninguno)
+    if comunes:
+        repetidos = [dia for dia in ninguno if _clave_dia(dia) in comunes]
+        raise ValueError(f"días a la vez en 'todos' y en 'ninguno': {', '.join(map(str, repetidos))}")
+    return claves_todos, claves_ninguno
+
+
+def _dia_semana(clave) -> int:
+    """0 = lunes ... 6 = domingo, a partir de la clave de _clave_dia."""
+    return clave[1] if clave[0] == 0 else date.fromordinal(clave[1]).weekday()
+
+
+# Informes de una pasada: se registran antes de leer y se alimentan fila a fila
+class Informe(ABC):
+    """Base de los informes de GestorHorarios.generar_informes().
+
+    empezar() se llama antes de la primera fila, procesar() con cada registro
+    válido y terminar() tras la última; cerrar() se llama siempre, también si
+    la lectura falla, para no dejar ficheros abiertos. Cada informe tiene que
+    definir procesar(); lo demás es opcional.
+    """
+
+    def __init__(self):
+        self._f = None
+
+    def _abrir(self, fichero: str):
+        """Abre data/fichero con un buffer grande y devuelve un csv.writer sobre él."""
+        ruta = os.path.join(os.path.dirname(__file__), "data", fichero)
+        self._f = open(ruta, 'w', newline='', encoding='utf-8', buffering=TAM_BUFFER)
+        return csv.writer(self._f, delimiter=';', quotechar='"')
+
+    def empezar(self):
+        pass
+
+    @abstractmethod
+    def procesar(self, nombre: str, dia: str, entrada: int, salida: int):
+        """Recibe un registro válido de horarios.csv."""
+
+    def terminar(self):
+        pass
+
+    def cerrar(self):
+        if self._f is not None:
+            self._f.close()
+            METRICAS.contar_fichero("bytes_escritos", self._f.name)
+            self._f = None
+
+
+class InformeMadrugadores(Informe):
+    """Como GestorHorarios.empleados_madrugadores: escribe cada fila al leerla."""
+
+    def __init__(self, hora_referencia=8, fichero="madrugadores.csv"):
+        super().__init__()
+        self.hora_referencia = hora_referencia
+        self.fichero = fichero
+        self.madrugadores = set()
+
+    def empezar(self):
+        self._escritor = self._abrir(self.fichero)
+        self._escritor.writerow(["Empleado", "Hora entrada"])
+
+    def procesar(self, nombre, dia, entrada, salida):
+        if entrada < self.hora_referencia:
+            self.madrugadores.add(nombre)
+            self._escritor.writerow([nombre, entrada])
+
+    def terminar(self):
+        self.cerrar()
+        print(f" Archivo '{self.fichero}' creado con {len(self.madrugadores)} empleados.")
+
+
+class InformeResumen(Informe):
+    """Como GestorHorarios.generar_resumen: días distintos y horas por empleado."""
+
+    def __init__(self, fichero="resumen_clases.csv"):
+        super().__init__()
+        self.fichero = fichero
+        self.por_empleado = {}  # nombre -> [horas, set de días]
+
+    def procesar(self, nombre, dia, entrada, salida):
+        acumulado = self.por_empleado.get(nombre)
+        if acumulado is None:
+            acumulado = self.por_empleado[nombre] = [0, set()]
+        acumulado[0] += salida - entrada
+        acumulado[1].add(dia)
+
+    def terminar(self):
+        escritor = self._abrir(self.fichero)
+        escritor.writerow(["Empleado", "Días trabajados", "Horas totales"])
+        escritor.writerows([nombre, len(dias), horas] for nombre, (horas, dias) in self.por_empleado.items())
+        self.cerrar()
+        print(f" Archivo '{self.fichero}' generado correctamente.")
+
+
+class InformeEmpleadosPorDia(Informe):
+    """Como GestorHorarios.mostrar_empleados_por_dia; con fichero, lo escribe en data/."""
+
+    def __init__(self, fichero=None):
+        super().__init__()
+        self.fichero = fichero
+        self.empleados_por_dia = {}
+
+    def procesar(self, nombre, dia, entrada, salida):
+        empleados = self.empleados_por_dia.get(dia)
+        if empleados is None:
+            empleados = self.empleados_por_dia[dia] = set()
+        empleados.add(nombre)
+
+    def terminar(self):
+        if self.fichero is None:
+            print("\nEmpleados por día:")
+            for dia, empleados in self.empleados_por_dia.items():
+                print(f"  {dia}: {', '.join(sorted(empleados))}")
+            return
+        escritor = self._abrir(self.fichero)
+        escritor.writerow(["Día", "Empleados"])
+        escritor.writerows([dia, ", ".join(sorted(empleados))] for dia, empleados in self.empleados_por_dia.items())
+        self.cerrar()
+
+
+class InformeConjuntos(Informe):
+    """Empleados que trabajaron todos los días de `todos` y ninguno de `ninguno`.
+
+    Generaliza operaciones_conjuntos (Lunes y Viernes; Sábado pero no Domingo).
+    Solo guarda, por empleado, una máscara de bits de los días que intervienen.
+    Como el original, no muestra nada si alguno de esos días no aparece en el fichero.
+    Un día repetido en una lista cuenta una vez; en las dos, ValueError.
+    """
+
+    def __init__(self, todos, ninguno=(), titulo=None, fichero=None):
+        super().__init__()
+        claves_todos, claves_ninguno = _claves_todos_ninguno(todos, ninguno)
+        self.dias = {clave: 1 << i for i, clave in enumerate([*claves_todos, *claves_ninguno])}
+        self.mascara_todos = sum(self.dias[clave] for clave in claves_todos)
+        self.mascara_ninguno = sum(self.dias[clave] for clave in claves_ninguno)
+        self._bit_por_nombre = {}  # nombre del día en el fichero -> bit (0 si no interviene)
+        self.titulo = titulo or " " + " y ".join(todos) + "".join(f" sin {d}" for d in ninguno)
+        self.fichero = fichero
+        self.vistos = 0
+        self.mascaras = {}  # nombre -> días (de self.dias) trabajados
+
+    def procesar(self, nombre, dia, entrada, salida):
+        bit = self._bit_por_nombre.get(dia)
+        if bit is None:
+            bit = self._bit_por_nombre[dia] = self.dias.get(_clave_dia(dia), 0)
+        if bit:
+            self.vistos |= bit
+            self.mascaras[nombre] = self.mascaras.get(nombre, 0) | bit
+
+    def resultado(self):
+        return [nombre for nombre, m in self.mascaras.items()
+                if m & self.mascara_todos == self.mascara_todos and not m & self.mascara_ninguno]
+
+    def terminar(self):
+        if self.vistos != self.mascara_todos | self.mascara_ninguno:
+            return
+        empleados = self.resultado()
+        if self.fichero is None:
+            print(f"{self.titulo}: {', '.join(empleados) if empleados else 'Nadie'}")
+            return
+        escritor = self._abrir(self.fichero)
+        escritor.writerow(["Empleado"])
+        escritor.writerows([nombre] for nombre in empleados)
+        self.cerrar()
+
+
+# Validación por columnas
+#
+# horarios.csv se valida por bloques de TAM_BLOQUE filas. En cada bloque se
+# comprueba el número de campos. Después se convierte cada columna de horas de
+# una vez: map(int) más una comprobación de rango con min/max. Solo si eso falla
+# se mira valor a valor con una regex precompilada, sin lanzar excepciones. Los
+# días se comprueban una vez por valor distinto (nombre de la semana o fecha). Por
+# último se comprueba entrada < salida. Las filas rechazadas van con su motivo a
+# data/horarios_rechazados.csv en vez de perderse (o de tumbar la lectura,
+# como pasaba con una hora no numérica).
+COLUMNAS = ("nombre_empleado", "dia", "hora_entrada", "hora_salida")
+RE_HORA = re.compile(r"\s*\d{1,2}\s*")
+HORAS = range(24)
+
+
+def _convertir_horas(columna):
+    """Convierte una columna de horas (0-23); devuelve (valores, posiciones malas)."""
+    unida = "".join(columna)
+    if unida.isascii() and "_" not in unida:  # lo que int() acepta aparte de la regex, al camino lento
+        try:
+            valores = list(map(int, columna))
+        except ValueError:
+            pass
+        else:
+            if min(valores) in HORAS and max(valores) in HORAS:
+                return valores, ()
+    valores, malos = [], []
+    for i, v in enumerate(columna):
+        hora = int(v) if RE_HORA.fullmatch(v) else None
+        if hora is None or hora not in HORAS:
+            hora = None
+            malos.append(i)
+        valores.append(hora)
+    return valores, malos
+
+
+def validar_bloque(filas, primera_linea: int):
+    """Valida un bloque de filas de horarios.csv.
+
+    Devuelve (nombres, dias, entradas, salidas, rechazos): las columnas de las
+    filas válidas, con las horas ya como enteros, y una lista de (línea, fila,
+    motivo). Las filas vacías se saltan sin contar como rechazo.
+    """
+    rechazos = []
+    if set(map(len, filas)) <= {len(COLUMNAS)}:
+        lineas, validas = range(primera_linea, primera_linea + len(filas)), filas
+    else:
+        lineas, validas = [], []
+        for linea, fila in enumerate(filas, primera_linea):
+            if len(fila) == len(COLUMNAS):
+                lineas.append(linea)
+                validas.append(fila)
+            elif fila:
+                rechazos.append((linea, fila, f"se esperaban {len(COLUMNAS)} campos y hay {len(fila)}"))
+    if not validas:
+        return [], [], [], [], rechazos
+
+    nombres, dias, texto_entradas, texto_salidas = zip(*validas)
+    entradas, malas_entrada = _convertir_horas(texto_entradas)
+    salidas, malas_salida = _convertir_horas(texto_salidas)
+    motivos = {}
+    dias_malos = set()
+    for dia in set(dias):  # pocos valores distintos: se comprueba cada uno una vez
+        try:
+            _clave_dia(dia)
+        except ValueError:
+            dias_malos.add(dia)
+    if dias_malos:
+        for i, dia in enumerate(dias):
+            if dia in dias_malos:
+                motivos[i] = f"día no válido {dia!r}"
+    for i in malas_entrada:
+        motivos.setdefault(i, f"hora_entrada no válida {texto_entradas[i]!r} (0-23)")
+    for i in malas_salida:
+        motivos.setdefault(i, f"hora_salida no válida {texto_salidas[i]!r} (0-23)")
+    if motivos or not all(map(lt, entradas, salidas)):
+        for i, (entrada, salida) in enumerate(zip(entradas, salidas)):
+            if i not in motivos and entrada >= salida:
+                motivos[i] = "la hora de entrada debe ser menor que la de salida"
+    if not motivos:
+        return nombres, dias, entradas, salidas, rechazos
+
+    rechazos.extend((lineas[i], validas[i], motivo) for i, motivo in motivos.items())
+    rechazos.sort(key=lambda r: r[0])
+    quedan = [i not in motivos for i in range(len(validas))]
+    return (list(compress(nombres, quedan)), list(compress(dias, quedan)),
+            list(compress(entradas, quedan)), list(compress(salidas, quedan)), rechazos)
+
+
+class Cuarentena:
+    """Filas rechazadas de un CSV, con su motivo, en <nombre>_rechazados.csv junto al original.
+
+    Se reescribe en cada lectura: se crea con el primer rechazo y, si no hay
+    ninguno, se borra el de la lectura anterior. Al cerrar se avisa con una
+    sola línea.
+    """
+
+    def __init__(self, ruta_csv: str):
+        self.ruta = os.path.splitext(ruta_csv)[0] + "_rechazados.csv"
+        self.num_filas = 0
+        self._f = None
+        self._escritor = None
+
+    def agregar(self, rechazos):
+        if not rechazos:
+            return
+        if self._f is None:
+            self._f = open(self.ruta, 'w', newline='', encoding='utf-8')
+            self._escritor = csv.writer(self._f, delimiter=';', quotechar='"')
+            self._escritor.writerow(["linea", "motivo", "fila"])
+        self._escritor.writerows([linea, motivo, *fila] for linea, fila, motivo in rechazos)
+        self.num_filas += len(rechazos)
+
+    def cerrar(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            print(f" Aviso: {self.num_filas} filas rechazadas (motivos en '{os.path.basename(self.ruta)}').")
+        elif os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def bloques_validados(f, cuarentena: Cuarentena, fase: str):
+    """Lee horarios.csv (ya abierto) por bloques y genera las columnas válidas de cada uno.
+
+    Las filas rechazadas van a cuarentena. Las fases se miden con el prefijo fase.
+    """
+    lector = csv.reader(f, delimiter=';', quotechar='"')
+    next(lector, None)  # saltar cabecera si existe
+    linea = 2
+    while True:
+        with METRICAS.fase(f"{fase}.parsear"):
+            bloque = list(islice(lector, TAM_BLOQUE))
+        if not bloque:
+            break
+        with METRICAS.fase(f"{fase}.validar"):
+            *columnas, rechazos = validar_bloque(bloque, linea)
+        cuarentena.agregar(rechazos)
+        linea += len(bloque)
+        yield columnas
+    METRICAS.contar("filas_leidas", linea - 2, "horarios")
+    METRICAS.contar("filas_rechazadas", cuarentena.num_filas, "horarios")
+
+
 # Clase GestorHorarios
 class GestorHorarios:
     """Gestiona la lectura, análisis y escritura de los horarios."""
@@ -48,37 +658,50 @@ class GestorHorarios:
     def __init__(self, fichero_entrada: str):
         # Ruta absoluta al archivo, dentro de la carpeta data/
         self.fichero_entrada = os.path.join(os.path.dirname(__file__), "data", fichero_entrada)
-        self.registros = []
+        self.registros = TablaRegistros()
         self.empleados = {}
         self.empleados_por_dia = {}
+        self._indice = None
+
+    def indice_dias(self) -> IndiceDias:
+        """IndiceDias de los registros leídos (se construye la primera vez que se pide)."""
+        if self._indice is None:
+            self._indice = IndiceDias(self.registros)
+        return self._indice
 
     def leer_csv(self):
-        """Lee el fichero de entrada y crea los objetos RegistroHorario."""
+        """Lee el fichero de entrada y crea los objetos RegistroHorario.
+
+        Las filas con un número de campos distinto de 4, un día que no es de la
+        semana ni una fecha, horas fuera de 0-23 o no numéricas, o con la entrada
+        no anterior a la salida, no se cargan: van con su motivo a
+        data/horarios_rechazados.csv.
+        """
         if not os.path.exists(self.fichero_entrada):
             print(f" Error: No se encontró el archivo {self.fichero_entrada}")
             return
 
-        with open(self.fichero_entrada, newline='', encoding='utf-8') as f:
-            lector = csv.reader(f, delimiter=';', quotechar='"')
-            next(lector, None)  # saltar cabecera si existe
-
-            for fila in lector:
-                if len(fila) != 4:
-                    continue  # ignorar líneas mal formadas
-
-                nombre, dia, h_entrada, h_salida = fila
-                registro = RegistroHorario(nombre, dia, int(h_entrada), int(h_salida))
-                self.registros.append(registro)
-
-                # Añadir al diccionario de empleados
-                if nombre not in self.empleados:
-                    self.empleados[nombre] = Empleado(nombre)
-                self.empleados[nombre].agregar_registro(registro)
-
-                # Añadir al conjunto de empleados por día
-                if dia not in self.empleados_por_dia:
-                    self.empleados_por_dia[dia] = set()
-                self.empleados_por_dia[dia].add(nombre)
+        self._indice = None
+        with Cuarentena(self.fichero_entrada) as cuarentena, \
+                open(self.fichero_entrada, newline='', encoding='utf-8') as f:
+            for columnas in bloques_validados(f, cuarentena, "leer_csv"):
+                with METRICAS.fase("leer_csv.agregar"):
+                    for nombre, dia, entrada, salida in zip(*columnas):
+                        pos = self.registros.agregar(nombre, dia, entrada, salida)
+                        # Cada nombre y día se guarda una vez: los sets y el diccionario usan esa copia
+                        nombre = self.registros.empleados.nombres[self.registros.empleado[pos]]
+                        dia = self.registros.dias.nombres[self.registros.dia[pos]]
+
+                        # Añadir al diccionario de empleados
+                        if nombre not in self.empleados:
+                            self.empleados[nombre] = Empleado(nombre, self.registros)
+                        self.empleados[nombre].agregar_posicion(pos)
+
+                        # Añadir al conjunto de empleados por día
+                        if dia not in self.empleados_por_dia:
+                            self.empleados_por_dia[dia] = set()
+                        self.empleados_por_dia[dia].add(nombre)
+        METRICAS.contar_fichero("bytes_leidos", self.fichero_entrada)
 
         print(f"Se han leído {len(self.registros)} registros correctamente.")
 
@@ -86,29 +709,37 @@ class GestorHorarios:
         """Muestra los empleados que trabajaron cada día."""
         print("\nEmpleados por día:")
         for dia, empleados in self.empleados_por_dia.items():
-            print(f"  {dia}: {', '.join(empleados)}")
+            print(f"  {dia}: {', '.join(sorted(empleados))}")
 
     def operaciones_conjuntos(self):
         """Ejemplos de operaciones de teoría de conjuntos."""
-        if "Lunes" in self.empleados_por_dia and "Viernes" in self.empleados_por_dia:
-            inter = self.empleados_por_dia["Lunes"] & self.empleados_por_dia["Viernes"]
+        indice = self.indice_dias()
+        if indice.aparece("Lunes") and indice.aparece("Viernes"):
+            inter = indice.todos(["Lunes", "Viernes"])
             print(f"\n Empleados que trabajaron Lunes y Viernes: {', '.join(inter) if inter else 'Nadie'}")
 
-        if "Sábado" in self.empleados_por_dia and "Domingo" in self.empleados_por_dia:
-            exclusivos = self.empleados_por_dia["Sábado"] - self.empleados_por_dia["Domingo"]
+        if indice.aparece("Sábado") and indice.aparece("Domingo"):
+            exclusivos = indice.dia("Sábado") - indice.dia("Domingo")
             print(f" Empleados que trabajaron sólo el Sábado: {', '.join(exclusivos) if exclusivos else 'Nadie'}")
 
+    def madrugadores(self, hora_referencia=8):
+        """Lista de (nombre, hora de entrada) de los registros que entran antes de hora_referencia."""
+        tabla = self.registros
+        nombres = tabla.empleados.nombres
+        return [(nombres[e], h) for e, h in zip(tabla.empleado, tabla.entrada) if h < hora_referencia]
+
     def empleados_madrugadores(self, hora_referencia=8):
         """Obtiene empleados que entran antes de una hora dada."""
-        madrugadores = {r.empleado for r in self.registros if r.entrada < hora_referencia}
+        tempranos = self.madrugadores(hora_referencia)
+        madrugadores = {nombre for nombre, _ in tempranos}
         ruta_salida = os.path.join(os.path.dirname(__file__), "data", "madrugadores.csv")
 
-        with open(ruta_salida, 'w', newline='', encoding='utf-8') as f:
+        with METRICAS.fase("empleados_madrugadores.escribir"), \
+                open(ruta_salida, 'w', newline='', encoding='utf-8') as f:
             escritor = csv.writer(f, delimiter=';', quotechar='"')
             escritor.writerow(["Empleado", "Hora entrada"])
-            for r in self.registros:
-                if r.entrada < hora_referencia:
-                    escritor.writerow([r.empleado, r.entrada])
+            escritor.writerows(tempranos)
+        METRICAS.contar_fichero("bytes_escritos", ruta_salida)
 
         print(f" Archivo 'madrugadores.csv' creado con {len(madrugadores)} empleados.")
 
@@ -116,18 +747,65 @@ class GestorHorarios:
         """Crea un archivo con el resumen semanal de cada empleado."""
         ruta_salida = os.path.join(os.path.dirname(__file__), "data", "resumen_clases.csv")
 
-        with open(ruta_salida, 'w', newline='', encoding='utf-8') as f:
+        with METRICAS.fase("generar_resumen.escribir"), open(ruta_salida, 'w', newline='', encoding='utf-8') as f:
             escritor = csv.writer(f, delimiter=';', quotechar='"')
             escritor.writerow(["Empleado", "Días trabajados", "Horas totales"])
             for empleado in self.empleados.values():
                 escritor.writerow(empleado.fila_csv())
+        METRICAS.contar_fichero("bytes_escritos", ruta_salida)
 
         print(" Archivo 'resumen_clases.csv' generado correctamente.")
 
+    def generar_informes(self, *informes: Informe):
+        """Calcula todos los informes en una sola lectura de horarios.csv.
+
+        No construye registros ni empleados: cada fila válida se pasa a cada
+        informe y se descarta, así que la memoria depende de los informes y no
+        del tamaño del fichero. Cada informe escribe su salida una vez.
+        """
+        if not os.path.exists(self.fichero_entrada):
+            print(f" Error: No se encontró el archivo {self.fichero_entrada}")
+            return
+
+        leidos = 0
+        try:
+            for informe in informes:
+                informe.empezar()
+            procesadores = [informe.procesar for informe in informes]
+            with Cuarentena(self.fichero_entrada) as cuarentena, \
+                    open(self.fichero_entrada, newline='', encoding='utf-8') as f:
+                for columnas in bloques_validados(f, cuarentena, "generar_informes"):
+                    with METRICAS.fase("generar_informes.agregar"):
+                        for nombre, dia, entrada, salida in zip(*columnas):
+                            leidos += 1
+                            for procesar in procesadores:
+                                procesar(nombre, dia, entrada, salida)
+            METRICAS.contar_fichero("bytes_leidos", self.fichero_entrada)
+
+            print(f"Se han leído {leidos} registros correctamente.")
+            with METRICAS.fase("generar_informes.escribir"):
+                for informe in informes:
+                    informe.terminar()
+        finally:
+            for informe in informes:
+                informe.cerrar()
+
 
 # Función principal
-def main():
+@perfilar
+def main(una_pasada: bool = False):
     gestor = GestorHorarios("horarios.csv")
+    if una_pasada:
+        gestor.generar_informes(
+            InformeEmpleadosPorDia(),
+            InformeConjuntos(["Lunes", "Viernes"], titulo="\n Empleados que trabajaron Lunes y Viernes"),
+            InformeConjuntos(["Sábado"], ["Domingo"], titulo=" Empleados que trabajaron sólo el Sábado"),
+            InformeMadrugadores(hora_referencia=8),
+            InformeResumen(),
+        )
+        print("\nPrograma finalizado correctamente.")
+        return
+
     gestor.leer_csv()
     gestor.mostrar_empleados_por_dia()
     gestor.operaciones_conjuntos()
@@ -136,6 +814,96 @@ def main():
     print("\nPrograma finalizado correctamente.")
 
 
+# Modo por lotes: se lee el CSV una vez y se responden consultas JSON (una por línea)
+def _madrugadores(gestor, consulta):
+    nombres = dict.fromkeys(nombre for nombre, _ in gestor.madrugadores(consulta.get("hora_referencia", 8)))
+    return {"numero": len(nombres), "empleados": list(nombres)}
+
+
+def _resumen(gestor, consulta):
+    if "nombre" in consulta:
+        empleado = gestor.empleados.get(consulta["nombre"])
+        return empleado.fila_csv() if empleado else None
+    return [empleado.fila_csv() for empleado in gestor.empleados.values()]
+
+
+def _empleados_por_dia(gestor, consulta):
+    if "dia" in consulta:
+        clave = _clave_dia(consulta["dia"])
+        return sorted(set().union(*(empleados for dia, empleados in gestor.empleados_por_dia.items()
+                                    if _clave_dia(dia) == clave)))
+    return {dia: sorted(empleados) for dia, empleados in gestor.empleados_por_dia.items()}
+
+
+def _dias(gestor, consulta):
+    return gestor.indice_dias().dias(consulta.get("desde"), consulta.get("hasta"), consulta.get("entre_semana"))
+
+
+def _conjunto(gestor, consulta):
+    # Trabajaron todos los días de "todos", alguno de "alguno" (si se indica) y ninguno de "ninguno"
+    _claves_todos_ninguno(consulta.get("todos", []), consulta.get("ninguno", []))
+    indice = gestor.indice_dias()
+    resultado = indice.todos(consulta.get("todos", []))
+    if "alguno" in consulta:
+        resultado = resultado & indice.alguno(consulta["alguno"])
+    resultado = resultado - indice.alguno(consulta.get("ninguno", []))
+    return len(resultado) if consulta.get("contar") else list(resultado)
+
+
+CONSULTAS = {
+    "madrugadores": _madrugadores,
+    "resumen": _resumen,
+    "empleados_por_dia": _empleados_por_dia,
+    "dias": _dias,
+    "conjunto": _conjunto,
+}
+
+
+def responder(gestor, consulta):
+    op = consulta.get("op")
+    if op not in CONSULTAS:
+        raise ValueError(f"op desconocida {op!r}; opciones: {', '.join(CONSULTAS)}")
+    return CONSULTAS[op](gestor, consulta)
+
+
+def procesar_lotes(gestor, entrada, salida):
+    for linea in entrada:
+        if not linea.strip():
+            continue
+        respuesta = {"id": None}
+        try:
+            consulta = json.loads(linea)
+            respuesta["id"] = consulta.get("id")
+            respuesta.update(ok=True, resultado=responder(gestor, consulta))
+        except Exception as e:
+            respuesta.update(ok=False, error=str(e))
+        salida.write(json.dumps(respuesta, ensure_ascii=False) + "\n")
+    salida.flush()
+
+
+@perfilar
+def main_lotes(origen="-", fichero="horarios.csv"):
+    gestor = GestorHorarios(fichero)
+    with contextlib.redirect_stdout(sys.stderr):  # stdout queda solo para las respuestas
+        gestor.leer_csv()
+    if origen == "-":
+        procesar_lotes(gestor, sys.stdin, sys.stdout)
+    else:
+        with open(origen, encoding="utf-8") as f:
+            procesar_lotes(gestor, f, sys.stdout)
+
+
 # Ejecución
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Análisis de horarios (data/horarios.csv)")
+    parser.add_argument("--una-pasada", action="store_true", help="calcula los informes en una sola lectura")
+    parser.add_argument("--lotes", nargs="?", const="-", metavar="FICHERO",
+                        help="responde consultas JSON (una por línea) desde FICHERO o stdin; "
+                             '{"op": "conjunto", "todos": ["Lunes", "Viernes"], "contar": true}')
+    parser.add_argument("--fichero", default="horarios.csv", help="CSV de entrada (relativo a data/)")
+    args = parser.parse_args()
+
+    if args.lotes is not None:
+        main_lotes(args.lotes, args.fichero)
+    else:
+        main(una_pasada=args.una_pasada)
@@ -1,8 +1,29 @@
+import argparse
+import contextlib
 import csv
+import hashlib
+import math
+import io
+import json
+import mmap
 import os
 import re
+import struct
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from bisect import bisect_left, bisect_right
 from datetime import datetime, date
-from typing import List, Dict, Tuple, Set
+from functools import lru_cache
+from itertools import accumulate, chain, compress, islice, repeat
+from operator import lt, mul
+from typing import List, Dict, Tuple, Set, Iterable, Iterator, Optional, Sequence, Union
+
+# instrumentacion.py está en la raíz del repositorio, compartido con los otros programas
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from diario import DiarioEscritura  # noqa: E402
+from instrumentacion import Metricas, perfilador  # noqa: E402
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) 
 DATA_DIR = os.path.join(BASE_DIR, "data")  
@@ -12,8 +33,22 @@ CLIENTES_CSV = os.path.join(DATA_DIR, "clientes.csv")
 EVENTOS_CSV = os.path.join(DATA_DIR, "eventos.csv")
 VENTAS_CSV = os.path.join(DATA_DIR, "ventas.csv")
 INFORME_CSV = os.path.join(DATA_DIR, "informe_resumen.csv")
+SNAPSHOT_BIN = os.path.join(DATA_DIR, "snapshot.bin")
+DIARIO_WAL = os.path.join(DATA_DIR, "cambios.wal")  # altas de clientes y ventas pendientes de compactar
+COMPACTAR_CADA = 10_000  # registros en el diario que disparan una compactación en segundo plano
 
 DATE_FORMAT = "%Y-%m-%d"  # fechas: YYYY-MM-DD
+# MINICRM_VERIFICAR=1: estadisticas/exportar_informe comparan las vistas con un recálculo completo
+VERIFICAR_AGREGADOS = os.environ.get("MINICRM_VERIFICAR") == "1"
+TAM_CACHE_FECHAS = 4096  # fechas distintas que recuerda parse_date (unos 11 años de días)
+# MINICRM_METRICAS=fichero: tiempos por fase y contadores, exportados al salir (.prom = Prometheus)
+# MINICRM_PERFIL=prefijo: los puntos de entrada se ejecutan bajo cProfile y tracemalloc
+
+
+# Instrumentación (ver instrumentacion.py)
+METRICAS = Metricas(os.environ.get("MINICRM_METRICAS"), "minicrm")
+perfilar = perfilador("MINICRM_PERFIL")
+
 
 # Clases del dominio
 class Cliente:
@@ -70,6 +105,280 @@ class Venta:
                 self.fecha_venta.strftime(DATE_FORMAT), str(self.cantidad), f"{self.precio_unitario:.2f}"]
 
 
+class TablaVentas:
+    """Almacén columnar de ventas: una array tipada por campo en vez de un objeto Venta por fila.
+
+    Se usa como el antiguo Dict[int, Venta] (len, in, get, values, items...), pero los
+    objetos Venta solo se construyen cuando alguien los pide.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.cliente_id = array("q")
+        self.evento_id = array("q")
+        self.fecha = array("i")  # fecha_venta como date.toordinal()
+        self.cantidad = array("q")
+        self.precio = array("d")
+        # Si los ids llegan en orden creciente (lo normal) se localizan con bisect;
+        # si no, se construye bajo demanda un dict id -> posición.
+        self._ids_crecientes = True
+        self._pos: Optional[Dict[int, int]] = None
+        # Índice por fecha: filas ordenadas por fecha (estable), sus fechas para
+        # bisect y sumas prefijas de total() en ese orden (_acumulado[0] == 0).
+        self._orden = array("q")
+        self._fechas_ordenadas = array("i")
+        self._acumulado = array("d", [0.0])
+        # Agregados materializados (ingresos, precios); se mantienen junto al índice
+        self.agregados = AgregadorVentas()
+        self._indice_activo = True
+        # Si la tabla viene de un snapshot, las columnas son memoryviews sobre
+        # el fichero mapeado (solo lectura) hasta la primera modificación.
+        self._mapa: Optional[mmap.mmap] = None
+
+    COLUMNAS = ("ids", "cliente_id", "evento_id", "fecha", "cantidad", "precio",
+                "_orden", "_fechas_ordenadas", "_acumulado")
+
+    @classmethod
+    def desde_columnas(cls, columnas: Dict[str, memoryview], ids_crecientes: bool,
+                       agregados: "AgregadorVentas", mapa: Optional[mmap.mmap] = None) -> "TablaVentas":
+        """Crea la tabla sobre columnas ya hechas (p. ej. vistas de un snapshot), sin copiarlas."""
+        tabla = cls()
+        for nombre in cls.COLUMNAS:
+            setattr(tabla, nombre, columnas[nombre])
+        tabla._ids_crecientes = ids_crecientes
+        tabla.agregados = agregados
+        tabla._mapa = mapa
+        return tabla
+
+    def columnas(self) -> Dict[str, array]:
+        """Columnas e índice por fecha, listos para volcar a un snapshot."""
+        if not self._indice_activo:
+            self.reconstruir_indice()
+        return {nombre: getattr(self, nombre) for nombre in self.COLUMNAS}
+
+    def _materializar(self):
+        """Copia a arrays propias las columnas mapeadas antes de modificarlas."""
+        if self._mapa is None:
+            return
+        for nombre in self.COLUMNAS:
+            vista = getattr(self, nombre)
+            setattr(self, nombre, array(vista.format, vista))
+            vista.release()
+        self._mapa = None  # el mmap se cierra cuando no quedan vistas
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, id_) -> bool:
+        return self.posicion(id_) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids)
+
+    def __getitem__(self, id_: int) -> Venta:
+        pos = self.posicion(id_)
+        if pos is None:
+            raise KeyError(id_)
+        return self.venta(pos)
+
+    def __setitem__(self, id_: int, v: Venta):
+        self.agregar(id_, v.cliente_id, v.evento_id, v.fecha_venta, v.cantidad, v.precio_unitario)
+
+    def posicion(self, id_: int) -> Optional[int]:
+        """Devuelve la fila en la que está la venta con ese id (o None)."""
+        if self._ids_crecientes:
+            i = bisect_left(self.ids, id_)
+            return i if i < len(self.ids) and self.ids[i] == id_ else None
+        if self._pos is None:
+            self._pos = {v: i for i, v in enumerate(self.ids)}
+        return self._pos.get(id_)
+
+    def agregar(self, id_: int, cliente_id: int, evento_id: int, fecha_venta: date,
+                cantidad: int, precio_unitario: float) -> int:
+        """Añade (o sustituye, como hacía el dict) una venta y devuelve su fila."""
+        self._materializar()
+        fecha_ord = fecha_venta.toordinal()
+        pos = self.posicion(id_)
+        if pos is not None:
+            precio_anterior = self.precio[pos]
+            if self._indice_activo:
+                self._desindexar(pos)
+                self.agregados.quitar(self.evento_id[pos], self.cantidad[pos], precio_anterior)
+            self.cliente_id[pos] = cliente_id
+            self.evento_id[pos] = evento_id
+            self.fecha[pos] = fecha_ord
+            self.cantidad[pos] = cantidad
+            self.precio[pos] = precio_unitario
+            if self._indice_activo:
+                self._indexar(pos)
+                self.agregados.agregar(evento_id, cantidad, precio_unitario)
+                if precio_anterior in (self.agregados.min_precio, self.agregados.max_precio):
+                    self.agregados.min_precio, self.agregados.max_precio = min(self.precio), max(self.precio)
+            return pos
+
+        pos = len(self.ids)
+        if pos and id_ < self.ids[-1]:
+            self._ids_crecientes = False
+        self.ids.append(id_)
+        self.cliente_id.append(cliente_id)
+        self.evento_id.append(evento_id)
+        self.fecha.append(fecha_ord)
+        self.cantidad.append(cantidad)
+        self.precio.append(precio_unitario)
+        if self._pos is not None:
+            self._pos[id_] = pos
+        if self._indice_activo:
+            self._indexar(pos)
+            self.agregados.agregar(evento_id, cantidad, precio_unitario)
+        return pos
+
+    def extender(self, ids: array, cliente_id: array, evento_id: array, fecha: array,
+                 cantidad: array, precio: array):
+        """Añade un lote de columnas de golpe (p. ej. el resultado de un worker).
+
+        Si los ids del lote son crecientes y mayores que los existentes se copian con
+        array.extend; si no, se añaden fila a fila para respetar la sustitución por id.
+        """
+        if not ids:
+            return
+        self._materializar()
+        if (self._ids_crecientes and self._pos is None and not self._indice_activo
+                and (not self.ids or self.ids[-1] < ids[0]) and all(map(lt, ids, ids[1:]))):
+            self.ids.extend(ids)
+            self.cliente_id.extend(cliente_id)
+            self.evento_id.extend(evento_id)
+            self.fecha.extend(fecha)
+            self.cantidad.extend(cantidad)
+            self.precio.extend(precio)
+            return
+        for fila in zip(ids, cliente_id, evento_id, map(date.fromordinal, fecha), cantidad, precio):
+            self.agregar(*fila)
+
+    # Índice ordenado por fecha y agregados
+    def pausar_indice(self):
+        """Deja de mantener el índice por fecha y los agregados (para cargas masivas)."""
+        self._materializar()
+        self._indice_activo = False
+
+    def reconstruir_indice(self):
+        """Reconstruye el índice por fecha y los agregados de una vez: O(n log n)."""
+        orden = sorted(range(len(self.ids)), key=self.fecha.__getitem__)
+        self._orden = array("q", orden)
+        self._fechas_ordenadas = array("i", map(self.fecha.__getitem__, orden))
+        totales = map(mul, map(self.cantidad.__getitem__, orden), map(self.precio.__getitem__, orden))
+        self._acumulado = array("d", accumulate(totales, initial=0.0))
+        self.agregados = AgregadorVentas.desde_columnas(self.evento_id, self.cantidad, self.precio)
+        self._indice_activo = True
+
+    def _indexar(self, pos: int):
+        """Inserta la fila en el índice; si su fecha es la mayor, cuesta O(1)."""
+        f = self.fecha[pos]
+        k = bisect_right(self._fechas_ordenadas, f)
+        if k == len(self._orden):
+            self._orden.append(pos)
+            self._fechas_ordenadas.append(f)
+            self._acumulado.append(self._acumulado[-1] + self.cantidad[pos] * self.precio[pos])
+        else:
+            self._orden.insert(k, pos)
+            self._fechas_ordenadas.insert(k, f)
+            self._recalcular_acumulado(k)
+
+    def _desindexar(self, pos: int):
+        f = self.fecha[pos]
+        lo = bisect_left(self._fechas_ordenadas, f)
+        hi = bisect_right(self._fechas_ordenadas, f)
+        k = self._orden.index(pos, lo, hi)
+        del self._orden[k]
+        del self._fechas_ordenadas[k]
+        self._recalcular_acumulado(k)
+
+    def _recalcular_acumulado(self, desde: int):
+        """Rehace las sumas prefijas a partir de la posición desde del índice."""
+        acumulado = self._acumulado
+        inicial = acumulado[desde]
+        del acumulado[desde:]
+        resto = self._orden[desde:]
+        totales = map(mul, map(self.cantidad.__getitem__, resto), map(self.precio.__getitem__, resto))
+        acumulado.extend(accumulate(totales, initial=inicial))
+
+    def _limites_rango(self, desde: date, hasta: date) -> Tuple[int, int]:
+        if not self._indice_activo:
+            self.reconstruir_indice()
+        lo = bisect_left(self._fechas_ordenadas, desde.toordinal())
+        hi = bisect_right(self._fechas_ordenadas, hasta.toordinal())
+        return lo, max(lo, hi)
+
+    def max_id(self) -> int:
+        """Mayor id de venta (0 si no hay ninguna); O(1) si los ids son crecientes."""
+        if not self.ids:
+            return 0
+        return self.ids[-1] if self._ids_crecientes else max(self.ids)
+
+    def venta(self, pos: int) -> Venta:
+        """Construye el objeto Venta de una fila concreta."""
+        return Venta(self.ids[pos], self.cliente_id[pos], self.evento_id[pos],
+                     date.fromordinal(self.fecha[pos]), self.cantidad[pos], self.precio[pos])
+
+    def get(self, id_: int, default=None):
+        pos = self.posicion(id_)
+        return default if pos is None else self.venta(pos)
+
+    def keys(self) -> Iterator[int]:
+        return iter(self.ids)
+
+    def values(self) -> Iterator[Venta]:
+        return (self.venta(i) for i in range(len(self.ids)))
+
+    def items(self) -> Iterator[Tuple[int, Venta]]:
+        return ((self.ids[i], self.venta(i)) for i in range(len(self.ids)))
+
+    def lote(self, filas: Optional[Sequence[int]] = None) -> "Lote":
+        """Las columnas (todas o solo `filas`) como lote para el motor de joins, con su total."""
+        columnas = {"id": self.ids, "cliente_id": self.cliente_id, "evento_id": self.evento_id,
+                    "fecha": self.fecha, "cantidad": self.cantidad, "precio": self.precio}
+        if filas is not None:
+            columnas = tomar_filas(columnas, filas)
+        columnas["total"] = array("d", map(mul, columnas["cantidad"], columnas["precio"]))
+        return columnas
+
+    # Agregados sobre columnas completas (sin crear objetos Venta)
+    def totales(self) -> Iterator[float]:
+        """cantidad * precio_unitario de cada fila, en el mismo orden que las columnas."""
+        return map(mul, self.cantidad, self.precio)
+
+    def ingresos_totales(self) -> float:
+        return sum(self.totales())
+
+    def ingresos_por_evento(self) -> Dict[int, float]:
+        ingresos: Dict[int, float] = {}
+        get = ingresos.get
+        for ev_id, total in zip(self.evento_id, self.totales()):
+            ingresos[ev_id] = get(ev_id, 0.0) + total
+        return ingresos
+
+    def resumen_precios(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Tupla (min, max, media) de precios unitarios."""
+        if not self.precio:
+            return (None, None, None)
+        return (min(self.precio), max(self.precio), sum(self.precio) / len(self.precio))
+
+    def filas_por_id(self) -> List[int]:
+        """Filas ordenadas por id de venta."""
+        if self._ids_crecientes:
+            return list(range(len(self.ids)))
+        return sorted(range(len(self.ids)), key=self.ids.__getitem__)
+
+    def filas_en_rango(self, desde: date, hasta: date) -> array:
+        """Filas con desde <= fecha_venta <= hasta, ya ordenadas por fecha: O(log n + k)."""
+        lo, hi = self._limites_rango(desde, hasta)
+        return self._orden[lo:hi]
+
+    def total_en_rango(self, desde: date, hasta: date) -> float:
+        """Suma de total() de las ventas del rango con las sumas prefijas: O(log n)."""
+        lo, hi = self._limites_rango(desde, hasta)
+        return self._acumulado[hi] - self._acumulado[lo]
+
+
 # Funciones utilitarias CSV
 def ensure_data_files():
     """Crea la carpeta data/ y archivos de ejemplo si no existen."""
@@ -85,9 +394,6 @@ def ensure_data_files():
     if not os.path.exists(EVENTOS_CSV):
         with open(EVENTOS_CSV, "w", newline="", encoding="utf-8") as f:
             w = csv.writer(f, delimiter=";", quotechar='"', quoting=csv.QUOTE_MINIMAL)
-            today = date.today()
-            w.writerow(["1", "Concierto Rock", (today.replace(day=min(28, today.day)) + 
-                                               datetime.timedelta(days=10)).strftime(DATE_FORMAT) if False else (today.strftime(DATE_FORMAT)) , "Música"])
             w.writerow(["1", "Concierto Rock", (date.today()).strftime(DATE_FORMAT), "Música"])
             w.writerow(["2", "Feria Tecnología", (date.today()).strftime(DATE_FORMAT), "Tecnología"])
             w.writerow(["3", "Mercado Vintage", (date.today()).strftime(DATE_FORMAT), "Ocio"])
@@ -100,78 +406,1002 @@ def ensure_data_files():
             w.writerow(["3", "3", "2", date.today().strftime(DATE_FORMAT), "3", "10.00"])
 
 
+@lru_cache(maxsize=TAM_CACHE_FECHAS)
 def parse_date(s: str) -> date:
+    """Convierte 'YYYY-MM-DD' en date.
+
+    Las ventas repiten muy pocas fechas distintas, así que el resultado se cachea
+    por la cadena original (aciertos/fallos en parse_date.cache_info()). La forma
+    canónica se trocea a mano; cualquier otra cosa pasa por strptime, que es quien
+    decide qué se acepta y con qué error (ValueError) se rechaza.
+    """
+    if len(s) == 10 and s[4] == "-" and s[7] == "-" and s.isascii():
+        anio, mes, dia = s[:4], s[5:7], s[8:]
+        if anio.isdigit() and mes.isdigit() and dia.isdigit():
+            return date(int(anio), int(mes), int(dia))
     return datetime.strptime(s, DATE_FORMAT).date()
 
 
+# Parseo de filas (compartido por la carga completa y el modo streaming)
+def parsear_cliente(fila: List[str]) -> Cliente:
+    id_, nombre, email, fecha_alta = fila
+    id_i = int(id_)
+    return Cliente(id_i, nombre, email, parse_date(fecha_alta))
+
+
+def parsear_evento(fila: List[str]) -> Evento:
+    id_, titulo, fecha_evento, categoria = fila
+    id_i = int(id_)
+    return Evento(id_i, titulo, parse_date(fecha_evento), categoria)
+
+
+def parsear_venta(fila: List[str]) -> Tuple[int, int, int, date, int, float]:
+    """Devuelve (id, cliente_id, evento_id, fecha_venta, cantidad, precio_unitario)."""
+    id_, cliente_id, evento_id, fecha_venta, cantidad, precio_unitario = fila
+    return (int(id_), int(cliente_id), int(evento_id), parse_date(fecha_venta),
+            int(cantidad), float(precio_unitario))
+
+
+# Validación por columnas
+#
+# Los CSV se validan por bloques y no fila a fila con try/except. En cada bloque
+# se comprueba primero el número de campos. Después se convierte cada columna
+# completa según su tipo. El caso habitual (columna limpia) es un solo
+# map(int/float) más una comprobación de rango también con map. Solo si eso
+# falla se pasa la regex precompilada del tipo valor a valor para marcar los
+# malos; ese camino no lanza excepciones. Las fechas se convierten una vez por
+# valor distinto. Por último se aplican las comprobaciones entre columnas. Los
+# fallos se recogen como (línea, fila, motivo) y van a un fichero de cuarentena.
+# Las líneas se cuentan como registros del CSV (se asume que ningún campo
+# entrecomillado contiene saltos de línea, igual que en la carga paralela).
+RE_EMAIL = re.compile(r"[\w\.-]+@[\w\.-]+\.\w+")
+RE_ENTERO = re.compile(r"\s*[+-]?\d+\s*")
+RE_DECIMAL = re.compile(r"\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?\s*")
+RANGO_ENTERO = range(-10 ** 18 + 1, 10 ** 18)  # cabe en un array 'q'
+
+
+def _por_patron(patron: "re.Pattern", convertir=None, valido=None, columna_valida=None):
+    """Conversor de columna: convierte los valores que casan con patron (y cumplen valido).
+
+    columna_valida es la misma comprobación que valido hecha sobre la columna
+    entera de una vez, para el caso habitual. Devuelve (valores, posiciones
+    malas); en las posiciones malas el valor es None.
+    """
+    def conversor(columna: Sequence[str]) -> Tuple[list, Sequence[int]]:
+        if convertir is not None:
+            unida = "".join(columna)
+            # Lo que int()/float() aceptan aparte de la regex (1_000, nan, inf) no pasa por aquí
+            if unida.isascii() and "_" not in unida:
+                try:
+                    valores = list(map(convertir, columna))
+                except ValueError:
+                    pass
+                else:
+                    if columna_valida is None or columna_valida(valores):
+                        return valores, ()
+        valores, malos = [], []
+        for i, v in enumerate(columna):
+            ok = patron.fullmatch(v) is not None
+            if ok and convertir is not None:
+                v = convertir(v)
+                ok = valido is None or valido(v)
+            valores.append(v if ok else None)
+            if not ok:
+                malos.append(i)
+        return valores, malos
+    return conversor
+
+
+def _convertir_fechas(columna: Sequence[str]) -> Tuple[list, Sequence[int]]:
+    """Conversor de columna de fechas: parse_date una vez por valor distinto."""
+    fechas: Dict[str, Optional[date]] = {}
+    for valor in set(columna):
+        try:
+            fechas[valor] = parse_date(valor)
+        except ValueError:
+            fechas[valor] = None
+    valores = list(map(fechas.__getitem__, columna))
+    if None not in fechas.values():
+        return valores, ()
+    return valores, [i for i, v in enumerate(valores) if v is None]
+
+
+# tipo -> (conversor, descripción del error); "texto" no se comprueba
+TIPOS = {
+    "entero": (_por_patron(RE_ENTERO, int, RANGO_ENTERO.__contains__,
+                           lambda v: min(v) in RANGO_ENTERO and max(v) in RANGO_ENTERO), "entero no válido"),
+    # una suma finita implica que no hay nan ni inf (si desborda, se mira valor a valor)
+    "decimal": (_por_patron(RE_DECIMAL, float, math.isfinite, lambda v: math.isfinite(sum(v))),
+                "número no válido"),
+    "fecha": (_convertir_fechas, "fecha no válida"),
+    "email": (_por_patron(RE_EMAIL), "email no válido"),
+    "texto": (None, None),
+}
+
+Rechazo = Tuple[int, List[str], str]  # (línea, fila, motivo)
+
+
+class Esquema:
+    """Columnas (nombre, tipo) de un CSV y comprobaciones entre columnas.
+
+    Cada comprobación es (motivo, función): la función recibe el dict de columnas
+    ya convertidas y devuelve un iterable de bools (True = fila correcta).
+    """
+
+    def __init__(self, columnas: Sequence[Tuple[str, str]], comprobaciones: Sequence[Tuple[str, object]] = ()):
+        self.nombres = [nombre for nombre, _ in columnas]
+        self.tipos = [tipo for _, tipo in columnas]
+        self.comprobaciones = comprobaciones
+
+    def validar(self, filas: Sequence[List[str]], primera_linea: int = 1
+                ) -> Tuple[Dict[str, list], List[Rechazo]]:
+        """Valida un bloque de filas.
+
+        Devuelve (columnas, rechazos). columnas es un dict nombre -> valores ya
+        convertidos de las filas válidas, en orden. rechazos es una lista
+        (línea, fila, motivo) ordenada por línea. Las filas vacías se saltan sin
+        contar como rechazo.
+        """
+        n = len(self.nombres)
+        rechazos: List[Rechazo] = []
+        if set(map(len, filas)) <= {n}:  # caso habitual: nada que separar
+            lineas: Sequence[int] = range(primera_linea, primera_linea + len(filas))
+            validas: Sequence[List[str]] = filas
+        else:
+            lineas, validas = [], []
+            for linea, fila in enumerate(filas, primera_linea):
+                if len(fila) == n:
+                    lineas.append(linea)
+                    validas.append(fila)
+                elif fila:
+                    rechazos.append((linea, fila, f"se esperaban {n} campos y hay {len(fila)}"))
+
+        columnas: Dict[str, list] = {}
+        malas: Dict[int, str] = {}  # posición en validas -> primer motivo
+        for nombre, tipo, columna in zip(self.nombres, self.tipos, zip(*validas)):
+            conversor, descripcion = TIPOS[tipo]
+            if conversor is None:
+                columnas[nombre] = list(columna)
+                continue
+            columnas[nombre], errores = conversor(columna)
+            for i in errores:
+                malas.setdefault(i, f"{nombre}: {descripcion} {columna[i]!r}")
+        if not columnas:
+            columnas = {nombre: [] for nombre in self.nombres}
+        if malas:
+            lineas, validas, columnas = self._separar(malas, lineas, validas, columnas, rechazos)
+
+        for motivo, comprobar in self.comprobaciones:
+            correctas = list(comprobar(columnas))
+            if not all(correctas):
+                malas = {i: motivo for i, ok in enumerate(correctas) if not ok}
+                lineas, validas, columnas = self._separar(malas, lineas, validas, columnas, rechazos)
+        rechazos.sort(key=lambda r: r[0])
+        return columnas, rechazos
+
+    @staticmethod
+    def _separar(malas: Dict[int, str], lineas, validas, columnas: Dict[str, list], rechazos: List[Rechazo]):
+        """Pasa las posiciones malas a rechazos y las quita de lineas, validas y columnas."""
+        rechazos.extend((lineas[i], validas[i], motivo) for i, motivo in malas.items())
+        quedan = [i not in malas for i in range(len(validas))]
+        return (list(compress(lineas, quedan)), list(compress(validas, quedan)),
+                {nombre: list(compress(valores, quedan)) for nombre, valores in columnas.items()})
+
+
+ESQUEMAS = {
+    "clientes": Esquema([("id", "entero"), ("nombre", "texto"), ("email", "email"), ("fecha_alta", "fecha")]),
+    "eventos": Esquema([("id", "entero"), ("titulo", "texto"), ("fecha_evento", "fecha"), ("categoria", "texto")]),
+    "ventas": Esquema([("id", "entero"), ("cliente_id", "entero"), ("evento_id", "entero"),
+                       ("fecha_venta", "fecha"), ("cantidad", "entero"), ("precio_unitario", "decimal")]),
+}
+
+
+def columnas_ventas(columnas: Dict[str, list]) -> Tuple[array, array, array, array, array, array]:
+    """Columnas validadas de ventas como arrays, en el orden de TablaVentas.extender."""
+    return (array("q", columnas["id"]), array("q", columnas["cliente_id"]), array("q", columnas["evento_id"]),
+            array("i", map(date.toordinal, columnas["fecha_venta"])), array("q", columnas["cantidad"]),
+            array("d", columnas["precio_unitario"]))
+
+
+class Cuarentena:
+    """Filas rechazadas de un CSV, con su motivo, en <nombre>_rechazados.csv junto al original.
+
+    El fichero se reescribe en cada lectura: se crea con el primer rechazo y,
+    si no hay ninguno, se borra el de la lectura anterior. Al cerrar se avisa
+    con una sola línea en vez de una por fila.
+    """
+
+    def __init__(self, ruta_csv: str, tabla: str):
+        self.ruta = os.path.splitext(ruta_csv)[0] + "_rechazados.csv"
+        self.tabla = tabla
+        self.num_filas = 0
+        self._f = None
+        self._w = None
+
+    def agregar(self, rechazos: Sequence[Rechazo]):
+        if not rechazos:
+            return
+        if self._f is None:
+            self._f = open(self.ruta, "w", newline="", encoding="utf-8")
+            self._w = csv.writer(self._f, delimiter=";", quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            self._w.writerow(["linea", "motivo", "fila"])
+        self._w.writerows([linea, motivo, *fila] for linea, fila, motivo in rechazos)
+        self.num_filas += len(rechazos)
+
+    def cerrar(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            print(f"[WARN] {self.num_filas} filas de {self.tabla} rechazadas (motivos en {self.ruta})")
+        elif os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# Modo streaming: memoria constante sea cual sea el tamaño de ventas.csv
+TAM_BLOQUE = 10_000  # filas por bloque en el modo streaming
+
+
+def leer_bloques(ruta: str, tam_bloque: int = TAM_BLOQUE) -> Iterator[List[List[str]]]:
+    """Genera bloques de como mucho tam_bloque filas del CSV, sin leerlo entero."""
+    with open(ruta, newline="", encoding="utf-8") as f:
+        r = csv.reader(f, delimiter=";", quotechar='"')
+        while True:
+            bloque = list(islice(r, tam_bloque))
+            if not bloque:
+                return
+            yield bloque
+
+
+def ventas_en_streaming(ruta: Optional[str] = None, tam_bloque: int = TAM_BLOQUE
+                        ) -> Iterator[Tuple[int, int, int, date, int, float]]:
+    """Parsea ventas.csv de forma perezosa, bloque a bloque (las filas inválidas van a cuarentena)."""
+    ruta = ruta or VENTAS_CSV
+    leidas = 0
+    with Cuarentena(ruta, "ventas") as cuarentena:
+        for bloque in leer_bloques(ruta, tam_bloque):
+            columnas, rechazos = ESQUEMAS["ventas"].validar(bloque, leidas + 1)
+            cuarentena.agregar(rechazos)
+            leidas += len(bloque)
+            yield from zip(*(columnas[nombre] for nombre in ESQUEMAS["ventas"].nombres))
+
+
+class AgregadorVentas:
+    """Acumuladores de ventas que se actualizan fila a fila (ingresos y precios)."""
+
+    def __init__(self):
+        self.ingresos_totales = 0.0
+        self.ingresos_por_evento: Dict[int, float] = {}
+        self.ventas_por_evento: Dict[int, int] = {}
+        self.num_ventas = 0
+        self.suma_precios = 0.0
+        self.min_precio: Optional[float] = None
+        self.max_precio: Optional[float] = None
+
+    @classmethod
+    def desde_columnas(cls, evento_id, cantidad, precio) -> "AgregadorVentas":
+        """Calcula los agregados de golpe a partir de las columnas de TablaVentas."""
+        ag = cls()
+        totales = array("d", map(mul, cantidad, precio))
+        ag.ingresos_totales = sum(totales)
+        ingresos, conteo = ag.ingresos_por_evento, ag.ventas_por_evento
+        for ev_id, total in zip(evento_id, totales):
+            ingresos[ev_id] = ingresos.get(ev_id, 0.0) + total
+            conteo[ev_id] = conteo.get(ev_id, 0) + 1
+        ag.num_ventas = len(precio)
+        if precio:
+            ag.suma_precios = sum(precio)
+            ag.min_precio, ag.max_precio = min(precio), max(precio)
+        return ag
+
+    def a_dict(self) -> Dict[str, object]:
+        """Estado serializable a JSON (para el snapshot)."""
+        return {"ingresos_totales": self.ingresos_totales, "num_ventas": self.num_ventas,
+                "suma_precios": self.suma_precios, "min_precio": self.min_precio,
+                "max_precio": self.max_precio,
+                "por_evento": [[ev_id, self.ingresos_por_evento[ev_id], self.ventas_por_evento[ev_id]]
+                               for ev_id in self.ingresos_por_evento]}
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, object]) -> "AgregadorVentas":
+        ag = cls()
+        for campo in ("ingresos_totales", "num_ventas", "suma_precios", "min_precio", "max_precio"):
+            setattr(ag, campo, datos[campo])
+        for ev_id, ingresos, n in datos["por_evento"]:
+            ag.ingresos_por_evento[ev_id] = ingresos
+            ag.ventas_por_evento[ev_id] = n
+        return ag
+
+    def agregar(self, evento_id: int, cantidad: int, precio_unitario: float):
+        total = cantidad * precio_unitario
+        self.ingresos_totales += total
+        self.ingresos_por_evento[evento_id] = self.ingresos_por_evento.get(evento_id, 0.0) + total
+        self.ventas_por_evento[evento_id] = self.ventas_por_evento.get(evento_id, 0) + 1
+        self.num_ventas += 1
+        self.suma_precios += precio_unitario
+        if self.min_precio is None or precio_unitario < self.min_precio:
+            self.min_precio = precio_unitario
+        if self.max_precio is None or precio_unitario > self.max_precio:
+            self.max_precio = precio_unitario
+
+    def quitar(self, evento_id: int, cantidad: int, precio_unitario: float):
+        """Deshace un agregar() (cuando una venta se sustituye por otra con el mismo id).
+
+        min/max no se pueden deshacer: si hace falta, quien llama los recalcula.
+        """
+        total = cantidad * precio_unitario
+        self.ingresos_totales -= total
+        self.num_ventas -= 1
+        self.suma_precios -= precio_unitario
+        self.ventas_por_evento[evento_id] -= 1
+        if self.ventas_por_evento[evento_id]:
+            self.ingresos_por_evento[evento_id] -= total
+        else:
+            del self.ventas_por_evento[evento_id]
+            del self.ingresos_por_evento[evento_id]
+
+    def tupla_precios(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Tupla (min, max, media) de precios unitarios."""
+        if not self.num_ventas:
+            return (None, None, None)
+        return (self.min_precio, self.max_precio, self.suma_precios / self.num_ventas)
+
+
+class AgregadorSinRepetidos(AgregadorVentas):
+    """AgregadorVentas que, como cargar_datos, cuenta solo la última venta de cada id.
+
+    Recuerda (evento_id, cantidad, precio) de cada id visto para poder restar la
+    venta sustituida; no guarda fechas, clientes ni objetos Venta. Como quitar()
+    no deshace min/max, terminar() los recalcula si hubo sustituciones.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.ultimas: Dict[int, Tuple[int, int, float]] = {}
+        self.sustituidas = 0
+
+    def agregar_venta(self, id_: int, evento_id: int, cantidad: int, precio_unitario: float):
+        anterior = self.ultimas.get(id_)
+        if anterior is not None:
+            self.quitar(*anterior)
+            self.sustituidas += 1
+        self.ultimas[id_] = (evento_id, cantidad, precio_unitario)
+        self.agregar(evento_id, cantidad, precio_unitario)
+
+    def terminar(self) -> "AgregadorSinRepetidos":
+        if self.sustituidas and self.ultimas:
+            precios = [precio for _, _, precio in self.ultimas.values()]
+            self.min_precio, self.max_precio = min(precios), max(precios)
+        return self
+
+
+def agregar_ventas_en_streaming(ruta: Optional[str] = None, tam_bloque: int = TAM_BLOQUE,
+                                agregador: Optional[AgregadorSinRepetidos] = None) -> AgregadorSinRepetidos:
+    """Recorre ventas.csv una sola vez acumulando los agregados (última fila de cada id).
+
+    Con agregador se acumula encima de uno ya empezado.
+    """
+    if agregador is None:
+        agregador = AgregadorSinRepetidos()
+    for id_, _, evento_id, _, cantidad, precio in ventas_en_streaming(ruta, tam_bloque):
+        agregador.agregar_venta(id_, evento_id, cantidad, precio)
+    return agregador.terminar()
+
+
+def exportar_informe_streaming(tam_bloque: int = TAM_BLOQUE) -> AgregadorVentas:
+    """Genera informe_resumen.csv sin cargar las ventas en memoria.
+
+    Solo se guardan los títulos de los eventos, un acumulado por evento_id y,
+    por cada id de venta, su evento, cantidad y precio. Como en cargar_datos, si
+    un id se repite (en el CSV compactado o en el diario) cuenta solo la última
+    fila.
+    """
+    titulos: Dict[int, str] = {}
+    leidas = 0
+    try:
+        with Cuarentena(EVENTOS_CSV, "eventos") as cuarentena:
+            for bloque in leer_bloques(EVENTOS_CSV, tam_bloque):
+                columnas, rechazos = ESQUEMAS["eventos"].validar(bloque, leidas + 1)
+                cuarentena.agregar(rechazos)
+                leidas += len(bloque)
+                titulos.update(zip(columnas["id"], columnas["titulo"]))
+    except FileNotFoundError:
+        print(f"[ERROR] No se encontró {EVENTOS_CSV}")
+
+    agregador = AgregadorSinRepetidos()
+    try:
+        agregar_ventas_en_streaming(VENTAS_CSV, tam_bloque, agregador)
+    except FileNotFoundError:
+        print(f"[ERROR] No se encontró {VENTAS_CSV}")
+    for registro in DiarioEscritura(DIARIO_WAL).registros(recortar=False):
+        if registro.get("tabla") == "ventas":
+            try:
+                id_, _, evento_id, _, cantidad, precio = parsear_venta(registro["fila"])
+                agregador.agregar_venta(id_, evento_id, cantidad, precio)
+            except Exception as e:
+                print(f"[WARN] registro del diario inválido {registro}: {e}")
+    agregador.terminar()
+
+    with open(INFORME_CSV, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, delimiter=";", quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        w.writerow(["evento_id", "titulo", "ingresos_totales"])
+        for ev_id, ingreso in agregador.ingresos_por_evento.items():
+            w.writerow([ev_id, titulos.get(ev_id, ""), f"{ingreso:.2f}"])
+
+    print(f"Informe exportado a {INFORME_CSV} ({agregador.num_ventas} ventas en streaming)")
+    return agregador
+
+
+# Snapshot binario: columnas empaquetadas + tabla de cadenas, junto a los CSV.
+# Formato: b"MCRM", versión y longitud de la cabecera (struct "<4sII"), cabecera JSON
+# con la firma de los CSV y la posición de cada sección, y las secciones alineadas a 8 bytes.
+SNAPSHOT_MAGIC = b"MCRM"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_CON_HASH = False  # True: además de mtime/tamaño, compara el SHA-1 de los CSV
+_CABECERA = struct.Struct("<4sII")
+
+
+def _alinear(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _sha1_fichero(ruta: str) -> str:
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(1 << 20), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def firma_fuentes(con_hash: Optional[bool] = None) -> Dict[str, list]:
+    """mtime/tamaño (y opcionalmente hash) de los tres CSV; FileNotFoundError si falta alguno.
+
+    Sin con_hash se usa el valor de SNAPSHOT_CON_HASH en el momento de la llamada.
+    """
+    if con_hash is None:
+        con_hash = SNAPSHOT_CON_HASH
+    firma = {}
+    for nombre, ruta in (("clientes", CLIENTES_CSV), ("eventos", EVENTOS_CSV), ("ventas", VENTAS_CSV)):
+        st = os.stat(ruta)
+        firma[nombre] = [st.st_mtime_ns, st.st_size]
+        if con_hash:
+            firma[nombre].append(_sha1_fichero(ruta))
+    return firma
+
+
+def tabla_cadenas(cadenas) -> Tuple[array, bytes]:
+    """Empaqueta cadenas como (offsets, bytes UTF-8); la i-ésima es datos[offsets[i]:offsets[i+1]]."""
+    datos = [c.encode("utf-8") for c in cadenas]
+    return array("q", accumulate(map(len, datos), initial=0)), b"".join(datos)
+
+
+def leer_tabla_cadenas(offsets, datos) -> List[str]:
+    return [str(datos[a:b], "utf-8") for a, b in zip(offsets, offsets[1:])]
+
+
+def escribir_snapshot(ruta: str, firma: Dict[str, list], secciones: Dict[str, object], meta: Dict[str, object]):
+    """Escribe el snapshot de forma atómica (fichero temporal + os.replace)."""
+    indice, offset = {}, 0
+    for nombre, datos in secciones.items():
+        tipo = datos.typecode if isinstance(datos, array) else "B"
+        indice[nombre] = [offset, tipo, len(datos)]
+        offset = _alinear(offset + len(datos) * (datos.itemsize if tipo != "B" else 1))
+    cabecera = json.dumps({"fuentes": firma, "secciones": indice, "meta": meta}).encode("utf-8")
+    inicio_datos = _alinear(_CABECERA.size + len(cabecera))
+
+    tmp = ruta + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_CABECERA.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(cabecera)))
+        f.write(cabecera)
+        for nombre, datos in secciones.items():
+            f.seek(inicio_datos + indice[nombre][0])
+            f.write(datos.tobytes() if isinstance(datos, array) else datos)
+    os.replace(tmp, ruta)
+
+
+def abrir_snapshot(ruta: str):
+    """Mapea el snapshot en memoria. Devuelve (cabecera, secciones, mmap) o None si no vale.
+
+    Las secciones son memoryviews sobre el mmap: no se copia nada hasta que se usa.
+    Un fichero de otra versión, truncado (p. ej. un corte al copiarlo) o con la
+    cabecera dañada cuenta como que no hay snapshot.
+    """
+    try:
+        with open(ruta, "rb") as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # no existe o está vacío
+        return None
+    vista = memoryview(mapa)
+    secciones: Dict[str, memoryview] = {}
+    try:
+        magic, version, tam_cabecera = _CABECERA.unpack_from(mapa)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("no es un snapshot de esta versión")
+        inicio_datos = _alinear(_CABECERA.size + tam_cabecera)
+        cabecera = json.loads(mapa[_CABECERA.size:_CABECERA.size + tam_cabecera])
+        if not isinstance(cabecera.get("fuentes"), dict) or not isinstance(cabecera.get("meta"), dict):
+            raise ValueError("cabecera incompleta")
+        for nombre, (offset, tipo, n) in cabecera["secciones"].items():
+            ini = inicio_datos + offset
+            tam = n * (array(tipo).itemsize if tipo != "B" else 1)
+            if ini + tam > len(mapa):
+                raise ValueError(f"snapshot truncado en la sección {nombre}")
+            secciones[nombre] = vista[ini:ini + tam].cast(tipo)
+    except (struct.error, ValueError, TypeError, KeyError, AttributeError):
+        for seccion in secciones.values():
+            seccion.release()
+        vista.release()
+        mapa.close()
+        return None
+    vista.release()
+    return cabecera, secciones, mapa
+
+
+# Carga paralela: cada CSV se parte en rangos de bytes alineados a fin de línea
+# (se asume que ningún campo entrecomillado contiene saltos de línea).
+TAM_MINIMO_RANGO = 1 << 20  # por debajo de 1 MB por rango no compensa repartir
+
+
+def dividir_en_rangos(ruta: str, partes: int) -> List[Tuple[int, int]]:
+    """Divide el fichero en como mucho `partes` rangos [inicio, fin) que empiezan a principio de línea."""
+    tam = os.path.getsize(ruta)
+    partes = max(1, min(partes, tam // TAM_MINIMO_RANGO or 1))
+    cortes = [0]
+    with open(ruta, "rb") as f:
+        for k in range(1, partes):
+            f.seek(max(cortes[-1], tam * k // partes))
+            f.readline()  # avanzar hasta el principio de la siguiente línea
+            pos = f.tell()
+            if pos >= tam:
+                break
+            if pos > cortes[-1]:
+                cortes.append(pos)
+    cortes.append(tam)
+    return list(zip(cortes, cortes[1:]))
+
+
+def _parsear_rango(ruta: str, tabla: str, inicio: int, fin: int):
+    """Trabajo de cada proceso: parsea las líneas de un rango de bytes.
+
+    Devuelve (filas, errores, num_lineas). Para ventas las filas son columnas
+    (arrays); para clientes/eventos, tuplas. Los errores llevan el número de
+    línea relativo al rango.
+    """
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        texto = f.read(fin - inicio).decode("utf-8")
+    num_lineas = texto.count("\n") + (0 if texto.endswith("\n") or not texto else 1)
+
+    esquema = ESQUEMAS[tabla]
+    r = csv.reader(io.StringIO(texto, newline=""), delimiter=";", quotechar='"')
+    columnas, errores = esquema.validar(list(r))
+    if tabla == "ventas":
+        filas = columnas_ventas(columnas)
+    else:
+        filas = list(zip(*(columnas[nombre] for nombre in esquema.nombres)))
+    return filas, errores, num_lineas
+
+
+def parsear_csv_en_paralelo(executor: ProcessPoolExecutor, ruta: str, tabla: str, partes: int):
+    """Reparte el CSV entre los procesos y devuelve los resultados en orden de fichero,
+    con los números de línea de los errores ya traducidos a líneas del fichero original."""
+    rangos = dividir_en_rangos(ruta, partes)
+    futuros = [executor.submit(_parsear_rango, ruta, tabla, ini, fin) for ini, fin in rangos]
+    lineas_previas = 0
+    for fut in futuros:
+        filas, errores, num_lineas = fut.result()
+        yield filas, [(lineas_previas + n, fila, msg) for n, fila, msg in errores]
+        lineas_previas += num_lineas
+
+
+def anexar_csv(ruta: str, filas: Iterable[List[str]]):
+    """Añade filas al final de ruta, en el sitio y con fsync: cuesta O(filas), no O(fichero).
+
+    Las líneas que ya había no se tocan, tampoco las que no pasan la validación
+    (siguen yendo a cuarentena en cada carga) ni su formato. Si el proceso muere
+    a mitad puede quedar una última línea cortada (o, si se corta dentro del id,
+    una fila que va a cuarentena); el diario rotado sigue en su sitio y hace de
+    registro de rehacer: la carga lo aplica encima del CSV y la siguiente
+    compactación vuelve a añadir sus filas detrás, empezando en línea nueva. Como
+    la carga se queda con la última fila de cada id, repetirlas no cambia nada.
+    """
+    texto = io.StringIO()
+    csv.writer(texto, delimiter=";", quotechar='"', quoting=csv.QUOTE_MINIMAL,
+               lineterminator="\n").writerows(filas)
+    with open(ruta, "a+b") as f:
+        if f.seek(0, os.SEEK_END):
+            # la última línea puede no llevar salto (o estar cortada por una compactación anterior)
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        f.write(texto.getvalue().encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# Motor de joins por lotes. Un lote es un dict columna -> secuencia (lista o array),
+# todas de la misma longitud. Los joins recorren la tabla grande en lotes de
+# TAM_LOTE_JOIN filas y resuelven las claves con dict.get/map, sin tocar objetos.
+Lote = Dict[str, Sequence]
+TAM_LOTE_JOIN = 100_000
+
+
+def num_filas(lote: Lote) -> int:
+    return len(next(iter(lote.values()))) if lote else 0
+
+
+def tomar_filas(lote: Lote, filas: Sequence[int]) -> Lote:
+    """Nuevo lote con solo las filas indicadas (en ese orden)."""
+    return {nombre: list(map(col.__getitem__, filas)) for nombre, col in lote.items()}
+
+
+def dividir_en_lotes(lote: Lote, tam_lote: int = TAM_LOTE_JOIN) -> Iterator[Lote]:
+    for ini in range(0, num_filas(lote), tam_lote):
+        yield {nombre: col[ini:ini + tam_lote] for nombre, col in lote.items()}
+
+
+def concatenar(lotes: Iterable[Lote]) -> Lote:
+    """Junta varios lotes con las mismas columnas en uno solo."""
+    lotes = list(lotes)
+    if not lotes:
+        return {}
+    return {nombre: list(chain.from_iterable(l[nombre] for l in lotes)) for nombre in lotes[0]}
+
+
+def hash_join(izq: Union[Lote, Iterable[Lote]], der: Lote, clave_izq: str, clave_der: Optional[str] = None,
+              tipo: str = "inner", columnas: Optional[Sequence[str]] = None, prefijo: str = "",
+              tam_lote: int = TAM_LOTE_JOIN) -> Iterator[Lote]:
+    """Hash join de izq (un lote o un iterable de lotes) contra der.
+
+    tipo "inner" descarta las filas sin pareja; "left" las conserva con None en las
+    columnas de der. Se añaden las `columnas` de der (todas menos la clave por
+    defecto), renombradas con `prefijo`. Devuelve los lotes enriquecidos, en el
+    orden de izq; si una clave se repite en der, cuenta su última fila.
+
+    La tabla hash se construye sobre el lado más pequeño: normalmente der, pero
+    si izq es un lote con menos filas (p. ej. una página de ventas contra todos
+    los clientes) se indexa izq y der solo se recorre, sin copiar sus columnas.
+    """
+    if tipo not in ("inner", "left"):
+        raise ValueError(f"tipo de join desconocido: {tipo}")
+    clave_der = clave_der or clave_izq
+    if columnas is None:
+        columnas = [c for c in der if c != clave_der]
+    nulo = num_filas(der)  # fila extra (todo None) para las claves sin pareja
+
+    if isinstance(izq, dict) and num_filas(izq) < nulo:
+        filas_der = _filas_der_indexando_izq(izq[clave_izq], der[clave_der], nulo)
+        valores = {c: der[c] for c in columnas}
+        yield _unir_filas(izq, filas_der, nulo, tipo, valores, prefijo, extendidas=False)
+        return
+
+    tabla = dict(zip(der[clave_der], range(nulo)))
+    extendidas = {c: list(der[c]) + [None] for c in columnas}
+    lotes = dividir_en_lotes(izq, tam_lote) if isinstance(izq, dict) else izq
+    for lote in lotes:
+        filas_der = list(map(tabla.get, lote[clave_izq], repeat(nulo)))
+        yield _unir_filas(lote, filas_der, nulo, tipo, extendidas, prefijo, extendidas=True)
+
+
+def _filas_der_indexando_izq(claves_izq: Sequence, claves_der: Sequence, nulo: int) -> List[int]:
+    """Fila de der que corresponde a cada fila de izq (nulo si no hay), con la tabla hash sobre izq."""
+    posiciones: Dict[object, List[int]] = {}
+    for i, k in enumerate(claves_izq):
+        posiciones.setdefault(k, []).append(i)
+    filas_der = [nulo] * len(claves_izq)
+    # der se recorre en C; solo se visitan en Python las filas con pareja (la última gana)
+    for j in compress(range(nulo), map(posiciones.__contains__, claves_der)):
+        for i in posiciones[claves_der[j]]:
+            filas_der[i] = j
+    return filas_der
+
+
+def _unir_filas(lote: Lote, filas_der: List[int], nulo: int, tipo: str, columnas_der: Dict[str, Sequence],
+                prefijo: str, extendidas: bool) -> Lote:
+    """Añade a lote las columnas de der de filas_der. Con extendidas, cada columna ya trae el None en nulo."""
+    if tipo == "inner":
+        seleccion = list(compress(range(len(filas_der)), map(nulo.__ne__, filas_der)))
+        if len(seleccion) < len(filas_der):
+            lote = tomar_filas(lote, seleccion)
+            filas_der = list(map(filas_der.__getitem__, seleccion))
+    salida = dict(lote)
+    for c, col in columnas_der.items():
+        if extendidas:
+            salida[prefijo + c] = list(map(col.__getitem__, filas_der))
+        else:
+            salida[prefijo + c] = [None if j == nulo else col[j] for j in filas_der]
+    return salida
+
+
+def registro_cliente(cliente: Cliente) -> dict:
+    """Registro del diario para el alta (o sustitución) de un cliente."""
+    return {"tabla": "clientes", "fila": cliente.to_csv_row()}
+
+
+def registro_venta(id_: int, cliente_id: int, evento_id: int, fecha_venta: date, cantidad: int,
+                   precio_unitario: float) -> dict:
+    """Registro del diario para una venta.
+
+    El precio va con dos decimales, como en ventas.csv, salvo que eso pierda
+    precisión (entonces con repr): la fila se copia tal cual al compactar.
+    """
+    precio = f"{precio_unitario:.2f}"
+    if float(precio) != precio_unitario:
+        precio = repr(precio_unitario)
+    return {"tabla": "ventas", "fila": [str(id_), str(cliente_id), str(evento_id),
+                                        fecha_venta.strftime(DATE_FORMAT), str(cantidad), precio]}
+
+
 # Gestor principal
 class GestorMiniCRM:
     def __init__(self):
         self.clientes: Dict[int, Cliente] = {}
         self.eventos: Dict[int, Evento] = {}
-        self.ventas: Dict[int, Venta] = {}
+        self.ventas = TablaVentas()
         self.categorias: Set[str] = set()
         self.loaded = False
+        self._max_id_cliente = 0  # para que nueva_id(self.clientes) sea O(1)
+        # Vistas materializadas sobre eventos (las de ventas viven en self.ventas.agregados)
+        self._eventos_por_categoria: Dict[str, int] = {}
+        self._fecha_evento_min: Optional[date] = None
+        self._lotes: Dict[str, Lote] = {}  # clientes/eventos en columnas para los joins
+        self.diario = DiarioEscritura(DIARIO_WAL)
+        self._compactacion: Optional[threading.Thread] = None
 
-    def cargar_datos(self):
-        """Lee los tres CSV y llena las colecciones (manejo de FileNotFoundError)."""
-        try:
-            with open(CLIENTES_CSV, newline="", encoding="utf-8") as f:
-                r = csv.reader(f, delimiter=";", quotechar='"')
-                for fila in r:
-                    if not fila:
-                        continue
-                    id_, nombre, email, fecha_alta = fila
-                    try:
-                        id_i = int(id_)
-                        fecha = parse_date(fecha_alta)
-                        self.clientes[id_i] = Cliente(id_i, nombre, email, fecha)
-                    except Exception as e:
-                        print(f"[WARN] fila clientes inválida {fila}: {e}")
-        except FileNotFoundError:
-            print(f"[ERROR] No se encontró {CLIENTES_CSV}")
+    def _registrar_cliente(self, cliente: Cliente):
+        self.clientes[cliente.id] = cliente
+        self._lotes.pop("clientes", None)
+        if cliente.id > self._max_id_cliente:
+            self._max_id_cliente = cliente.id
+
+    def _registrar_evento(self, ev: Evento):
+        """Inserta/sustituye un evento manteniendo categorías y fecha mínima al día."""
+        anterior = self.eventos.get(ev.id)
+        self.eventos[ev.id] = ev
+        self._lotes.pop("eventos", None)
+        self.categorias.add(ev.categoria)
+        if anterior is not None:
+            self._eventos_por_categoria[anterior.categoria] -= 1
+            if not self._eventos_por_categoria[anterior.categoria]:
+                del self._eventos_por_categoria[anterior.categoria]
+            if anterior.fecha_evento == self._fecha_evento_min:
+                self._fecha_evento_min = min(e.fecha_evento for e in self.eventos.values())
+        self._eventos_por_categoria[ev.categoria] = self._eventos_por_categoria.get(ev.categoria, 0) + 1
+        if self._fecha_evento_min is None or ev.fecha_evento < self._fecha_evento_min:
+            self._fecha_evento_min = ev.fecha_evento
 
+    def lote_clientes(self) -> Lote:
+        """Clientes en columnas (id, nombre, email, fecha_alta); se cachea hasta el próximo alta."""
+        if "clientes" not in self._lotes:
+            clientes = self.clientes.values()
+            self._lotes["clientes"] = {
+                "id": list(self.clientes), "nombre": [c.nombre for c in clientes],
+                "email": [c.email for c in clientes], "fecha_alta": [c.fecha_alta for c in clientes]}
+        return self._lotes["clientes"]
+
+    def lote_eventos(self) -> Lote:
+        """Eventos en columnas (id, titulo, fecha_evento, categoria), cacheado."""
+        if "eventos" not in self._lotes:
+            eventos = self.eventos.values()
+            self._lotes["eventos"] = {
+                "id": list(self.eventos), "titulo": [e.titulo for e in eventos],
+                "fecha_evento": [e.fecha_evento for e in eventos], "categoria": [e.categoria for e in eventos]}
+        return self._lotes["eventos"]
+
+    def ventas_enriquecidas(self, filas: Optional[Sequence[int]] = None) -> Iterator[Lote]:
+        """Lotes de ventas (todas o las `filas` dadas) con nombre de cliente y título de evento.
+
+        Left join: si falta el cliente/evento, la columna vale None.
+        """
+        lotes = hash_join(self.ventas.lote(filas), self.lote_clientes(), "cliente_id", "id",
+                          tipo="left", columnas=["nombre"], prefijo="cliente_")
+        return hash_join(lotes, self.lote_eventos(), "evento_id", "id",
+                         tipo="left", columnas=["titulo"], prefijo="evento_")
+
+    def ingresos_por_evento_con_titulo(self) -> Lote:
+        """Ingresos por evento (vista materializada) unidos con el título del evento."""
+        ingresos = self.ventas.agregados.ingresos_por_evento
+        lote = {"evento_id": list(ingresos), "ingresos": list(ingresos.values())}
+        return concatenar(hash_join(lote, self.lote_eventos(), "evento_id", "id",
+                                    tipo="left", columnas=["titulo"]))
+
+    def guardar_snapshot(self):
+        """Vuelca las colecciones a SNAPSHOT_BIN, firmado con el estado actual de los CSV."""
         try:
-            with open(EVENTOS_CSV, newline="", encoding="utf-8") as f:
-                r = csv.reader(f, delimiter=";", quotechar='"')
-                for fila in r:
-                    if not fila:
-                        continue
-                    id_, titulo, fecha_evento, categoria = fila
-                    try:
-                        id_i = int(id_)
-                        fecha = parse_date(fecha_evento)
-                        ev = Evento(id_i, titulo, fecha, categoria)
-                        self.eventos[id_i] = ev
-                        self.categorias.add(categoria)
-                    except Exception as e:
-                        print(f"[WARN] fila eventos inválida {fila}: {e}")
+            firma = firma_fuentes()
         except FileNotFoundError:
-            print(f"[ERROR] No se encontró {EVENTOS_CSV}")
+            return  # sin los tres CSV no hay nada que cachear
+        clientes = list(self.clientes.values())
+        eventos = list(self.eventos.values())
+        secciones: Dict[str, object] = {
+            "clientes.id": array("q", (c.id for c in clientes)),
+            "clientes.fecha_alta": array("i", (c.fecha_alta.toordinal() for c in clientes)),
+            "eventos.id": array("q", (e.id for e in eventos)),
+            "eventos.fecha_evento": array("i", (e.fecha_evento.toordinal() for e in eventos)),
+        }
+        for tabla, objetos, campos in (("clientes", clientes, ("nombre", "email")),
+                                       ("eventos", eventos, ("titulo", "categoria"))):
+            for campo in campos:
+                offsets, datos = tabla_cadenas(getattr(o, campo) for o in objetos)
+                secciones[f"{tabla}.{campo}.offsets"] = offsets
+                secciones[f"{tabla}.{campo}"] = datos
+        for nombre, columna in self.ventas.columnas().items():
+            secciones[f"ventas.{nombre}"] = columna
+        try:
+            escribir_snapshot(SNAPSHOT_BIN, firma, secciones,
+                              {"ids_crecientes": self.ventas._ids_crecientes,
+                               "agregados": self.ventas.agregados.a_dict()})
+        except OSError as e:
+            print(f"[WARN] no se pudo guardar el snapshot: {e}")
+
+    def cargar_snapshot(self) -> bool:
+        """Carga las colecciones desde SNAPSHOT_BIN si sigue correspondiendo a los CSV.
+
+        Las columnas de ventas se quedan mapeadas en memoria (sin copiar).
+        Devuelve False si no hay snapshot o si los CSV han cambiado.
+        """
+        with METRICAS.fase("cargar_snapshot.abrir"):
+            abierto = abrir_snapshot(SNAPSHOT_BIN)
+        if abierto is None:
+            return False
+        cabecera, sec, mapa = abierto
+        guardada = cabecera["fuentes"]
+        with METRICAS.fase("cargar_snapshot.validar"):
+            try:
+                con_hash = any(len(v) > 2 for v in guardada.values())
+                vigente = guardada == firma_fuentes(con_hash)
+            except FileNotFoundError:
+                vigente = False
+        if not vigente:
+            for vista in sec.values():
+                vista.release()
+            mapa.close()
+            return False
+        METRICAS.contar_fichero("bytes_leidos", SNAPSHOT_BIN)
+
+        with METRICAS.fase("cargar_snapshot.parsear"):
+            self._desde_secciones(cabecera, sec, mapa)
+        with METRICAS.fase("cargar_datos.diario"):
+            self.reproducir_diario()
+        self.loaded = True
+        return True
+
+    def _desde_secciones(self, cabecera: dict, sec: Dict[str, memoryview], mapa: mmap.mmap):
+        """Rellena las colecciones con las secciones de un snapshot ya validado."""
+        nombres = leer_tabla_cadenas(sec["clientes.nombre.offsets"], sec["clientes.nombre"])
+        emails = leer_tabla_cadenas(sec["clientes.email.offsets"], sec["clientes.email"])
+        self.clientes = {id_: Cliente(id_, nombre, email, date.fromordinal(f))
+                         for id_, nombre, email, f in zip(sec["clientes.id"], nombres, emails,
+                                                          sec["clientes.fecha_alta"])}
+        titulos = leer_tabla_cadenas(sec["eventos.titulo.offsets"], sec["eventos.titulo"])
+        categorias = leer_tabla_cadenas(sec["eventos.categoria.offsets"], sec["eventos.categoria"])
+        self.eventos = {}
+        self._eventos_por_categoria = {}
+        self._fecha_evento_min = None
+        for id_, titulo, f, categoria in zip(sec["eventos.id"], titulos, sec["eventos.fecha_evento"], categorias):
+            self._registrar_evento(Evento(id_, titulo, date.fromordinal(f), categoria))
+        self.categorias = set(categorias)
+        self._max_id_cliente = max(self.clientes, default=0)
+        self._lotes.clear()
+        for nombre, vista in sec.items():
+            if not nombre.startswith("ventas."):
+                vista.release()
+        columnas = {nombre: sec[f"ventas.{nombre}"] for nombre in TablaVentas.COLUMNAS}
+        self.ventas = TablaVentas.desde_columnas(columnas, cabecera["meta"]["ids_crecientes"],
+                                                 AgregadorVentas.desde_dict(cabecera["meta"]["agregados"]), mapa)
+
+    def cargar_datos(self, usar_snapshot: bool = True):
+        """Lee los tres CSV y llena las colecciones (manejo de FileNotFoundError).
+
+        Las filas que no cumplen el esquema de su tabla no se cargan: se apartan,
+        con el motivo, en <tabla>_rechazados.csv.
+
+        Si hay un snapshot binario al día se usa en lugar de parsear los CSV; si no,
+        se parsean y se deja el snapshot escrito para el siguiente arranque.
+        """
+        if usar_snapshot and self.cargar_snapshot():
+            print("✅ Datos cargados (snapshot).")
+            return
 
+        self._cargar_csv(CLIENTES_CSV, "clientes")
+        self._cargar_csv(EVENTOS_CSV, "eventos")
+        # el índice por fecha se construye de una vez al terminar la carga
+        self.ventas.pausar_indice()
+        self._cargar_csv(VENTAS_CSV, "ventas")
+        self._terminar_carga()
+
+    def _registrar_columnas(self, tabla: str, columnas: Dict[str, list]):
+        """Añade a las colecciones las filas ya validadas de un bloque (en columnas)."""
+        if tabla == "ventas":
+            self.ventas.extender(*columnas_ventas(columnas))
+        elif tabla == "clientes":
+            for cliente in map(Cliente, columnas["id"], columnas["nombre"], columnas["email"],
+                               columnas["fecha_alta"]):
+                self._registrar_cliente(cliente)
+        else:
+            for evento in map(Evento, columnas["id"], columnas["titulo"], columnas["fecha_evento"],
+                              columnas["categoria"]):
+                self._registrar_evento(evento)
+
+    def _cargar_csv(self, ruta: str, tabla: str):
+        """Lee ruta por bloques, los valida con su esquema y registra las filas válidas."""
+        esquema = ESQUEMAS[tabla]
+        leidas = 0
         try:
-            with open(VENTAS_CSV, newline="", encoding="utf-8") as f:
-                r = csv.reader(f, delimiter=";", quotechar='"')
-                for fila in r:
-                    if not fila:
-                        continue
-                    id_, cliente_id, evento_id, fecha_venta, cantidad, precio_unitario = fila
-                    try:
-                        id_i = int(id_)
-                        clin = int(cliente_id)
-                        evn = int(evento_id)
-                        fecha = parse_date(fecha_venta)
-                        cantidad_i = int(cantidad)
-                        precio = float(precio_unitario)
-                        self.ventas[id_i] = Venta(id_i, clin, evn, fecha, cantidad_i, precio)
-                    except Exception as e:
-                        print(f"[WARN] fila ventas inválida {fila}: {e}")
+            with Cuarentena(ruta, tabla) as cuarentena:
+                bloques = leer_bloques(ruta)
+                while True:
+                    with METRICAS.fase("cargar_datos.parsear"):
+                        bloque = next(bloques, None)
+                    if bloque is None:
+                        break
+                    with METRICAS.fase("cargar_datos.validar"):
+                        columnas, rechazos = esquema.validar(bloque, leidas + 1)
+                    with METRICAS.fase("cargar_datos.agregar"):
+                        self._registrar_columnas(tabla, columnas)
+                    cuarentena.agregar(rechazos)
+                    leidas += len(bloque)
         except FileNotFoundError:
-            print(f"[ERROR] No se encontró {VENTAS_CSV}")
+            print(f"[ERROR] No se encontró {ruta}")
+            return
+        METRICAS.contar("filas_leidas", leidas, tabla)
+        METRICAS.contar("filas_rechazadas", cuarentena.num_filas, tabla)
+        METRICAS.contar_fichero("bytes_leidos", ruta)
 
+    def _terminar_carga(self):
+        """Índice por fecha, snapshot de los CSV y, encima, los cambios del diario."""
+        with METRICAS.fase("cargar_datos.indexar"):
+            self.ventas.reconstruir_indice()
         self.loaded = True
+        with METRICAS.fase("cargar_datos.escribir_snapshot"):
+            self.guardar_snapshot()  # el snapshot es de los CSV; el diario se aplica encima
+        METRICAS.contar_fichero("bytes_escritos", SNAPSHOT_BIN)
+        with METRICAS.fase("cargar_datos.diario"):
+            self.reproducir_diario()
         print("✅ Datos cargados.")
 
+    def cargar_datos_paralelo(self, procesos: Optional[int] = None):
+        """Como cargar_datos, pero parsea cada CSV por rangos en un ProcessPoolExecutor.
+
+        Los resultados se fusionan en orden de fichero, así que el resultado es el
+        mismo que el de la carga secuencial; las filas inválidas van a cuarentena
+        con su número de línea original.
+        """
+        procesos = procesos or os.cpu_count() or 1
+        partes = procesos * 4  # rangos más pequeños que procesos para repartir mejor
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            for tabla, ruta in (("clientes", CLIENTES_CSV), ("eventos", EVENTOS_CSV), ("ventas", VENTAS_CSV)):
+                if not os.path.exists(ruta):
+                    print(f"[ERROR] No se encontró {ruta}")
+                    continue
+                if tabla == "ventas":
+                    self.ventas.pausar_indice()
+                validas = rechazadas = 0
+                with METRICAS.fase("cargar_datos.parsear"), Cuarentena(ruta, tabla) as cuarentena:
+                    for filas, errores in parsear_csv_en_paralelo(executor, ruta, tabla, partes):
+                        cuarentena.agregar(errores)
+                        rechazadas += len(errores)
+                        if tabla == "ventas":
+                            self.ventas.extender(*filas)
+                            validas += len(filas[0])
+                        elif tabla == "clientes":
+                            for id_, nombre, email, fecha in filas:
+                                self._registrar_cliente(Cliente(id_, nombre, email, fecha))
+                            validas += len(filas)
+                        else:
+                            for id_, titulo, fecha, categoria in filas:
+                                self._registrar_evento(Evento(id_, titulo, fecha, categoria))
+                            validas += len(filas)
+                METRICAS.contar("filas_leidas", validas + rechazadas, tabla)
+                METRICAS.contar("filas_rechazadas", rechazadas, tabla)
+                METRICAS.contar_fichero("bytes_leidos", ruta)
+        self._terminar_carga()
+
     def listar(self, tabla: str):
         """Imprime la tabla formateada: clientes, eventos o ventas."""
         if not self.loaded:
@@ -188,21 +1418,28 @@ class GestorMiniCRM:
                 print(e)
         elif tabla.lower() == "ventas":
             print("\n--- Ventas ---")
-            for v in sorted(self.ventas.values(), key=lambda x: x.id):
+            for i in self.ventas.filas_por_id():
+                v = self.ventas.venta(i)
                 print(f"{v} => total: {v.total():.2f}")
         else:
             print("Tabla desconocida. Opciones: clientes, eventos, ventas.")
 
     def nueva_id(self, colec: Dict[int, object]) -> int:
-        """Genera nuevo id entero (1 + max existente)."""
+        """Genera nuevo id entero (1 + max existente).
+
+        Para clientes y ventas el máximo se lleva al día, así que es O(1).
+        """
+        if colec is self.clientes:
+            return self._max_id_cliente + 1
+        if isinstance(colec, TablaVentas):
+            return colec.max_id() + 1
         if not colec:
             return 1
         return max(colec.keys()) + 1
 
     def validar_email(self, email: str) -> bool:
         """Validación sencilla de email."""
-        pattern = r"^[\w\.-]+@[\w\.-]+\.\w+$"
-        return re.match(pattern, email) is not None
+        return RE_EMAIL.fullmatch(email) is not None
 
     def alta_cliente(self):
         """Pide datos por input, valida y añade el cliente (y guarda incrementalmente)."""
@@ -221,19 +1458,172 @@ class GestorMiniCRM:
                 print("[ERROR] Fecha no válida.")
                 return
 
-        nuevo_id = self.nueva_id(self.clientes)
-        cliente = Cliente(nuevo_id, nombre, email, fecha_alta)
-        self.clientes[nuevo_id] = cliente
-
-        # Guardar incrementalmente al CSV
+        # Se anota en el diario (O(registro)) y solo después se da por hecho
         try:
-            with open(CLIENTES_CSV, "a", newline="", encoding="utf-8") as f:
-                w = csv.writer(f, delimiter=";", quotechar='"', quoting=csv.QUOTE_MINIMAL)
-                w.writerow(cliente.to_csv_row())
-            print(f"✅ Cliente añadido con id {nuevo_id}.")
+            cliente = Cliente(self.nueva_id(self.clientes), nombre, email, fecha_alta)
+            self.anotar([registro_cliente(cliente)])
+            self._registrar_cliente(cliente)
+            self.compactar_si_toca()
+            print(f"✅ Cliente añadido con id {cliente.id}.")
         except Exception as e:
             print(f"[ERROR] al guardar cliente: {e}")
 
+    def alta_clientes_bulk(self, datos: Iterable[Tuple], tam_lote: int = 10_000,
+                           fsync: bool = True) -> List[int]:
+        """Alta masiva sin input(): cada elemento es (nombre, email) o (nombre, email, fecha_alta).
+
+        fecha_alta puede ser date, 'YYYY-MM-DD' o None (hoy). Los elementos
+        inválidos se avisan y se saltan. Como en alta_cliente, el diario va
+        primero: las altas se anotan en lotes de tam_lote y cada lote se aplica en
+        memoria solo después de anotarlo. Devuelve los ids asignados.
+        """
+        nuevos: List[int] = []
+        lote: List[Cliente] = []
+        siguiente = self.nueva_id(self.clientes)
+
+        def volcar():
+            clientes = lote[:]
+            lote.clear()  # si anotar falla, el lote se pierde entero y no se reintenta en el finally
+            self.anotar([registro_cliente(c) for c in clientes], fsync)
+            for c in clientes:
+                self._registrar_cliente(c)
+                nuevos.append(c.id)
+
+        try:
+            for n, elemento in enumerate(datos, start=1):
+                cliente = self._cliente_bulk(n, elemento, siguiente)
+                if cliente is None:
+                    continue
+                lote.append(cliente)
+                siguiente += 1
+                if len(lote) >= tam_lote:
+                    volcar()
+        finally:
+            if lote:
+                volcar()
+            self.compactar_si_toca()
+        print(f"✅ {len(nuevos)} clientes añadidos.")
+        return nuevos
+
+    def _cliente_bulk(self, n: int, elemento, id_: int) -> Optional[Cliente]:
+        """Valida un elemento de alta_clientes_bulk; None (con aviso) si no es válido."""
+        try:
+            nombre, email, *resto = elemento
+        except (TypeError, ValueError):
+            print(f"[WARN] alta {n} ignorada: se esperaba (nombre, email[, fecha_alta]), no {elemento!r}")
+            return None
+        if len(resto) > 1 or not isinstance(nombre, str) or not isinstance(email, str):
+            print(f"[WARN] alta {n} ignorada: se esperaba (nombre, email[, fecha_alta]), no {elemento!r}")
+            return None
+        nombre, email = nombre.strip(), email.strip()
+        if not nombre:
+            print(f"[WARN] alta {n} ignorada: falta el nombre")
+            return None
+        if not self.validar_email(email):
+            print(f"[WARN] alta {n} ignorada: email no válido {email!r}")
+            return None
+        fecha = resto[0] if resto else None
+        if fecha is None:
+            fecha_alta = date.today()
+        elif isinstance(fecha, datetime):
+            fecha_alta = fecha.date()
+        elif isinstance(fecha, date):
+            fecha_alta = fecha
+        else:
+            try:
+                fecha_alta = parse_date(fecha) if isinstance(fecha, str) else None
+            except ValueError:
+                fecha_alta = None
+            if fecha_alta is None:
+                print(f"[WARN] alta {n} ignorada: fecha no válida {fecha!r}")
+                return None
+        return Cliente(id_, nombre, email, fecha_alta)
+
+    def registrar_venta(self, cliente_id: int, evento_id: int, fecha_venta: date, cantidad: int,
+                        precio_unitario: float, id_: Optional[int] = None) -> int:
+        """Añade una venta (o sustituye la de id_) anotándola antes en el diario. Devuelve su id."""
+        if id_ is None:
+            id_ = self.nueva_id(self.ventas)
+        self.anotar([registro_venta(id_, cliente_id, evento_id, fecha_venta, cantidad, precio_unitario)])
+        self.ventas.agregar(id_, cliente_id, evento_id, fecha_venta, cantidad, precio_unitario)
+        self.compactar_si_toca()
+        return id_
+
+    # Diario de cambios y compactación
+    def anotar(self, registros: Sequence[dict], fsync: Optional[bool] = None):
+        """Guarda registros en el diario (antes de aplicarlos en memoria)."""
+        self.diario.anotar(registros, fsync)
+
+    def compactar_si_toca(self):
+        """Lanza una compactación en segundo plano si el diario ya tiene muchos registros.
+
+        Se llama después de aplicar los cambios en memoria, para que una carga
+        posterior nunca vea el diario vacío antes de que el cambio esté en él.
+        """
+        if self.diario.num_registros >= COMPACTAR_CADA:
+            self.compactar(en_segundo_plano=True)
+
+    def reproducir_diario(self) -> int:
+        """Aplica sobre lo cargado los cambios anotados desde la última compactación."""
+        registros = list(self.diario.registros())
+        if not registros:
+            return 0
+        aplicados = 0
+        con_ventas = any(r.get("tabla") == "ventas" for r in registros)
+        if con_ventas:
+            self.ventas.pausar_indice()  # el índice por fecha se rehace una vez al final
+        for registro in registros:
+            tabla, fila = registro.get("tabla"), registro.get("fila")
+            try:
+                if tabla == "clientes":
+                    self._registrar_cliente(parsear_cliente(fila))
+                elif tabla == "ventas":
+                    self.ventas.agregar(*parsear_venta(fila))
+                else:
+                    raise ValueError(f"tabla desconocida {tabla!r}")
+                aplicados += 1
+            except Exception as e:
+                print(f"[WARN] registro del diario inválido {registro}: {e}")
+        if con_ventas:
+            self.ventas.reconstruir_indice()
+        print(f"✅ {aplicados} cambios aplicados desde el diario.")
+        return aplicados
+
+    def compactar(self, en_segundo_plano: bool = False) -> bool:
+        """Lleva los cambios del diario a clientes.csv y ventas.csv y vacía el diario.
+
+        El diario se rota y sus filas se añaden, tal cual, al final de cada CSV
+        (en el sitio, sin copiar el fichero). No se reescribe nada desde memoria: las filas que no
+        pasan la validación y el formato original se conservan, y como la carga se
+        queda con la última fila de cada id, el resultado es el mismo que reproducir
+        el diario. El rotado solo se borra al final; si el proceso muere antes, la
+        siguiente compactación vuelve a añadir esas filas, lo que no cambia nada.
+        La escritura puede ir en un hilo. Devuelve False si ya había una en curso.
+        """
+        if self._compactacion is not None and self._compactacion.is_alive():
+            return False
+        self.diario.rotar()
+
+        def escribir():
+            try:
+                filas: Dict[str, List[List[str]]] = {"clientes": [], "ventas": []}
+                for registro in self.diario.rotados():
+                    if registro.get("tabla") in filas:
+                        filas[registro["tabla"]].append(registro.get("fila"))
+                for ruta, tabla in ((CLIENTES_CSV, "clientes"), (VENTAS_CSV, "ventas")):
+                    if filas[tabla]:
+                        anexar_csv(ruta, filas[tabla])
+                self.diario.descartar_rotado()
+            except OSError as e:
+                print(f"[WARN] compactación fallida (el diario se conserva): {e}")
+
+        if en_segundo_plano:
+            self._compactacion = threading.Thread(target=escribir, name="compactacion", daemon=False)
+            self._compactacion.start()
+        else:
+            escribir()
+        return True
+
     def filtrar_ventas_por_rango(self):
         """Pide dos fechas e imprime ventas entre ambas (inclusive)."""
         desde_s = input("Fecha desde (YYYY-MM-DD): ").strip()
@@ -249,15 +1639,26 @@ class GestorMiniCRM:
             print("[ERROR] 'desde' mayor que 'hasta'.")
             return
 
-        resultado = [v for v in self.ventas.values() if desde <= v.fecha_venta <= hasta]
-        print(f"\nVentas entre {desde} y {hasta}: ({len(resultado)})")
-        total = 0.0
-        for v in sorted(resultado, key=lambda x: x.fecha_venta):
-            cliente_nombre = self.clientes.get(v.cliente_id).nombre if v.cliente_id in self.clientes else f"(id {v.cliente_id})"
-            evento_titulo = self.eventos.get(v.evento_id).titulo if v.evento_id in self.eventos else f"(id {v.evento_id})"
-            print(f"{v.id}: {v.fecha_venta} - {cliente_nombre} - {evento_titulo} - {v.cantidad}x {v.precio_unitario:.2f} => {v.total():.2f}")
-            total += v.total()
-        print(f"Total ventas en rango: {total:.2f}")
+        filas = self.ventas.filas_en_rango(desde, hasta)
+        print(f"\nVentas entre {desde} y {hasta}: ({len(filas)})")
+        for id_, fecha, cliente_nombre, evento_titulo, cantidad, precio, total in self.detalle_ventas(filas):
+            print(f"{id_}: {fecha} - {cliente_nombre} - {evento_titulo} - {cantidad}x {precio:.2f} => {total:.2f}")
+        print(f"Total ventas en rango: {self.ventas.total_en_rango(desde, hasta):.2f}")
+
+    def detalle_ventas(self, filas: Sequence[int]) -> Iterator[Tuple]:
+        """(id, fecha, cliente, evento, cantidad, precio, total) de cada fila, con nombres y títulos.
+
+        Los clientes o eventos que no existen aparecen como '(id N)'.
+        """
+        for lote in self.ventas_enriquecidas(filas):
+            for id_, fecha, cli_id, cliente_nombre, ev_id, evento_titulo, cantidad, precio, total in zip(
+                    lote["id"], lote["fecha"], lote["cliente_id"], lote["cliente_nombre"], lote["evento_id"],
+                    lote["evento_titulo"], lote["cantidad"], lote["precio"], lote["total"]):
+                if cliente_nombre is None:
+                    cliente_nombre = f"(id {cli_id})"
+                if evento_titulo is None:
+                    evento_titulo = f"(id {ev_id})"
+                yield id_, date.fromordinal(fecha), cliente_nombre, evento_titulo, cantidad, precio, total
 
     def estadisticas(self):
         """Calcula y muestra varias métricas solicitadas."""
@@ -265,39 +1666,20 @@ class GestorMiniCRM:
             print("Cargar los datos primero (opción 1).")
             return
 
-        # ingresos totales
-        ingresos_totales = sum(v.total() for v in self.ventas.values())
-
-        # ingresos por evento
-        ingresos_por_evento: Dict[int, float] = {}
-        for v in self.ventas.values():
-            ingresos_por_evento.setdefault(v.evento_id, 0.0)
-            ingresos_por_evento[v.evento_id] += v.total()
-
-        # set de categorías
-        categorias = {e.categoria for e in self.eventos.values()}
-
-        # dias hasta el evento más próximo
-        proximos = [e.dias_hasta_evento() for e in self.eventos.values()]
-        dias_hasta_mas_proximo = min(proximos) if proximos else None
-
-        # tupla (min, max, media) de precios unitarios en ventas
-        precios = [v.precio_unitario for v in self.ventas.values()]
-        if precios:
-            min_p = min(precios)
-            max_p = max(precios)
-            avg_p = sum(precios) / len(precios)
-            tupla_precios = (min_p, max_p, avg_p)
-        else:
-            tupla_precios = (None, None, None)
+        if VERIFICAR_AGREGADOS:
+            with METRICAS.fase("estadisticas.validar"):
+                self.verificar_agregados()
+        with METRICAS.fase("estadisticas.agregar"):
+            ingresos_totales, ingresos_por_evento, categorias, dias_hasta_mas_proximo, tupla_precios = \
+                self.calcular_estadisticas()
 
         # mostrar
         print("\n--- Estadísticas ---")
         print(f"Ingresos totales: {ingresos_totales:.2f}")
         print("Ingresos por evento:")
-        for ev_id, total in ingresos_por_evento.items():
-            titulo = self.eventos.get(ev_id).titulo if ev_id in self.eventos else f"(id {ev_id})"
-            print(f"  {titulo} [{ev_id}]: {total:.2f}")
+        lote = self.ingresos_por_evento_con_titulo()
+        for ev_id, titulo, total in zip(lote.get("evento_id", []), lote.get("titulo", []), lote.get("ingresos", [])):
+            print(f"  {titulo if titulo is not None else f'(id {ev_id})'} [{ev_id}]: {total:.2f}")
         print(f"Categorías existentes: {', '.join(sorted(categorias)) if categorias else '(ninguna)'}")
         if dias_hasta_mas_proximo is not None:
             print(f"Días hasta el evento más próximo: {dias_hasta_mas_proximo}")
@@ -308,26 +1690,74 @@ class GestorMiniCRM:
         # devolver una tupla resumen por si se quiere usar programáticamente
         return ingresos_totales, ingresos_por_evento, categorias, dias_hasta_mas_proximo, tupla_precios
 
+    def calcular_estadisticas(self):
+        """Métricas a partir de las vistas materializadas: O(#eventos), no O(#ventas).
+
+        Devuelve (ingresos_totales, ingresos_por_evento, categorias,
+        dias_hasta_mas_proximo, (min, max, media) de precios).
+        """
+        agregados = self.ventas.agregados
+        categorias = set(self._eventos_por_categoria)
+        dias = (self._fecha_evento_min - date.today()).days if self.eventos else None
+        return (agregados.ingresos_totales, dict(agregados.ingresos_por_evento), categorias,
+                dias, agregados.tupla_precios())
+
+    def recalcular_estadisticas(self):
+        """Las mismas métricas que calcular_estadisticas, recorriendo todas las filas."""
+        categorias = {e.categoria for e in self.eventos.values()}
+        proximos = [e.dias_hasta_evento() for e in self.eventos.values()]
+        return (self.ventas.ingresos_totales(), self.ventas.ingresos_por_evento(), categorias,
+                min(proximos) if proximos else None, self.ventas.resumen_precios())
+
+    def verificar_agregados(self) -> List[str]:
+        """Comprueba las vistas materializadas contra un recálculo completo.
+
+        Devuelve (y avisa de) las diferencias encontradas; lista vacía si cuadran.
+        """
+        def iguales(a, b) -> bool:
+            if isinstance(a, float) and isinstance(b, float):
+                return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+            return a == b
+
+        nombres = ("ingresos_totales", "ingresos_por_evento", "categorias", "dias_hasta_mas_proximo", "precios")
+        diferencias = []
+        for nombre, vista, real in zip(nombres, self.calcular_estadisticas(), self.recalcular_estadisticas()):
+            if isinstance(real, dict):
+                ok = vista.keys() == real.keys() and all(iguales(vista[k], real[k]) for k in real)
+            elif isinstance(real, tuple):
+                ok = len(vista) == len(real) and all(map(iguales, vista, real))
+            else:
+                ok = iguales(vista, real)
+            if not ok:
+                diferencias.append(f"{nombre}: vista={vista!r} recalculado={real!r}")
+        for d in diferencias:
+            print(f"[WARN] agregado desincronizado {d}")
+        return diferencias
+
     def exportar_informe(self):
         """Genera informe_resumen.csv con totales por evento (id, titulo, ingresos)."""
-        ingresos_por_evento: Dict[int, float] = {}
-        for v in self.ventas.values():
-            ingresos_por_evento.setdefault(v.evento_id, 0.0)
-            ingresos_por_evento[v.evento_id] += v.total()
+        if VERIFICAR_AGREGADOS:
+            with METRICAS.fase("exportar_informe.validar"):
+                self.verificar_agregados()
+        with METRICAS.fase("exportar_informe.agregar"):
+            lote = self.ingresos_por_evento_con_titulo()
 
-        with open(INFORME_CSV, "w", newline="", encoding="utf-8") as f:
+        with METRICAS.fase("exportar_informe.escribir"), open(INFORME_CSV, "w", newline="", encoding="utf-8") as f:
             w = csv.writer(f, delimiter=";", quotechar='"', quoting=csv.QUOTE_MINIMAL)
             w.writerow(["evento_id", "titulo", "ingresos_totales"])
-            for ev_id, ingreso in ingresos_por_evento.items():
-                titulo = self.eventos.get(ev_id).titulo if ev_id in self.eventos else ""
-                w.writerow([ev_id, titulo, f"{ingreso:.2f}"])
+            for ev_id, titulo, ingreso in zip(lote.get("evento_id", []), lote.get("titulo", []), lote.get("ingresos", [])):
+                w.writerow([ev_id, titulo or "", f"{ingreso:.2f}"])
+        METRICAS.contar_fichero("bytes_escritos", INFORME_CSV)
 
         print(f"Informe exportado a {INFORME_CSV}")
 
 # Menú principal
+@perfilar
 def menu():
     ensure_data_files()  
     gestor = GestorMiniCRM()
+    if gestor.cargar_snapshot():
+        print("✅ Datos cargados desde el snapshot (los CSV no han cambiado).")
 
     opciones = {
         "1": "Cargar CSV (clientes, eventos, ventas)",
@@ -336,7 +1766,8 @@ def menu():
         "4": "Filtrar ventas por rango de fechas",
         "5": "Estadísticas",
         "6": "Exportar informe resumen (CSV)",
-        "7": "Salir"
+        "7": "Exportar informe resumen en streaming (sin cargar datos)",
+        "8": "Salir"
     }
 
     while True:
@@ -359,11 +1790,111 @@ def menu():
         elif choice == "6":
             gestor.exportar_informe()
         elif choice == "7":
+            exportar_informe_streaming()
+        elif choice == "8":
             print("Adiós ")
             break
         else:
             print("Opción no válida. Intenta de nuevo.")
 
 
+# Modo por lotes: se cargan los datos una vez y se responden consultas JSON (una por línea)
+def _rango(consulta) -> Tuple[date, date]:
+    desde, hasta = parse_date(consulta["desde"]), parse_date(consulta["hasta"])
+    if desde > hasta:
+        raise ValueError("'desde' mayor que 'hasta'")
+    return desde, hasta
+
+
+def _ventas_en_rango(gestor: "GestorMiniCRM", consulta: dict) -> dict:
+    desde, hasta = _rango(consulta)
+    filas = gestor.ventas.filas_en_rango(desde, hasta)
+    resultado = {"numero": len(filas), "total": gestor.ventas.total_en_rango(desde, hasta)}
+    if consulta.get("detalle"):
+        limite = consulta.get("limite")
+        claves = ("id", "fecha", "cliente", "evento", "cantidad", "precio", "total")
+        resultado["ventas"] = [dict(zip(claves, (id_, fecha.isoformat(), *resto)))
+                               for id_, fecha, *resto in islice(gestor.detalle_ventas(filas), limite)]
+    return resultado
+
+
+def _estadisticas(gestor: "GestorMiniCRM", consulta: dict) -> dict:
+    ingresos_totales, _, categorias, dias, (minimo, maximo, media) = gestor.calcular_estadisticas()
+    lote = gestor.ingresos_por_evento_con_titulo()
+    return {
+        "ingresos_totales": ingresos_totales,
+        "ingresos_por_evento": [{"evento_id": ev_id, "titulo": titulo, "ingresos": ingresos} for ev_id, titulo, ingresos
+                                in zip(lote.get("evento_id", []), lote.get("titulo", []), lote.get("ingresos", []))],
+        "categorias": sorted(categorias),
+        "dias_hasta_mas_proximo": dias,
+        "precios": {"min": minimo, "max": maximo, "media": media},
+    }
+
+
+CONSULTAS = {
+    "ventas_en_rango": _ventas_en_rango,
+    "total_en_rango": lambda gestor, consulta: gestor.ventas.total_en_rango(*_rango(consulta)),
+    "estadisticas": _estadisticas,
+    "alta_clientes": lambda gestor, consulta: gestor.alta_clientes_bulk(consulta["clientes"]),
+}
+
+
+def responder(gestor: "GestorMiniCRM", consulta: dict):
+    """Resuelve una consulta {"op": ..., ...} del modo por lotes y devuelve un valor serializable en JSON."""
+    op = consulta.get("op")
+    if op not in CONSULTAS:
+        raise ValueError(f"op desconocida {op!r}; opciones: {', '.join(CONSULTAS)}")
+    try:
+        return CONSULTAS[op](gestor, consulta)
+    except KeyError as e:
+        raise ValueError(f"falta el campo {e.args[0]!r}") from None
+
+
+def procesar_lotes(gestor: "GestorMiniCRM", entrada: Iterable[str], salida) -> None:
+    """Una respuesta JSON por cada línea de entrada: {"id", "ok", "resultado"} o {"id", "ok", "error"}."""
+    for linea in entrada:
+        if not linea.strip():
+            continue
+        respuesta = {"id": None}
+        try:
+            consulta = json.loads(linea)
+            respuesta["id"] = consulta.get("id")
+            respuesta.update(ok=True, resultado=responder(gestor, consulta))
+        except Exception as e:
+            respuesta.update(ok=False, error=str(e))
+        salida.write(json.dumps(respuesta, ensure_ascii=False) + "\n")
+    salida.flush()
+
+
+@perfilar
+def main_lotes(origen: str = "-", procesos: Optional[int] = None, usar_snapshot: bool = True):
+    """Carga los datos (snapshot, CSV o CSV en paralelo) y atiende las consultas de origen ('-' = stdin)."""
+    salida = sys.stdout
+    # Los mensajes del gestor van a stderr: stdout queda solo para las respuestas
+    with contextlib.redirect_stdout(sys.stderr):
+        ensure_data_files()
+        gestor = GestorMiniCRM()
+        if procesos is not None:
+            gestor.cargar_datos_paralelo(procesos)
+        elif not (usar_snapshot and gestor.cargar_snapshot()):
+            gestor.cargar_datos(usar_snapshot=usar_snapshot)
+        if origen == "-":
+            procesar_lotes(gestor, sys.stdin, salida)
+        else:
+            with open(origen, encoding="utf-8") as f:
+                procesar_lotes(gestor, f, salida)
+
+
 if __name__ == "__main__":
-    menu()
+    parser = argparse.ArgumentParser(description="Mini-CRM de eventos")
+    parser.add_argument("--lotes", nargs="?", const="-", metavar="FICHERO",
+                        help="responde consultas JSON (una por línea) desde FICHERO o stdin; "
+                             '{"op": "ventas_en_rango", "desde": "2024-01-01", "hasta": "2024-12-31"}')
+    parser.add_argument("--procesos", type=int, help="carga los CSV en paralelo con N procesos")
+    parser.add_argument("--sin-snapshot", action="store_true", help="ignora snapshot.bin y lee los CSV")
+    args = parser.parse_args()
+
+    if args.lotes is None:
+        menu()
+    else:
+        main_lotes(args.lotes, args.procesos, not args.sin_snapshot)
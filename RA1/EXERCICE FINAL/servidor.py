@@ -0,0 +1,457 @@
+# Servidor HTTP/JSON local (asyncio) sobre GestorMiniCRM.
+#
+# Carga los datos una vez y atiende a la vez:
+#   GET  /clientes?limite=100&desde=0      (también /eventos y /ventas)
+#   GET  /ventas/rango?desde=2024-01-01&hasta=2024-12-31&limite=100
+#   GET  /estadisticas
+#   POST /clientes   {"nombre": ..., "email": ..., "fecha_alta": "YYYY-MM-DD"}
+#
+# Las lecturas trabajan sobre una Instantanea inmutable y nunca esperan a las
+# escrituras. Las altas pasan por una cola que atiende una única tarea escritora:
+# agrupa las que llegan juntas, las anota en el diario (en su propio hilo) y
+# solo entonces las publica en una instantánea nueva, que se prepara también
+# fuera del bucle a partir de la anterior.
+#
+# Ninguna consulta agrega en la petición: las estadísticas se calculan una vez
+# al crear la primera instantánea (ventas y eventos no cambian mientras el
+# servidor está en marcha) y el resto cuesta O(log n + límite) sobre el índice
+# por fecha y el orden por id ya guardados. Por eso basta un pool de hilos para
+# sacar del bucle las páginas y los rangos: un pool de procesos tendría que
+# serializar la instantánea (o cada página) en cada petición y costaría más que
+# la propia consulta. Las consultas de rango idénticas que coinciden en el
+# tiempo comparten un único cálculo.
+#
+#   python servidor.py --puerto 8080
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import exercice_final as crm
+
+MAX_CABECERAS = 64 * 1024
+MAX_CUERPO = 1 << 20
+LIMITE_POR_DEFECTO = 100
+MAX_ALTAS_POR_LOTE = 1000  # altas que la tarea escritora agrupa en una sola escritura
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class Instantanea:
+    """Estado de solo lectura que ven las consultas.
+
+    Las ventas y los eventos no cambian mientras el servidor está en marcha (no
+    hay ninguna ruta que los modifique), así que todas las instantáneas comparten
+    la misma tabla de ventas, los mismos eventos y las estadísticas calculadas al
+    crear la primera. Los clientes sí cambian, y cada alta publica una
+    instantánea nueva con su propio lote de clientes (el anterior no se modifica,
+    así que las consultas en curso siguen viendo uno coherente). El orden por id
+    de cada tabla se calcula una vez y se guarda con ella. Las consultas no
+    tocan el gestor, solo lo que guarda la instantánea.
+    """
+
+    __slots__ = ("version", "ventas", "clientes", "eventos", "orden_clientes", "orden_eventos", "filas_ventas",
+                 "estadisticas", "fecha_evento_min")
+
+    def __init__(self, version: int, gestor: crm.GestorMiniCRM):
+        self.version = version
+        self.ventas = gestor.ventas
+        if not self.ventas._indice_activo:
+            self.ventas.reconstruir_indice()  # que ninguna consulta tenga que reconstruirlo en paralelo
+        self.clientes = gestor.lote_clientes()
+        self.eventos = gestor.lote_eventos()
+        self.orden_clientes = _orden_por_id(self.clientes)
+        self.orden_eventos = _orden_por_id(self.eventos)
+        self.filas_ventas = self.ventas.filas_por_id()
+        ingresos_totales, _, categorias, _, (minimo, maximo, media) = gestor.calcular_estadisticas()
+        lote = gestor.ingresos_por_evento_con_titulo()
+        self.estadisticas = {
+            "ingresos_totales": ingresos_totales,
+            "ingresos_por_evento": [{"evento_id": ev_id, "titulo": titulo, "ingresos": ingresos}
+                                    for ev_id, titulo, ingresos in zip(lote.get("evento_id", []),
+                                                                       lote.get("titulo", []),
+                                                                       lote.get("ingresos", []))],
+            "categorias": sorted(categorias),
+            "precios": {"min": minimo, "max": maximo, "media": media},
+        }
+        self.fecha_evento_min = min(self.eventos["fecha_evento"], default=None)
+
+    def con_clientes(self, nuevos: Sequence[crm.Cliente]) -> "Instantanea":
+        """Instantánea siguiente: esta más los clientes nuevos, sin recorrer los que ya había.
+
+        Las columnas se copian (la instantánea actual puede estar en uso) y, como
+        los ids nuevos son mayores que todos los anteriores, el orden por id solo
+        se alarga.
+        """
+        siguiente = Instantanea.__new__(Instantanea)
+        siguiente.version = self.version + 1
+        siguiente.ventas, siguiente.eventos = self.ventas, self.eventos
+        siguiente.orden_eventos, siguiente.filas_ventas = self.orden_eventos, self.filas_ventas
+        siguiente.estadisticas, siguiente.fecha_evento_min = self.estadisticas, self.fecha_evento_min
+        siguiente.clientes = {
+            "id": self.clientes["id"] + [c.id for c in nuevos],
+            "nombre": self.clientes["nombre"] + [c.nombre for c in nuevos],
+            "email": self.clientes["email"] + [c.email for c in nuevos],
+            "fecha_alta": self.clientes["fecha_alta"] + [c.fecha_alta for c in nuevos]}
+        ids, antes = siguiente.clientes["id"], len(self.orden_clientes)
+        cola = ids[antes:]
+        if self.orden_clientes:
+            cola.insert(0, ids[self.orden_clientes[-1]])  # el mayor id anterior
+        if all(a < b for a, b in zip(cola, cola[1:])):
+            siguiente.orden_clientes = self.orden_clientes + list(range(antes, len(ids)))
+        else:
+            siguiente.orden_clientes = _orden_por_id(siguiente.clientes)
+        return siguiente
+
+
+def _orden_por_id(lote: crm.Lote) -> List[int]:
+    ids = lote["id"]
+    return sorted(range(len(ids)), key=ids.__getitem__)
+
+
+# Consultas: funciones puras sobre una Instantanea; las de tabla y rango van al pool de hilos
+def _pagina(lote: crm.Lote, orden: List[int], desde: int, limite: int) -> List[Dict]:
+    filas = orden[desde:desde + limite]
+    columnas = list(lote)
+    return [dict(zip(columnas, valores)) for valores in zip(*crm.tomar_filas(lote, filas).values())]
+
+
+def _fechas_a_texto(filas: List[Dict]) -> List[Dict]:
+    for fila in filas:
+        for clave, valor in fila.items():
+            if isinstance(valor, date):
+                fila[clave] = valor.isoformat()
+    return filas
+
+
+def consultar_tabla(inst: Instantanea, tabla: str, desde: int, limite: int) -> Dict:
+    if tabla == "ventas":
+        ventas = inst.ventas
+        lote = ventas.lote(inst.filas_ventas[desde:desde + limite])
+        lote["fecha"] = [date.fromordinal(f).isoformat() for f in lote["fecha"]]
+        columnas = list(lote)
+        return {"numero": len(ventas),
+                "filas": [dict(zip(columnas, valores)) for valores in zip(*lote.values())]}
+    lote, orden = (inst.clientes, inst.orden_clientes) if tabla == "clientes" else (inst.eventos, inst.orden_eventos)
+    return {"numero": len(orden), "filas": _fechas_a_texto(_pagina(lote, orden, desde, limite))}
+
+
+def consultar_rango(inst: Instantanea, desde: date, hasta: date, limite: int) -> Dict:
+    ventas = inst.ventas
+    filas = ventas.filas_en_rango(desde, hasta)
+    lotes = crm.hash_join(ventas.lote(filas[:limite]), inst.clientes, "cliente_id", "id",
+                          tipo="left", columnas=["nombre"], prefijo="cliente_")
+    lotes = crm.hash_join(lotes, inst.eventos, "evento_id", "id",
+                          tipo="left", columnas=["titulo"], prefijo="evento_")
+    detalle = []
+    for lote in lotes:
+        for id_, fecha, cliente, evento, cantidad, precio, total in zip(
+                lote["id"], lote["fecha"], lote["cliente_nombre"], lote["evento_titulo"],
+                lote["cantidad"], lote["precio"], lote["total"]):
+            detalle.append({"id": id_, "fecha": date.fromordinal(fecha).isoformat(), "cliente": cliente,
+                            "evento": evento, "cantidad": cantidad, "precio": precio, "total": total})
+    return {"numero": len(filas), "total": ventas.total_en_rango(desde, hasta), "ventas": detalle}
+
+
+def consultar_estadisticas(inst: Instantanea) -> Dict:
+    """Estadísticas ya calculadas de la instantánea; solo los días hasta el próximo evento dependen de hoy."""
+    dias = (inst.fecha_evento_min - date.today()).days if inst.fecha_evento_min is not None else None
+    return dict(inst.estadisticas, dias_hasta_mas_proximo=dias)
+
+
+class ServidorCRM:
+    def __init__(self, gestor: crm.GestorMiniCRM, hilos: Optional[int] = None):
+        self.gestor = gestor
+        self.instantanea = Instantanea(0, gestor)  # solo la sustituye la tarea escritora
+        self.lectores = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="lector")
+        self.escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="escritor")
+        self.altas: "asyncio.Queue[Tuple[Dict, asyncio.Future]]" = asyncio.Queue()
+        self.en_vuelo: Dict[Tuple, asyncio.Future] = {}
+        self._tarea_escritora: Optional[asyncio.Task] = None
+        self._instantanea_incompleta = False  # un lote no llegó a publicarse entero
+
+    # Lecturas
+    async def _en_pool(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.lectores, funcion, *args)
+
+    async def _agrupada(self, clave: Tuple, funcion, *args):
+        """Ejecuta funcion(*args) en el pool; las llamadas con la misma clave en curso esperan a la primera."""
+        futuro = self.en_vuelo.get(clave)
+        if futuro is None:
+            futuro = asyncio.ensure_future(self._en_pool(funcion, *args))
+            self.en_vuelo[clave] = futuro
+            futuro.add_done_callback(lambda _: self.en_vuelo.pop(clave, None))
+        return await asyncio.shield(futuro)
+
+    # Escrituras
+    async def alta_cliente(self, datos: Dict) -> int:
+        futuro = asyncio.get_running_loop().create_future()
+        await self.altas.put((datos, futuro))
+        return await futuro
+
+    def _preparar_alta(self, datos: Dict, nueva_id: int) -> crm.Cliente:
+        nombre = str(datos.get("nombre", "")).strip()
+        email = str(datos.get("email", "")).strip()
+        if not nombre:
+            raise ErrorHTTP(400, "falta el nombre")
+        if not self.gestor.validar_email(email):
+            raise ErrorHTTP(400, "email no válido")
+        fecha = datos.get("fecha_alta")
+        try:
+            fecha_alta = crm.parse_date(fecha) if fecha else date.today()
+        except (TypeError, ValueError):
+            raise ErrorHTTP(400, "fecha_alta no válida (YYYY-MM-DD)") from None
+        return crm.Cliente(nueva_id, nombre, email, fecha_alta)
+
+    async def _escritora(self):
+        """Única tarea que modifica el gestor: agrupa altas, las guarda y después las publica.
+
+        Un fallo en un lote se contesta con un 500 a sus altas pendientes y la
+        tarea sigue con el siguiente, así ninguna petición se queda esperando.
+        """
+        while True:
+            pendientes = [await self.altas.get()]
+            while len(pendientes) < MAX_ALTAS_POR_LOTE and not self.altas.empty():
+                pendientes.append(self.altas.get_nowait())
+            try:
+                await self._procesar_altas(pendientes)
+            except Exception as e:
+                print(f"[ERROR] lote de {len(pendientes)} altas: {type(e).__name__}: {e}", file=sys.stderr)
+                for _, futuro in pendientes:
+                    if not futuro.done():
+                        futuro.set_exception(ErrorHTTP(500, f"no se pudo completar el alta: {e}"))
+
+    async def _procesar_altas(self, pendientes: List[Tuple[Dict, asyncio.Future]]):
+        """Valida, anota en el diario, registra y publica un lote de altas.
+
+        Todo lo que cuesta más que O(altas) (el diario, la instantánea nueva y la
+        compactación) va al hilo escritor; el bucle solo registra los clientes.
+        Cada alta se confirma cuando ya es visible en la instantánea publicada.
+        """
+        loop = asyncio.get_running_loop()
+        clientes, aceptadas = [], []
+        siguiente = self.gestor.nueva_id(self.gestor.clientes)
+        for datos, futuro in pendientes:
+            try:
+                clientes.append(self._preparar_alta(datos, siguiente))
+                aceptadas.append(futuro)
+                siguiente += 1
+            except ErrorHTTP as e:
+                if not futuro.done():
+                    futuro.set_exception(e)
+        if not clientes:
+            return
+        try:
+            await loop.run_in_executor(self.escritor, self.gestor.diario.anotar,
+                                       [crm.registro_cliente(c) for c in clientes])
+        except Exception as e:
+            for futuro in aceptadas:
+                if not futuro.done():
+                    futuro.set_exception(ErrorHTTP(500, f"no se pudo guardar: {e}"))
+            return
+        # Ya están en el diario: entran en el gestor pase lo que pase, para que
+        # nueva_id no vuelva a dar sus ids a otras altas
+        for cliente in clientes:
+            self.gestor._registrar_cliente(cliente)
+        self.instantanea = await loop.run_in_executor(self.escritor, self._siguiente_instantanea, clientes)
+        for cliente, futuro in zip(clientes, aceptadas):
+            if not futuro.done():
+                futuro.set_result(cliente.id)
+        try:
+            await loop.run_in_executor(self.escritor, self.gestor.compactar_si_toca)
+        except Exception as e:  # las altas ya están guardadas y publicadas; se compactará en otro lote
+            print(f"[WARN] no se pudo compactar el diario: {type(e).__name__}: {e}", file=sys.stderr)
+
+    def _siguiente_instantanea(self, clientes: Sequence[crm.Cliente]) -> "Instantanea":
+        """La instantánea actual más los clientes nuevos (en el hilo escritor).
+
+        Si el paso incremental falla, o falló en un lote anterior y la instantánea
+        se quedó sin algún cliente, se rehace entera a partir del gestor.
+        """
+        actual = self.instantanea
+        if not self._instantanea_incompleta:
+            try:
+                return actual.con_clientes(clientes)
+            except Exception as e:
+                print(f"[WARN] no se pudo ampliar la instantánea ({type(e).__name__}: {e}); se rehace",
+                      file=sys.stderr)
+        self._instantanea_incompleta = True
+        siguiente = Instantanea(actual.version + 1, self.gestor)
+        self._instantanea_incompleta = False
+        return siguiente
+
+    def _lanzar_escritora(self) -> asyncio.Task:
+        tarea = asyncio.create_task(self._escritora())
+        tarea.add_done_callback(self._escritora_terminada)
+        self._tarea_escritora = tarea
+        return tarea
+
+    def _escritora_terminada(self, tarea: asyncio.Task):
+        """Si la tarea escritora muere por un error (no por cancelarla), se avisa y se relanza."""
+        if tarea.cancelled():
+            return
+        print(f"[ERROR] la tarea escritora terminó: {tarea.exception()!r}; se relanza", file=sys.stderr)
+        self._lanzar_escritora()
+
+    # HTTP
+    async def atender(self, peticion: str, ruta: str, params: Dict[str, str], cuerpo: bytes) -> Tuple[int, object]:
+        inst = self.instantanea
+        if ruta in ("/clientes", "/eventos", "/ventas"):
+            if peticion == "POST" and ruta == "/clientes":
+                try:
+                    datos = json.loads(cuerpo or b"{}")
+                except ValueError:
+                    raise ErrorHTTP(400, "el cuerpo no es JSON válido") from None
+                if not isinstance(datos, dict):
+                    raise ErrorHTTP(400, "se esperaba un objeto JSON")
+                return 201, {"id": await self.alta_cliente(datos)}
+            _solo_get(peticion)
+            desde, limite = _entero(params, "desde", 0), _entero(params, "limite", LIMITE_POR_DEFECTO)
+            return 200, await self._en_pool(consultar_tabla, inst, ruta[1:], desde, limite)
+        if ruta == "/ventas/rango":
+            _solo_get(peticion)
+            try:
+                desde, hasta = crm.parse_date(params["desde"]), crm.parse_date(params["hasta"])
+            except KeyError as e:
+                raise ErrorHTTP(400, f"falta el parámetro {e.args[0]!r}") from None
+            except ValueError:
+                raise ErrorHTTP(400, "fecha no válida (YYYY-MM-DD)") from None
+            if desde > hasta:
+                raise ErrorHTTP(400, "'desde' mayor que 'hasta'")
+            limite = _entero(params, "limite", LIMITE_POR_DEFECTO)
+            return 200, await self._agrupada(("rango", inst.version, desde, hasta, limite),
+                                             consultar_rango, inst, desde, hasta, limite)
+        if ruta == "/estadisticas":
+            _solo_get(peticion)
+            return 200, consultar_estadisticas(inst)
+        raise ErrorHTTP(404, f"ruta desconocida: {ruta}")
+
+    async def conexion(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    cabecera = await lector.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await _responder(escritor, 431, {"error": "cabeceras demasiado grandes"}, False)
+                    return
+                linea, *resto = cabecera.decode("latin-1").split("\r\n")
+                try:
+                    peticion, objetivo, version = linea.split(" ", 2)
+                except ValueError:
+                    await _responder(escritor, 400, {"error": "petición mal formada"}, False)
+                    return
+                cabeceras = {}
+                for campo in resto:
+                    if ":" in campo:
+                        k, v = campo.split(":", 1)
+                        cabeceras[k.strip().lower()] = v.strip()
+                seguir = (cabeceras.get("connection", "").lower() != "close"
+                          and version.upper() == "HTTP/1.1")
+
+                try:
+                    longitud = int(cabeceras.get("content-length", "0") or 0)
+                except ValueError:
+                    longitud = -1
+                if longitud < 0:
+                    await _responder(escritor, 400, {"error": "content-length no válido"}, False)
+                    return
+                if longitud > MAX_CUERPO:
+                    await _responder(escritor, 413, {"error": "cuerpo demasiado grande"}, False)
+                    return
+                cuerpo = await lector.readexactly(longitud) if longitud else b""
+
+                url = urlsplit(objetivo)
+                try:
+                    estado, resultado = await self.atender(peticion.upper(), url.path.rstrip("/") or "/",
+                                                           dict(parse_qsl(url.query)), cuerpo)
+                except ErrorHTTP as e:
+                    estado, resultado = e.estado, {"error": str(e)}
+                except Exception as e:  # un fallo en una consulta no debe tirar el servidor
+                    estado, resultado = 500, {"error": f"{type(e).__name__}: {e}"}
+                await _responder(escritor, estado, resultado, seguir)
+                if not seguir:
+                    return
+        finally:
+            escritor.close()
+
+    async def servir(self, host: str, puerto: int):
+        self._lanzar_escritora()
+        servidor = await asyncio.start_server(self.conexion, host, puerto, limit=MAX_CABECERAS, backlog=1024)
+        direcciones = ", ".join(str(s.getsockname()) for s in servidor.sockets)
+        print(f"Sirviendo el mini-CRM en {direcciones}", file=sys.stderr)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            self._tarea_escritora.cancel()
+            self.lectores.shutdown(wait=False)
+            self.escritor.shutdown(wait=True)
+
+
+def _solo_get(peticion: str):
+    if peticion != "GET":
+        raise ErrorHTTP(405, f"método no permitido: {peticion}")
+
+
+def _entero(params: Dict[str, str], nombre: str, defecto: int) -> int:
+    try:
+        valor = int(params.get(nombre, defecto))
+    except ValueError:
+        raise ErrorHTTP(400, f"'{nombre}' debe ser un entero") from None
+    if valor < 0:
+        raise ErrorHTTP(400, f"'{nombre}' no puede ser negativo")
+    return valor
+
+
+RAZONES = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+async def _responder(escritor: asyncio.StreamWriter, estado: int, resultado, seguir: bool):
+    cuerpo = json.dumps(resultado, ensure_ascii=False).encode("utf-8")
+    escritor.write(
+        f"HTTP/1.1 {estado} {RAZONES.get(estado, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n"
+        f"Connection: {'keep-alive' if seguir else 'close'}\r\n\r\n".encode("latin-1") + cuerpo)
+    await escritor.drain()
+
+
+def cargar_gestor(usar_snapshot: bool = True) -> crm.GestorMiniCRM:
+    crm.ensure_data_files()
+    gestor = crm.GestorMiniCRM()
+    if not (usar_snapshot and gestor.cargar_snapshot()):
+        gestor.cargar_datos(usar_snapshot=usar_snapshot)
+    return gestor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON del mini-CRM")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--hilos", type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                        help="hilos para las consultas")
+    parser.add_argument("--sin-snapshot", action="store_true", help="ignora snapshot.bin y lee los CSV")
+    args = parser.parse_args()
+
+    servidor = ServidorCRM(cargar_gestor(not args.sin_snapshot), args.hilos)
+    try:
+        asyncio.run(servidor.servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+# Limpieza y análisis de screentime_analysis_extended.csv como módulo reutilizable.
+#
+# Hace los mismos pasos que ficha.ipynb (nulos, duplicados, tipos, columnas
+# vacías, normalización de app_name, medias por app) pero sin las copias de
+# los inplace= encadenados ni el applymap celda a celda:
+#   - app_name se lee como categoría y se normaliza sobre las categorías
+#     (una vez por app distinta, no una vez por fila),
+#   - los enteros se reducen al tipo más pequeño que los contiene,
+#   - los tipos mezclados se detectan por columna con infer_dtype.
+#
+# Para ficheros más grandes que la RAM, medias_por_bloques() lee el CSV por
+# bloques y acumula sumas y conteos parciales por app; medias_en_paralelo()
+# reparte ese mismo trabajo entre varios procesos.
+#
+# Uso:
+#   python limpieza_screentime.py screentime_analysis_extended.csv --salida screentime_analysis_clean.csv
+#   python limpieza_screentime.py export_enorme.csv --bloques 1000000 --spill /tmp
+#   python limpieza_screentime.py export_enorme.csv --procesos 32
+#   python limpieza_screentime.py screentime_analysis_extended.csv --parquet screentime_limpio/
+#
+# Instrumentación (apagada por defecto):
+#   SCREENTIME_METRICAS=metricas.json  tiempos por fase, filas leídas/rechazadas, bytes y pico
+#                                      de memoria al salir (con .prom, en texto de Prometheus)
+#   SCREENTIME_PERFIL=perfil           main() bajo cProfile (perfil.prof) y tracemalloc
+#                                      (perfil.memoria.txt)
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+# instrumentacion.py está en la raíz del repositorio, compartido con los otros programas
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from instrumentacion import Metricas, perfilador  # noqa: E402
+
+COL_USUARIO = "user_id"
+COL_APP = "app_name"
+COL_TIEMPO = "screen_time(min)"
+COL_NOTIF = "notifications"
+COL_FECHA = "date"
+COL_LONGITUD = "app_name_len"
+COL_DIA = "dia"  # partición del Parquet: date como 'YYYY-MM-DD'
+
+
+# Instrumentación (ver instrumentacion.py)
+METRICAS = Metricas(os.environ.get("SCREENTIME_METRICAS"), "screentime")
+perfilar = perfilador("SCREENTIME_PERFIL")
+
+
+def leer(ruta, **kwargs) -> pd.DataFrame:
+    """Lee el CSV con app_name ya como categoría (se puede pasar usecols, nrows...)."""
+    kwargs.setdefault("dtype", {COL_APP: "category"})
+    return pd.read_csv(ruta, **kwargs)
+
+
+def normalizar_apps(apps: pd.Series) -> pd.Series:
+    """strip + title + quitar espacios internos, aplicado a las categorías y no a cada fila.
+
+    Las categorías resultantes quedan ordenadas alfabéticamente, igual que las
+    claves de un groupby sobre texto.
+    """
+    apps = apps.astype("category")
+    nuevas = (pd.Index(apps.cat.categories.astype(str))
+              .str.strip()
+              .str.title()
+              .str.replace(" ", "", regex=False))
+    unicas = nuevas.unique().sort_values()
+    traduccion = unicas.get_indexer(nuevas)  # código viejo -> código nuevo
+    codigos = apps.cat.codes.to_numpy()
+    nuevos_codigos = np.where(codigos >= 0, traduccion[codigos], -1)
+    return pd.Series(pd.Categorical.from_codes(nuevos_codigos, categories=unicas),
+                     index=apps.index, name=apps.name)
+
+
+def reducir_enteros(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte cada columna entera al tipo entero más pequeño posible."""
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def tipos_mezclados(df: pd.DataFrame) -> pd.Series:
+    """Tipo inferido de cada columna ('mixed', 'mixed-integer'... delatan mezclas).
+
+    Sustituye a df.applymap(type): una pasada vectorizada por columna.
+    """
+    return pd.Series({col: pd.api.types.infer_dtype(df[col], skipna=True) for col in df.columns})
+
+
+def limpiar(df: pd.DataFrame) -> pd.DataFrame:
+    """Aplica las reglas de limpieza del notebook y devuelve el DataFrame limpio."""
+    # 2. nulos: rellenar tiempo/notificaciones y quitar filas sin app
+    leidas = len(df)
+    df = df.fillna({COL_TIEMPO: 0, COL_NOTIF: 0})
+    df = df[df[COL_APP].notna()]
+    METRICAS.contar("filas_rechazadas", leidas - len(df), "sin_app")
+
+    # 3. duplicados (sobre las filas tal y como vienen, como en el notebook)
+    con_app = len(df)
+    df = df.drop_duplicates()
+    METRICAS.contar("filas_rechazadas", con_app - len(df), "duplicadas")
+
+    # 4. tipos
+    df[COL_TIEMPO] = df[COL_TIEMPO].astype(float)
+    df[COL_NOTIF] = pd.to_numeric(df[COL_NOTIF], errors="coerce").fillna(0).astype(int)
+    df[COL_FECHA] = pd.to_datetime(df[COL_FECHA], errors="coerce", dayfirst=True)
+
+    # 5. columnas completamente vacías
+    vacias = df.columns[df.isna().all().to_numpy()]
+    if len(vacias):
+        df = df.drop(columns=vacias)
+
+    # 6-7. texto: normalizar app_name y su longitud (calculada por categoría)
+    df[COL_APP] = normalizar_apps(df[COL_APP])
+    longitudes = df[COL_APP].cat.categories.str.len().to_numpy()
+    df[COL_LONGITUD] = longitudes[df[COL_APP].cat.codes.to_numpy()]
+
+    # 8. tipos compactos en lugar de convert_dtypes()
+    return reducir_enteros(df)
+
+
+def medias_por_app(df: pd.DataFrame):
+    """Tiempo medio de pantalla y notificaciones medias por app, de mayor a menor."""
+    grupos = df.groupby(COL_APP, observed=True)
+    screen_time_media = grupos[COL_TIEMPO].mean().sort_values(ascending=False)
+    notif_media = grupos[COL_NOTIF].mean().sort_values(ascending=False)
+    return screen_time_media, notif_media
+
+
+# Modo por bloques (out-of-core)
+#
+# Cada bloque se limpia con las mismas reglas y se reduce a sumas/conteos por app,
+# que al final se combinan en las medias exactas. Los duplicados entre bloques se
+# detectan con un hash de 64 bits de cada fila tal y como viene en el CSV (tras
+# rellenar nulos con "0"), así que "45" y "45.0" cuentan como filas distintas y,
+# si notifications trae texto suelto ("x"), un nulo rellenado y un "0" cuentan como
+# iguales (el notebook, con la columna como object, los separa). Con columnas
+# numéricas limpias las medias coinciden con las del notebook. La fecha no
+# interviene en las medias y en este modo no se convierte.
+TAM_BLOQUE = 1_000_000
+
+
+def _leer_bloques(ruta, tam_bloque):
+    # Todo como texto: el hash de una fila no depende del tipo que pandas deduzca en cada bloque
+    return pd.read_csv(ruta, dtype=str, chunksize=tam_bloque)
+
+
+def _preparar_bloque(bloque: pd.DataFrame):
+    """Nulos + hash de fila + tipos de un bloque. Devuelve (hashes, bloque reducido a lo que hace falta)."""
+    bloque = bloque.fillna({COL_TIEMPO: "0", COL_NOTIF: "0"})
+    bloque = bloque[bloque[COL_APP].notna()]
+    hashes = pd.util.hash_pandas_object(bloque, index=False).to_numpy()
+    reducido = pd.DataFrame({
+        COL_APP: normalizar_apps(bloque[COL_APP]).astype(str),
+        COL_TIEMPO: bloque[COL_TIEMPO].astype(float),
+        COL_NOTIF: pd.to_numeric(bloque[COL_NOTIF], errors="coerce").fillna(0).astype(int),
+    }, index=bloque.index)
+    return hashes, reducido
+
+
+def _parciales(df: pd.DataFrame) -> pd.DataFrame:
+    """Sumas y número de filas por app."""
+    return df.groupby(COL_APP).agg(suma_tiempo=(COL_TIEMPO, "sum"),
+                                   suma_notif=(COL_NOTIF, "sum"),
+                                   filas=(COL_TIEMPO, "size"))
+
+
+def _combinar(total, parcial):
+    return parcial if total is None else total.add(parcial, fill_value=0)
+
+
+def _marcar_nuevos(hashes: np.ndarray, vistos: set) -> np.ndarray:
+    """True para las filas cuyo hash no se había visto (ni antes ni dentro del bloque)."""
+    mascara = np.empty(len(hashes), dtype=bool)
+    for i, h in enumerate(hashes.tolist()):
+        mascara[i] = h not in vistos
+        vistos.add(h)
+    return mascara
+
+
+def _medias_desde_parciales(total):
+    if total is None:
+        vacia = pd.Series(dtype=float, name=COL_TIEMPO, index=pd.Index([], name=COL_APP))
+        return vacia, vacia.rename(COL_NOTIF)
+    screen_time_media = (total["suma_tiempo"] / total["filas"]).rename(COL_TIEMPO).sort_values(ascending=False)
+    notif_media = (total["suma_notif"] / total["filas"]).rename(COL_NOTIF).sort_values(ascending=False)
+    return screen_time_media, notif_media
+
+
+def medias_por_bloques(ruta, tam_bloque=TAM_BLOQUE, dir_spill=None, particiones=64):
+    """Medias de tiempo de pantalla y notificaciones por app sin cargar el CSV entero.
+
+    Sin dir_spill, los hashes de las filas ya vistas se guardan en un set en
+    memoria (unos 70 bytes por fila distinta). Con dir_spill la memoria queda
+    acotada: cada bloque se reparte por hash en `particiones` ficheros
+    temporales y después se deduplica y agrega cada partición por separado.
+    Devuelve (screen_time_media, notif_media) como medias_por_app.
+    """
+    METRICAS.contar_fichero("bytes_leidos", ruta)
+    if dir_spill is None:
+        vistos = set()
+        total = None
+        for bloque in _leer_bloques(ruta, tam_bloque):
+            with METRICAS.fase("medias_por_bloques.validar"):
+                hashes, df = _preparar_bloque(bloque)
+                nuevos = _marcar_nuevos(hashes, vistos)
+            with METRICAS.fase("medias_por_bloques.agregar"):
+                total = _combinar(total, _parciales(df[nuevos]))
+            METRICAS.contar("filas_leidas", len(bloque))
+            METRICAS.contar("filas_rechazadas", len(bloque) - len(df), "sin_app")
+            METRICAS.contar("filas_rechazadas", len(df) - nuevos.sum(), "duplicadas")
+        return _medias_desde_parciales(total)
+
+    carpeta = tempfile.mkdtemp(prefix="screentime_", dir=dir_spill)
+    try:
+        rutas = [os.path.join(carpeta, f"parte_{k}.csv") for k in range(particiones)]
+        # 1ª pasada: repartir filas (hash + columnas ya limpias) por partición
+        for bloque in _leer_bloques(ruta, tam_bloque):
+            hashes, df = _preparar_bloque(bloque)
+            df.insert(0, "hash", hashes)
+            for k, grupo in df.groupby(hashes % particiones):
+                grupo.to_csv(rutas[k], mode="a", header=False, index=False)
+        # 2ª pasada: cada partición cabe en memoria; los duplicados comparten partición
+        total = None
+        for ruta_parte in rutas:
+            if not os.path.exists(ruta_parte):
+                continue
+            parte = pd.read_csv(ruta_parte, header=None, names=["hash", COL_APP, COL_TIEMPO, COL_NOTIF],
+                                dtype={"hash": np.uint64, COL_APP: str})
+            total = _combinar(total, _parciales(parte.drop_duplicates("hash")))
+        return _medias_desde_parciales(total)
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+# Modo paralelo
+#
+# Fase 1: cada proceso parsea un rango de bytes del CSV (alineado a fin de línea),
+# lo limpia como en el modo por bloques y reparte sus filas en shards según el
+# hash de user_id (o de date). Las columnas de cada shard (hash de fila, código
+# de app, tiempo, notificaciones) se dejan en un bloque de memoria compartida.
+# Fase 2: un proceso por shard lee sus bloques de la memoria compartida,
+# deduplica y suma por app. Como las filas repetidas tienen el mismo user_id,
+# caen siempre en el mismo shard. El proceso principal solo suma vectores por app.
+TAM_RANGO = 64 << 20  # bytes de CSV por tarea de la fase 1
+_COLUMNAS_SHM = (("hash", np.uint64), ("app", np.int32), ("tiempo", np.float64), ("notif", np.int64))
+
+
+def _rangos_de_bytes(ruta, inicio, num_rangos):
+    """Rangos [ini, fin) desde `inicio` hasta el final del fichero, cortados a principio de línea."""
+    tam = os.path.getsize(ruta)
+    cortes = [inicio]
+    with open(ruta, "rb") as f:
+        for k in range(1, num_rangos):
+            f.seek(max(cortes[-1], inicio + (tam - inicio) * k // num_rangos))
+            f.readline()
+            if inicio < f.tell() < tam and f.tell() > cortes[-1]:
+                cortes.append(f.tell())
+    cortes.append(tam)
+    return list(zip(cortes, cortes[1:]))
+
+
+def _fase_particionar(ruta, inicio, fin, columnas, clave, num_shards):
+    """Fase 1 (en un worker): rango de bytes -> bloques de memoria compartida por shard."""
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        datos = f.read(fin - inicio)
+    bloque = pd.read_csv(io.BytesIO(datos), header=None, names=columnas, dtype=str)
+    hashes, df = _preparar_bloque(bloque)
+    shards = (pd.util.hash_pandas_object(bloque.loc[df.index, clave], index=False).to_numpy()
+              % np.uint64(num_shards))
+    apps = pd.Categorical(df[COL_APP])
+    valores = {"hash": hashes, "app": apps.codes.astype(np.int32),
+               "tiempo": df[COL_TIEMPO].to_numpy(np.float64), "notif": df[COL_NOTIF].to_numpy(np.int64)}
+
+    bloques = []
+    for shard in range(num_shards):
+        seleccion = shards == shard
+        n = int(seleccion.sum())
+        if not n:
+            continue
+        shm = SharedMemory(create=True, size=n * sum(np.dtype(t).itemsize for _, t in _COLUMNAS_SHM))
+        offset = 0
+        for nombre, tipo in _COLUMNAS_SHM:
+            destino = np.ndarray(n, dtype=tipo, buffer=shm.buf, offset=offset)
+            destino[:] = valores[nombre][seleccion]
+            offset += destino.nbytes
+            del destino
+        bloques.append((shard, shm.name, n))
+        shm.close()
+    return bloques, list(apps.categories)
+
+
+def _leer_bloque_compartido(nombre, n):
+    """Copia las columnas de un bloque de memoria compartida y lo libera."""
+    shm = SharedMemory(name=nombre)
+    try:
+        columnas, offset = {}, 0
+        for col, tipo in _COLUMNAS_SHM:
+            vista = np.ndarray(n, dtype=tipo, buffer=shm.buf, offset=offset)
+            columnas[col] = vista.copy()
+            offset += vista.nbytes
+            del vista
+    finally:
+        shm.close()
+        shm.unlink()
+    return columnas
+
+
+def _fase_agregar(bloques, num_apps):
+    """Fase 2 (en un worker): deduplica un shard y devuelve (suma_tiempo, suma_notif, filas) por app.
+
+    bloques: [(nombre_shm, n, traduccion de códigos de app locales a globales)].
+    """
+    partes = []
+    for nombre, n, traduccion in bloques:
+        columnas = _leer_bloque_compartido(nombre, n)
+        columnas["app"] = traduccion[columnas["app"]]
+        partes.append(columnas)
+    if not partes:
+        return np.zeros(num_apps), np.zeros(num_apps), np.zeros(num_apps)
+    juntas = {col: np.concatenate([p[col] for p in partes]) for col, _ in _COLUMNAS_SHM}
+    _, primeras = np.unique(juntas["hash"], return_index=True)
+    primeras.sort()  # conservar el orden de aparición
+    apps = juntas["app"][primeras]
+    return (np.bincount(apps, weights=juntas["tiempo"][primeras], minlength=num_apps),
+            np.bincount(apps, weights=juntas["notif"][primeras], minlength=num_apps),
+            np.bincount(apps, minlength=num_apps).astype(float))
+
+
+def medias_en_paralelo(ruta, procesos=None, clave=COL_USUARIO, tam_rango=TAM_RANGO):
+    """Como medias_por_bloques, pero repartiendo el trabajo entre `procesos` procesos.
+
+    clave: columna por la que se reparten las filas en shards (user_id o date).
+    """
+    procesos = procesos or os.cpu_count() or 1
+    with open(ruta, "rb") as f:
+        cabecera = f.readline()
+    columnas = list(pd.read_csv(io.BytesIO(cabecera), nrows=0).columns)
+    num_rangos = max(procesos, os.path.getsize(ruta) // tam_rango + 1)
+    rangos = _rangos_de_bytes(ruta, len(cabecera), num_rangos)
+
+    # Un único resource_tracker para todos los workers: quien crea un bloque y quien
+    # lo libera son procesos distintos y tienen que avisar al mismo tracker.
+    resource_tracker.ensure_running()
+    nombres_pendientes = []
+    try:
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            # fase 1
+            resultados = list(executor.map(_fase_particionar, [ruta] * len(rangos), *zip(*rangos),
+                                           [columnas] * len(rangos), [clave] * len(rangos),
+                                           [procesos] * len(rangos)))
+            nombres_pendientes = [nombre for bloques, _ in resultados for _, nombre, _ in bloques]
+            apps_globales = pd.Index(sorted({app for _, apps in resultados for app in apps}))
+            por_shard = [[] for _ in range(procesos)]
+            for bloques, apps in resultados:
+                traduccion = apps_globales.get_indexer(apps).astype(np.int64)
+                for shard, nombre, n in bloques:
+                    por_shard[shard].append((nombre, n, traduccion))
+            # fase 2
+            sumas = list(executor.map(_fase_agregar, por_shard, [len(apps_globales)] * procesos))
+            nombres_pendientes = []
+    finally:
+        for nombre in nombres_pendientes:  # si algo falló, no dejar memoria compartida huérfana
+            try:
+                shm = SharedMemory(name=nombre)
+                shm.close()
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    suma_tiempo, suma_notif, filas = (sum(s[i] for s in sumas) for i in range(3))
+    if not len(apps_globales):
+        return _medias_desde_parciales(None)
+    total = pd.DataFrame({"suma_tiempo": suma_tiempo, "suma_notif": suma_notif, "filas": filas},
+                         index=pd.Index(apps_globales, name=COL_APP))
+    return _medias_desde_parciales(total[total["filas"] > 0])
+
+
+# Salida columnar: Parquet particionado por día (necesita pyarrow)
+#
+# A diferencia del CSV, conserva los tipos (categoría, enteros pequeños, fechas)
+# y permite leer solo algunas columnas y solo las particiones que cumplen un filtro.
+def _comprobar_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Para leer/escribir Parquet hace falta pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def _particionado(pa):
+    # dia como texto (no diccionario) para que las filas sin fecha, que van a
+    # __HIVE_DEFAULT_PARTITION__, se lean como nulos sin problemas
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([(COL_DIA, pa.string())]), flavor="hive")
+
+
+def guardar_parquet(df: pd.DataFrame, carpeta):
+    """Escribe el dataset limpio en `carpeta` como Parquet particionado por día (dia=YYYY-MM-DD).
+
+    Volver a escribir sustituye las particiones de los días que aparecen en df.
+    """
+    _comprobar_pyarrow()
+    dias = df[COL_FECHA].dt.strftime("%Y-%m-%d") if COL_FECHA in df else pd.Series(pd.NA, index=df.index)
+    df.assign(**{COL_DIA: dias}).to_parquet(carpeta, engine="pyarrow", partition_cols=[COL_DIA], index=False,
+                                         existing_data_behavior="delete_matching")
+
+
+def leer_parquet(carpeta, columnas=None, desde=None, hasta=None, filtros=None) -> pd.DataFrame:
+    """Lee el Parquet leyendo solo `columnas` y solo las particiones entre desde y hasta.
+
+    desde/hasta son fechas 'YYYY-MM-DD' (inclusive); filtros admite más
+    condiciones en el formato de pyarrow, p. ej. [("notifications", ">", 5)].
+    """
+    pa = _comprobar_pyarrow()
+    condiciones = list(filtros or [])
+    if desde is not None:
+        condiciones.append((COL_DIA, ">=", str(desde)))
+    if hasta is not None:
+        condiciones.append((COL_DIA, "<=", str(hasta)))
+    return pd.read_parquet(carpeta, engine="pyarrow", columns=columnas, filters=condiciones or None,
+                           partitioning=_particionado(pa))
+
+
+def media_tiempo_por_app_en_rango(carpeta, desde, hasta) -> pd.Series:
+    """Tiempo medio de pantalla por app entre dos días, leyendo solo lo necesario."""
+    df = leer_parquet(carpeta, columnas=[COL_APP, COL_TIEMPO], desde=desde, hasta=hasta)
+    return df.groupby(COL_APP, observed=True)[COL_TIEMPO].mean().sort_values(ascending=False)
+
+
+def ejecutar(ruta_entrada, ruta_salida=None, carpeta_parquet=None):
+    """Lee, limpia, guarda (CSV si hay ruta_salida, Parquet si hay carpeta_parquet) y analiza.
+
+    Devuelve (df, screen_time_media, notif_media).
+    """
+    with METRICAS.fase("ejecutar.parsear"):
+        df = leer(ruta_entrada)
+    METRICAS.contar("filas_leidas", len(df))
+    METRICAS.contar_fichero("bytes_leidos", ruta_entrada)
+    with METRICAS.fase("ejecutar.validar"):
+        df = limpiar(df)
+    with METRICAS.fase("ejecutar.escribir"):
+        if ruta_salida:
+            df.to_csv(ruta_salida, index=False)
+            METRICAS.contar_fichero("bytes_escritos", ruta_salida)
+        if carpeta_parquet:
+            guardar_parquet(df, carpeta_parquet)
+    with METRICAS.fase("ejecutar.agregar"):
+        screen_time_media, notif_media = medias_por_app(df)
+    return df, screen_time_media, notif_media
+
+
+@perfilar
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Limpieza y análisis de tiempo de pantalla")
+    parser.add_argument("entrada", help="CSV de entrada (screentime_analysis_extended.csv)")
+    parser.add_argument("--salida", help="CSV limpio de salida")
+    parser.add_argument("--parquet", metavar="DIR", help="carpeta de salida en Parquet particionado por día")
+    parser.add_argument("--bloques", type=int, metavar="FILAS",
+                        help="modo por bloques: solo calcula las medias, leyendo FILAS filas cada vez")
+    parser.add_argument("--spill", metavar="DIR",
+                        help="con --bloques, deduplicar con ficheros temporales en DIR (memoria acotada)")
+    parser.add_argument("--procesos", type=int, metavar="N",
+                        help="modo paralelo: solo calcula las medias, con N procesos")
+    parser.add_argument("--shard-por", choices=[COL_USUARIO, COL_FECHA], default=COL_USUARIO,
+                        help="columna con la que se reparten las filas en el modo paralelo")
+    args = parser.parse_args(argv)
+
+    if args.procesos:
+        with METRICAS.fase("medias_en_paralelo"):
+            screen_time_media, notif_media = medias_en_paralelo(args.entrada, args.procesos, args.shard_por)
+        METRICAS.contar_fichero("bytes_leidos", args.entrada)
+    elif args.bloques:
+        screen_time_media, notif_media = medias_por_bloques(args.entrada, args.bloques, args.spill)
+    else:
+        df, screen_time_media, notif_media = ejecutar(args.entrada, args.salida, args.parquet)
+        print(f"Filas tras limpieza: {len(df)}")
+    print("\nTiempo medio de pantalla (min) por app:")
+    print(screen_time_media.to_string())
+    print("\nNotificaciones medias por app:")
+    print(notif_media.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Micro-benchmark de parse_date (RA1/EXERCICE FINAL) frente a strptime directo.
+#
+# Simula la columna fecha_venta de un ventas.csv realista: muchas filas pero
+# pocas fechas distintas (unos años de días).
+#
+#   python benchmarks/bench_parse_date.py --filas 10000000
+
+import argparse
+import importlib.util
+import os
+import random
+import time
+from datetime import date, datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_CRM = os.path.join(RAIZ, "RA1", "EXERCICE FINAL", "exercice_final.py")
+
+
+def cargar_crm():
+    spec = importlib.util.spec_from_file_location("exercice_final", RUTA_CRM)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def generar_fechas(filas: int, dias_distintos: int, semilla: int):
+    """Lista de cadenas YYYY-MM-DD repartidas entre dias_distintos días."""
+    rnd = random.Random(semilla)
+    inicio = date(2022, 1, 1).toordinal()
+    tabla = [date.fromordinal(inicio + i).isoformat() for i in range(dias_distintos)]
+    return [tabla[rnd.randrange(dias_distintos)] for _ in range(filas)]
+
+
+def medir(funcion, fechas):
+    t0 = time.perf_counter()
+    for s in fechas:
+        funcion(s)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de parse_date")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--dias", type=int, default=3 * 365, help="fechas distintas")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    crm = cargar_crm()
+    fechas = generar_fechas(args.filas, args.dias, args.semilla)
+
+    base = medir(lambda s: datetime.strptime(s, crm.DATE_FORMAT).date(), fechas)
+    crm.parse_date.cache_clear()
+    rapido = medir(crm.parse_date, fechas)
+    info = crm.parse_date.cache_info()
+
+    print(f"filas: {args.filas}  fechas distintas: {args.dias}")
+    print(f"strptime:   {base:8.3f} s")
+    print(f"parse_date: {rapido:8.3f} s  (x{base / rapido:.1f})")
+    print(f"cache: {info.hits} aciertos, {info.misses} fallos, tamaño {info.currsize}/{info.maxsize}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# Benchmarks de tiempo y memoria de las cargas de RA1/RA2 sobre datos sintéticos.
+#
+# Cada benchmark se ejecuta con varios tamaños; para cada uno se guarda el mejor
+# tiempo y la mediana de --repeticiones ejecuciones y el pico de memoria
+# (tracemalloc, en una ejecución aparte para no falsear los tiempos). El
+# resultado es un JSON con el commit, para poder comparar entre versiones:
+#
+#   python benchmarks/ejecutar.py --tamanos 1000 100000 --salida antes.json
+#   python benchmarks/ejecutar.py --tamanos 1000 100000 --salida despues.json
+#   python benchmarks/ejecutar.py --comparar antes.json despues.json
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import date, datetime
+
+import generadores
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_EX3 = os.path.join(RAIZ, "RA1", "EXERCICE 3", "exercice3.py")
+RUTA_CRM = os.path.join(RAIZ, "RA1", "EXERCICE FINAL", "exercice_final.py")
+RUTA_SCREENTIME = os.path.join(RAIZ, "RA2", "analisis", "limpieza_screentime.py")
+sys.path.append(RAIZ)  # instrumentacion.py, también para la copia de exercice3 que se carga desde otra carpeta
+
+
+def cargar_modulo(ruta, nombre):
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# Entornos: generan los datos una vez por tamaño y cargan el módulo apuntando a ellos
+def entorno_horarios(carpeta, n, errores):
+    # exercice3 lee y escribe en data/ junto al propio fichero: se usa una copia
+    os.makedirs(os.path.join(carpeta, "data"), exist_ok=True)
+    shutil.copy(RUTA_EX3, os.path.join(carpeta, "exercice3.py"))
+    generadores.generar_horarios(os.path.join(carpeta, "data", "horarios.csv"), n, errores=errores)
+    return cargar_modulo(os.path.join(carpeta, "exercice3.py"), f"exercice3_bench_{n}")
+
+
+def entorno_crm(carpeta, n, errores):
+    generadores.generar_crm(carpeta, n, errores=errores)
+    crm = cargar_modulo(RUTA_CRM, f"exercice_final_bench_{n}")
+    crm.DATA_DIR = carpeta
+    for atributo, fichero in (("CLIENTES_CSV", "clientes.csv"), ("EVENTOS_CSV", "eventos.csv"),
+                              ("VENTAS_CSV", "ventas.csv"), ("INFORME_CSV", "informe_resumen.csv"),
+                              ("SNAPSHOT_BIN", "snapshot.bin"), ("DIARIO_WAL", "cambios.wal")):
+        setattr(crm, atributo, os.path.join(carpeta, fichero))
+    return crm
+
+
+def entorno_screentime(carpeta, n, errores):
+    ruta = os.path.join(carpeta, "screentime.csv")
+    generadores.generar_screentime(ruta, n, errores=errores)
+    sys.path.insert(0, os.path.dirname(RUTA_SCREENTIME))
+    modulo = cargar_modulo(RUTA_SCREENTIME, "limpieza_screentime")
+    return modulo, ruta
+
+
+def gestor_crm_cargado(crm):
+    gestor = crm.GestorMiniCRM()
+    gestor.cargar_datos(usar_snapshot=False)
+    return gestor
+
+
+def filtrar_un_anio(crm, gestor):
+    respuestas = iter([date(2023, 1, 1).isoformat(), date(2023, 12, 31).isoformat()])
+    crm.input = lambda *_: next(respuestas)  # el método pide las fechas con input()
+    gestor.filtrar_ventas_por_rango()
+
+
+# nombre -> (entorno, preparar(entorno) -> estado, ejecutar(entorno, estado))
+BENCHMARKS = {
+    "horarios.leer_csv": (entorno_horarios,
+                          lambda ex3: ex3.GestorHorarios("horarios.csv"),
+                          lambda ex3, g: g.leer_csv()),
+    "horarios.generar_resumen": (entorno_horarios,
+                                 lambda ex3: _con(ex3.GestorHorarios("horarios.csv"), "leer_csv"),
+                                 lambda ex3, g: g.generar_resumen()),
+    "crm.cargar_datos": (entorno_crm,
+                         lambda crm: crm.GestorMiniCRM(),
+                         lambda crm, g: g.cargar_datos(usar_snapshot=False)),
+    "crm.estadisticas": (entorno_crm, gestor_crm_cargado, lambda crm, g: g.estadisticas()),
+    "crm.filtrar_ventas_por_rango": (entorno_crm, gestor_crm_cargado, filtrar_un_anio),
+    "screentime.pipeline": (entorno_screentime,
+                            lambda e: None,
+                            lambda e, _: e[0].ejecutar(e[1])),
+}
+
+
+def _con(objeto, metodo):
+    getattr(objeto, metodo)()
+    return objeto
+
+
+def medir(preparar, ejecutar, entorno, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        estado = preparar(entorno)
+        t0 = time.perf_counter()
+        ejecutar(entorno, estado)
+        tiempos.append(time.perf_counter() - t0)
+
+    estado = preparar(entorno)
+    tracemalloc.start()
+    try:
+        ejecutar(entorno, estado)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return tiempos, pico
+
+
+def commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar_benchmarks(tamanos, repeticiones, errores, filtro=None):
+    resultados = []
+    for nombre, (crear_entorno, preparar, ejecutar) in BENCHMARKS.items():
+        if filtro and filtro not in nombre:
+            continue
+        for n in tamanos:
+            fila = {"benchmark": nombre, "filas": n}
+            with tempfile.TemporaryDirectory(prefix="bench_") as carpeta:
+                try:
+                    with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")), \
+                            warnings.catch_warnings():
+                        warnings.simplefilter("ignore")
+                        entorno = crear_entorno(carpeta, n, errores)
+                        tiempos, pico = medir(preparar, ejecutar, entorno, repeticiones)
+                    fila.update(segundos_min=min(tiempos), segundos_mediana=statistics.median(tiempos),
+                                pico_memoria_bytes=pico)
+                except Exception as e:  # un benchmark roto no debe tumbar el resto
+                    fila["error"] = f"{type(e).__name__}: {e}"
+            resultados.append(fila)
+            print(json.dumps(fila, ensure_ascii=False), file=sys.stderr)
+    return {"commit": commit_actual(), "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "maquina": platform.machine(),
+            "repeticiones": repeticiones, "errores": errores, "resultados": resultados}
+
+
+def comparar(ruta_base, ruta_nueva):
+    with open(ruta_base, encoding="utf-8") as f:
+        base = {(r["benchmark"], r["filas"]): r for r in json.load(f)["resultados"]}
+    with open(ruta_nueva, encoding="utf-8") as f:
+        nuevos = json.load(f)["resultados"]
+    print(f"{'benchmark':32s} {'filas':>10s} {'tiempo':>10s} {'memoria':>10s}")
+    for r in nuevos:
+        b = base.get((r["benchmark"], r["filas"]))
+        if not b or "error" in b or "error" in r:
+            continue
+        t = r["segundos_min"] / b["segundos_min"] if b["segundos_min"] else float("nan")
+        m = r["pico_memoria_bytes"] / b["pico_memoria_bytes"] if b["pico_memoria_bytes"] else float("nan")
+        print(f"{r['benchmark']:32s} {r['filas']:>10d} {t:>9.2f}x {m:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de RA1/RA2")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="número de filas de cada prueba (de 10^3 a 10^8)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--errores", type=float, default=0.0, help="fracción de filas mal formadas")
+    parser.add_argument("--solo", help="ejecutar solo los benchmarks cuyo nombre contiene este texto")
+    parser.add_argument("--salida", help="fichero JSON de resultados (por defecto, stdout)")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NUEVO"), help="compara dos ficheros de resultados")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+    informe = ejecutar_benchmarks(args.tamanos, args.repeticiones, args.errores, args.solo)
+    texto = json.dumps(informe, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
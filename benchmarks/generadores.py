@@ -0,0 +1,108 @@
+# Generadores de datos sintéticos para los benchmarks.
+#
+# Todos son deterministas (misma semilla -> mismo fichero), escriben en streaming
+# (sirven igual para 10^3 que para 10^8 filas) y pueden meter una fracción de
+# filas mal formadas para ejercitar los caminos de error.
+#
+#   python benchmarks/generadores.py crm /tmp/crm --ventas 1000000 --errores 0.01
+
+import argparse
+import os
+import random
+from datetime import date
+
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+APPS = ["Instagram", " instagram ", "WhatsApp", "  WhatsApp  ", "YouTube", "YouTube Music",
+        "YouTube Kids", "Telegram", "Tik tok", "TikTok", "Netflix", "Calendar Pro"]
+CATEGORIAS = ["Música", "Tecnología", "Ocio", "Deporte", "Teatro"]
+FECHA_INICIO = date(2022, 1, 1).toordinal()
+
+
+def generar_horarios(ruta, filas, semilla=0, errores=0.0, empleados=None):
+    """horarios.csv de EXERCICE 3: cabecera + nombre;dia;entrada;salida."""
+    rnd = random.Random(semilla)
+    empleados = empleados or max(1, filas // 20)
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        f.write("nombre_empleado;dia;hora_entrada;hora_salida\n")
+        for _ in range(filas):
+            nombre = f"Empleado{rnd.randrange(empleados)}"
+            dia = rnd.choice(DIAS_SEMANA)
+            entrada = rnd.randint(5, 14)
+            salida = entrada + rnd.randint(4, 9)
+            if rnd.random() < errores:
+                f.write(rnd.choice([f"{nombre};{dia};{entrada}\n", f"{nombre};{dia};x;{salida}\n"]))
+            else:
+                f.write(f"{nombre};{dia};{entrada};{salida}\n")
+
+
+def generar_crm(carpeta, ventas, semilla=0, errores=0.0, clientes=None, eventos=None, dias=3 * 365):
+    """clientes.csv, eventos.csv y ventas.csv del mini-CRM (EXERCICE FINAL)."""
+    rnd = random.Random(semilla)
+    clientes = clientes or max(1, ventas // 10)
+    eventos = eventos or max(1, min(10_000, ventas // 1000))
+    os.makedirs(carpeta, exist_ok=True)
+
+    def fecha():
+        return date.fromordinal(FECHA_INICIO + rnd.randrange(dias)).isoformat()
+
+    def quizas_rota(fila, rota):
+        return rota if rnd.random() < errores else fila
+
+    with open(os.path.join(carpeta, "clientes.csv"), "w", encoding="utf-8", newline="") as f:
+        for i in range(1, clientes + 1):
+            f.write(quizas_rota(f"{i};Cliente {i};cliente{i}@example.com;{fecha()}\n",
+                                f"{i};Cliente {i};cliente{i}@example.com;2023-02-30\n"))
+    with open(os.path.join(carpeta, "eventos.csv"), "w", encoding="utf-8", newline="") as f:
+        for i in range(1, eventos + 1):
+            f.write(quizas_rota(f"{i};Evento {i};{fecha()};{rnd.choice(CATEGORIAS)}\n",
+                                f"x{i};Evento {i};{fecha()};{rnd.choice(CATEGORIAS)}\n"))
+    with open(os.path.join(carpeta, "ventas.csv"), "w", encoding="utf-8", newline="") as f:
+        for i in range(1, ventas + 1):
+            cliente, evento = rnd.randint(1, clientes), rnd.randint(1, eventos)
+            cantidad, precio = rnd.randint(1, 6), rnd.choice([10.0, 12.5, 25.0, 40.0, 99.99])
+            f.write(quizas_rota(f"{i};{cliente};{evento};{fecha()};{cantidad};{precio:.2f}\n",
+                                f"{i};{cliente};{evento};{fecha()};muchas;{precio:.2f}\n"))
+
+
+def generar_screentime(ruta, filas, semilla=0, errores=0.0, duplicados=0.05, usuarios=None):
+    """CSV con el formato de screentime_analysis_extended.csv (nulos, duplicados, fechas mezcladas)."""
+    rnd = random.Random(semilla)
+    usuarios = usuarios or max(1, filas // 50)
+    recientes = []
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        f.write("user_id,app_name,screen_time(min),notifications,date,comentarios\n")
+        for _ in range(filas):
+            if recientes and rnd.random() < duplicados:
+                f.write(rnd.choice(recientes))
+                continue
+            dia = date.fromordinal(FECHA_INICIO + rnd.randrange(365))
+            tiempo = "" if rnd.random() < 0.02 else str(rnd.randint(1, 300))
+            notif = rnd.choice(["", "n/a"]) if rnd.random() < errores else str(rnd.randint(0, 40))
+            fecha = dia.strftime("%d/%m/%Y") if rnd.random() < 0.1 else dia.isoformat()
+            app = "" if rnd.random() < errores else rnd.choice(APPS)
+            fila = f"{1000 + rnd.randrange(usuarios)},{app},{tiempo},{notif},{fecha},\n"
+            recientes.append(fila)
+            if len(recientes) > 1000:
+                recientes.pop(0)
+            f.write(fila)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos para los benchmarks")
+    parser.add_argument("tipo", choices=["horarios", "crm", "screentime"])
+    parser.add_argument("destino", help="fichero (horarios, screentime) o carpeta (crm)")
+    parser.add_argument("--filas", type=int, default=1000, help="filas (ventas en el caso de crm)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--errores", type=float, default=0.0, help="fracción de filas mal formadas")
+    args = parser.parse_args()
+
+    if args.tipo == "horarios":
+        generar_horarios(args.destino, args.filas, args.semilla, args.errores)
+    elif args.tipo == "crm":
+        generar_crm(args.destino, args.filas, args.semilla, args.errores)
+    else:
+        generar_screentime(args.destino, args.filas, args.semilla, args.errores)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Diario de escritura anticipada (WAL) compartido por exercice2 (horarios.json.wal)
+# y exercice_final (cambios.wal): cada cambio se guarda añadiendo una línea en vez
+# de reescribir el fichero de datos, y una compactación lo lleva después a la base.
+#
+# Como instrumentacion.py, los programas añaden la raíz del repositorio a
+# sys.path antes de importarlo.
+
+import json
+import os
+import threading
+import zlib
+from typing import Iterator, Optional, Sequence
+
+
+class DiarioEscritura:
+    """Diario de escritura anticipada (WAL): JSON Lines con un CRC32 por registro.
+
+    Cada línea es '<crc32 en hex> <json>'. anotar() añade registros al final con
+    una sola escritura (y un fsync), así que guardar un cambio cuesta O(registro).
+    registros() los devuelve en orden y se para en el primero que no cuadra: un
+    corte a mitad de escritura deja como mucho una línea incompleta al final, que
+    se descarta y se recorta del fichero.
+
+    Para compactar, rotar() aparta el diario actual a '<ruta>.1' y se empieza uno
+    nuevo; cuando la base nueva ya está en su sitio, descartar_rotado() lo borra.
+    Si el proceso muere entre medias, registros() lee también el rotado: los
+    registros fijan o quitan una fila por su clave (id de cliente o venta, nombre
+    de empleado), así que aplicarlos dos veces no cambia nada.
+    """
+
+    def __init__(self, ruta: str, fsync: bool = True):
+        self.ruta = ruta
+        self.ruta_rotada = ruta + ".1"
+        self.fsync = fsync
+        self.num_registros = 0  # registros en el diario activo
+        self._cerrojo = threading.Lock()
+
+    def anotar(self, registros: Sequence[dict], fsync: Optional[bool] = None):
+        if not registros:
+            return
+        lineas = []
+        for registro in registros:
+            datos = json.dumps(registro, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            lineas.append(b"%08x %s\n" % (zlib.crc32(datos), datos))
+        with self._cerrojo, open(self.ruta, "ab") as f:
+            f.write(b"".join(lineas))
+            if self.fsync if fsync is None else fsync:
+                f.flush()
+                os.fsync(f.fileno())
+            self.num_registros += len(registros)
+
+    def _leer(self, ruta: str, recortar: bool) -> Iterator[dict]:
+        try:
+            f = open(ruta, "rb")
+        except FileNotFoundError:
+            return
+        valido = 0
+        with f:
+            for linea in f:
+                crc, _, datos = linea.rstrip(b"\n").partition(b" ")
+                try:
+                    if not linea.endswith(b"\n") or int(crc, 16) != zlib.crc32(datos):
+                        raise ValueError("CRC incorrecto o línea incompleta")
+                    registro = json.loads(datos)
+                except ValueError:
+                    print(f"[WARN] {os.path.basename(ruta)}: registro dañado en el byte {valido}; "
+                          f"se descarta desde ahí")
+                    break
+                valido += len(linea)
+                yield registro
+        if recortar and valido < os.path.getsize(ruta):
+            with open(ruta, "r+b") as f:
+                f.truncate(valido)
+
+    def registros(self, recortar: bool = True) -> Iterator[dict]:
+        """Registros del diario rotado (si quedó uno) y del activo, en orden.
+
+        Con recortar=False solo se lee (para informes): ni se recorta una cola
+        dañada ni se toca el contador de registros.
+        """
+        yield from self._leer(self.ruta_rotada, recortar=False)
+        if not recortar:
+            yield from self._leer(self.ruta, recortar=False)
+            return
+        self.num_registros = 0
+        for registro in self._leer(self.ruta, recortar=True):
+            self.num_registros += 1
+            yield registro
+
+    def rotados(self) -> Iterator[dict]:
+        """Registros del diario rotado (los que está aplicando una compactación)."""
+        return self._leer(self.ruta_rotada, recortar=False)
+
+    def rotar(self):
+        """Aparta el diario activo para compactarlo; los registros nuevos van a uno vacío."""
+        with self._cerrojo:
+            if os.path.exists(self.ruta_rotada):
+                # Compactación anterior sin terminar: el rotado se queda con todo
+                if os.path.exists(self.ruta):
+                    with open(self.ruta, "rb") as origen, open(self.ruta_rotada, "ab") as destino:
+                        destino.write(origen.read())
+                        destino.flush()
+                        os.fsync(destino.fileno())
+                    os.remove(self.ruta)
+            elif os.path.exists(self.ruta):
+                os.replace(self.ruta, self.ruta_rotada)
+            self.num_registros = 0
+
+    def descartar_rotado(self):
+        try:
+            os.remove(self.ruta_rotada)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,154 @@
+# Instrumentación compartida por los programas de RA1 y RA2 (exercice3,
+# exercice_final y limpieza_screentime): tiempos por fase, contadores y perfilado.
+#
+# Cada programa crea su Metricas y su decorador con sus propias variables de
+# entorno (HORARIOS_, MINICRM_, SCREENTIME_):
+#
+#   METRICAS = Metricas(os.environ.get("MINICRM_METRICAS"), "minicrm")
+#   perfilar = perfilador("MINICRM_PERFIL")
+#
+# Los programas se ejecutan sueltos desde su carpeta, así que añaden la raíz del
+# repositorio a sys.path antes de importar este módulo.
+
+import atexit
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from functools import wraps
+from multiprocessing import parent_process
+from typing import Dict, List, Optional, Tuple
+
+TOP_MEMORIA = 25  # líneas que más memoria reservan en <prefijo>.memoria.txt
+
+
+def pico_memoria() -> Optional[int]:
+    """Pico de memoria residente del proceso en bytes (None si la plataforma no lo da)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024  # Linux lo da en KiB
+
+
+class Metricas:
+    """Tiempos por fase y contadores (filas, bytes) de una ejecución.
+
+    Apagada (sin ruta), fase() devuelve siempre el mismo nullcontext y contar()
+    no hace nada; se llaman una vez por fase, por bloque o por fichero, nunca
+    por fila. Encendida, exporta al salir: texto de Prometheus si la ruta acaba
+    en .prom, si no JSON.
+    """
+
+    def __init__(self, ruta: Optional[str] = None, prefijo: str = "metricas"):
+        self.ruta = ruta
+        self.activa = bool(ruta)
+        self.prefijo = prefijo
+        self.fases: Dict[str, List[float]] = {}  # fase -> [segundos, llamadas]
+        self.contadores: Dict[Tuple[str, str], int] = {}  # (nombre, origen) -> total
+        # Solo el proceso principal exporta: los de un ProcessPoolExecutor no deben pisar el fichero
+        if self.activa and parent_process() is None:
+            atexit.register(self.exportar)
+
+    def fase(self, nombre: str):
+        return self._medir(nombre) if self.activa else _SIN_MEDIR
+
+    @contextlib.contextmanager
+    def _medir(self, nombre: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            acumulado = self.fases.setdefault(nombre, [0.0, 0])
+            acumulado[0] += time.perf_counter() - t0
+            acumulado[1] += 1
+
+    def contar(self, nombre: str, n: int = 1, origen: str = ""):
+        if self.activa and n:
+            clave = (nombre, origen)
+            self.contadores[clave] = self.contadores.get(clave, 0) + int(n)  # n puede ser un entero de NumPy
+
+    def contar_fichero(self, nombre: str, ruta):
+        """Suma el tamaño de ruta al contador nombre (bytes_leidos, bytes_escritos).
+
+        Si ruta no es un fichero (no existe, o es un buffer en memoria) no cuenta nada.
+        """
+        if self.activa and isinstance(ruta, (str, os.PathLike)) and os.path.isfile(ruta):
+            self.contar(nombre, os.path.getsize(ruta), os.path.basename(ruta))
+
+    def resultado(self) -> Dict[str, object]:
+        contadores: Dict[str, Dict[str, int]] = {}
+        for (nombre, origen), n in sorted(self.contadores.items()):
+            contadores.setdefault(nombre, {})[origen or "total"] = n
+        return {"fases": {fase: {"segundos": s, "llamadas": n} for fase, (s, n) in self.fases.items()},
+                "contadores": contadores,
+                "pico_memoria_bytes": pico_memoria()}
+
+    def prometheus(self) -> str:
+        p = self.prefijo
+        lineas = []
+        if self.fases:
+            lineas.append(f"# TYPE {p}_fase_segundos_total counter")
+            lineas += [f'{p}_fase_segundos_total{{fase="{fase}"}} {s!r}' for fase, (s, _) in self.fases.items()]
+            lineas.append(f"# TYPE {p}_fase_llamadas_total counter")
+            lineas += [f'{p}_fase_llamadas_total{{fase="{fase}"}} {n}' for fase, (_, n) in self.fases.items()]
+        anterior = None
+        for (nombre, origen), n in sorted(self.contadores.items()):
+            if nombre != anterior:
+                lineas.append(f"# TYPE {p}_{nombre}_total counter")
+                anterior = nombre
+            etiqueta = f'{{origen="{origen}"}}' if origen else ""
+            lineas.append(f"{p}_{nombre}_total{etiqueta} {n}")
+        pico = pico_memoria()
+        if pico is not None:
+            lineas += [f"# TYPE {p}_pico_memoria_bytes gauge", f"{p}_pico_memoria_bytes {pico}"]
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self):
+        if not self.activa:
+            return
+        if self.ruta.endswith(".prom"):
+            texto = self.prometheus()
+        else:
+            texto = json.dumps(self.resultado(), ensure_ascii=False, indent=2) + "\n"
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            f.write(texto)
+
+
+_SIN_MEDIR = contextlib.nullcontext()
+
+
+def perfilador(variable: str):
+    """Decorador que, con la variable de entorno `variable`=prefijo, perfila la función.
+
+    La función se ejecuta bajo cProfile y tracemalloc y deja <prefijo>.prof
+    (para pstats o snakeviz) y <prefijo>.memoria.txt con el pico de tracemalloc
+    y las líneas que más memoria reservaron. Sin la variable, el decorador
+    devuelve la función tal cual.
+    """
+    def perfilar(funcion):
+        prefijo = os.environ.get(variable)
+        if not prefijo:
+            return funcion
+
+        @wraps(funcion)
+        def perfilada(*args, **kwargs):
+            perfil = cProfile.Profile()
+            tracemalloc.start()
+            try:
+                return perfil.runcall(funcion, *args, **kwargs)
+            finally:
+                instantanea = tracemalloc.take_snapshot()
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                perfil.dump_stats(prefijo + ".prof")
+                with open(prefijo + ".memoria.txt", "w", encoding="utf-8") as f:
+                    f.write(f"pico tracemalloc: {pico} bytes\n")
+                    for estadistica in instantanea.statistics("lineno")[:TOP_MEMORIA]:
+                        f.write(f"{estadistica}\n")
+        return perfilada
+    return perfilar
@@ -0,0 +1,59 @@
+# Utilidades comunes de los tests: los programas viven en carpetas con espacios y
+# se ejecutan sueltos, así que se cargan por ruta, como hacen los benchmarks.
+
+import importlib.util
+import os
+import shutil
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_EX2 = os.path.join(RAIZ, "RA1", "EXERCICE 2", "exercice2.py")
+RUTA_EX3 = os.path.join(RAIZ, "RA1", "EXERCICE 3", "exercice3.py")
+RUTA_CRM = os.path.join(RAIZ, "RA1", "EXERCICE FINAL", "exercice_final.py")
+RUTA_SERVIDOR = os.path.join(RAIZ, "RA1", "EXERCICE FINAL", "servidor.py")
+RUTA_SCREENTIME = os.path.join(RAIZ, "RA2", "analisis", "limpieza_screentime.py")
+sys.path.append(RAIZ)  # instrumentacion.py, también para la copia de exercice3 en tmp_path
+
+
+def cargar_modulo(ruta, nombre):
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def escribir(ruta, lineas):
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        f.write("".join(linea + "\n" for linea in lineas))
+
+
+@pytest.fixture
+def crm(tmp_path):
+    """exercice_final cargado con todas sus rutas de datos dentro de tmp_path."""
+    modulo = cargar_modulo(RUTA_CRM, "exercice_final")
+    modulo.DATA_DIR = str(tmp_path)
+    for atributo, fichero in (("CLIENTES_CSV", "clientes.csv"), ("EVENTOS_CSV", "eventos.csv"),
+                              ("VENTAS_CSV", "ventas.csv"), ("INFORME_CSV", "informe_resumen.csv"),
+                              ("SNAPSHOT_BIN", "snapshot.bin"), ("DIARIO_WAL", "cambios.wal")):
+        setattr(modulo, atributo, str(tmp_path / fichero))
+    escribir(modulo.CLIENTES_CSV, ["1;Ana Pérez;ana@example.com;2023-02-10",
+                                   "2;Luis Gómez;luis@example.com;2024-05-01",
+                                   "3;Sin Correo;no-es-un-email;2024-05-01"])
+    escribir(modulo.EVENTOS_CSV, ["1;Concierto Rock;2025-10-28;Música",
+                                  "2;Feria Tecnología;2025-10-29;Tecnología"])
+    escribir(modulo.VENTAS_CSV, ["1;1;1;2025-10-01;2;25.00",
+                                 "2;2;2;2025-10-02;1;10.50",
+                                 "3;1;2;fecha-mala;1;3.00",
+                                 "4;2;1;2025-10-03;3;7.25"])
+    return modulo
+
+
+@pytest.fixture
+def ex3(tmp_path):
+    """Copia de exercice3 en tmp_path: lee y escribe en data/ junto al propio fichero."""
+    (tmp_path / "data").mkdir()
+    shutil.copy(RUTA_EX3, tmp_path / "exercice3.py")
+    return cargar_modulo(str(tmp_path / "exercice3.py"), "exercice3")
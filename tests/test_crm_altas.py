@@ -0,0 +1,59 @@
+# Alta masiva de clientes: elementos inválidos, lotes y diario antes que memoria.
+
+import pytest
+
+from test_crm_diario import cargado, estado, lineas
+
+
+def test_elementos_invalidos_se_saltan(crm, capsys):
+    gestor = cargado(crm)
+    ids = gestor.alta_clientes_bulk([
+        ("Eva Sanz", "eva@example.com", "2024-01-01"),
+        ("Solo nombre",),
+        None,
+        42,
+        (None, "x@example.com"),
+        ("Ana", None),
+        ("   ", "vacio@example.com"),
+        ("Pau", "no-es-email"),
+        ("Pau", "pau@example.com", 20240101),
+        ("Pau", "pau@example.com", "2024-02-30"),
+        ("Pau", "pau@example.com", "2024-01-01", "sobra"),
+        (" Leo ", " leo@example.com ", crm.date(2024, 3, 1)),
+        ("Mar", "mar@example.com"),
+    ])
+    assert ids == [3, 4, 5]
+    assert (gestor.clientes[4].nombre, gestor.clientes[4].email) == ("Leo", "leo@example.com")
+    assert gestor.clientes[5].fecha_alta == crm.date.today()
+    avisos = [l for l in capsys.readouterr().out.splitlines() if l.startswith("[WARN] alta")]
+    assert [int(l.split()[2]) for l in avisos] == list(range(2, 12))
+    assert estado(cargado(crm)) == estado(gestor)
+
+
+@pytest.mark.parametrize("tam_lote", [1, 2, 10])
+def test_lotes_de_diario(crm, tam_lote):
+    gestor = cargado(crm)
+    anotados = []
+    anotar = gestor.anotar
+
+    def contar(registros, fsync=None):
+        anotados.append(len(registros))
+        # cuando se anota un lote, ninguno de sus clientes está aún en memoria
+        assert not any(r["fila"][0] in map(str, gestor.clientes) for r in registros)
+        anotar(registros, fsync)
+    gestor.anotar = contar
+    datos = [(f"Cliente {i}", f"c{i}@example.com", "2024-01-01") for i in range(5)]
+    assert gestor.alta_clientes_bulk(datos, tam_lote=tam_lote) == [3, 4, 5, 6, 7]
+    assert anotados == [min(tam_lote, 5 - k) for k in range(0, 5, tam_lote)]
+    assert len(lineas(crm.DIARIO_WAL)) == 5
+
+
+def test_fallo_del_diario_no_deja_clientes_en_memoria(crm):
+    gestor = cargado(crm)
+
+    def fallar(registros, fsync=None):
+        raise OSError("disco lleno")
+    gestor.anotar = fallar
+    with pytest.raises(OSError):
+        gestor.alta_clientes_bulk([("Eva", "eva@example.com")])
+    assert sorted(gestor.clientes) == [1, 2]
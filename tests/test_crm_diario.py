@@ -0,0 +1,130 @@
+# Diario de cambios (WAL) del mini-CRM: recuperación, compactación y cuarentena.
+
+import os
+from datetime import date
+
+
+def cargado(crm):
+    gestor = crm.GestorMiniCRM()
+    gestor.cargar_datos(usar_snapshot=False)
+    return gestor
+
+
+def lineas(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def estado(gestor):
+    clientes = {i: (c.nombre, c.email, c.fecha_alta) for i, c in gestor.clientes.items()}
+    ventas = {i: (v.cliente_id, v.evento_id, v.fecha_venta, v.cantidad, v.precio_unitario)
+              for i, v in gestor.ventas.items()}
+    return clientes, ventas
+
+
+def test_carga_aparta_filas_invalidas(crm):
+    gestor = cargado(crm)
+    assert sorted(gestor.clientes) == [1, 2]
+    assert sorted(gestor.ventas.keys()) == [1, 2, 4]
+    rechazados = lineas(os.path.join(crm.DATA_DIR, "ventas_rechazados.csv"))
+    assert rechazados[0] == "linea;motivo;fila"
+    assert rechazados[1].startswith("3;")
+
+
+def test_diario_se_reproduce_al_cargar(crm):
+    gestor = cargado(crm)
+    gestor.alta_clientes_bulk([("Eva Sanz", "eva@example.com", "2024-01-01")])
+    gestor.registrar_venta(1, 2, date(2025, 10, 5), 4, 12.5)
+    gestor.registrar_venta(2, 1, date(2025, 10, 6), 1, 99.0, id_=1)  # sustituye la venta 1
+    assert estado(cargado(crm)) == estado(gestor)
+
+
+def test_cola_danada_del_diario_se_descarta(crm):
+    gestor = cargado(crm)
+    gestor.registrar_venta(1, 2, date(2025, 10, 5), 4, 12.5)
+    with open(crm.DIARIO_WAL, "ab") as f:
+        f.write(b"deadbeef {\"tabla\": \"ventas\"")  # escritura cortada a medias
+    recuperado = cargado(crm)
+    assert estado(recuperado) == estado(gestor)
+    assert recuperado.diario.num_registros == 1
+
+
+def test_compactar_conserva_rechazadas_y_formato(crm):
+    originales_ventas = lineas(crm.VENTAS_CSV)
+    originales_clientes = lineas(crm.CLIENTES_CSV)
+    gestor = cargado(crm)
+    gestor.alta_clientes_bulk([("Eva Sanz", "eva@example.com", "2024-01-01")])
+    gestor.registrar_venta(1, 2, date(2025, 10, 5), 4, 12.5)
+    gestor.registrar_venta(2, 1, date(2025, 10, 6), 1, 99.0, id_=1)
+    esperado = estado(gestor)
+
+    assert gestor.compactar() is True
+    assert not os.path.exists(crm.DIARIO_WAL + ".1")
+    assert list(gestor.diario.registros()) == []
+    # lo que había se conserva byte a byte (también las filas inválidas)
+    assert lineas(crm.VENTAS_CSV)[:len(originales_ventas)] == originales_ventas
+    assert lineas(crm.CLIENTES_CSV)[:len(originales_clientes)] == originales_clientes
+    assert lineas(crm.VENTAS_CSV)[len(originales_ventas):] == ["5;1;2;2025-10-05;4;12.50",
+                                                               "1;2;1;2025-10-06;1;99.00"]
+
+    recargado = cargado(crm)
+    assert estado(recargado) == esperado
+    assert len(lineas(os.path.join(crm.DATA_DIR, "ventas_rechazados.csv"))) == 2
+    assert len(lineas(os.path.join(crm.DATA_DIR, "clientes_rechazados.csv"))) == 2
+
+
+def test_compactacion_interrumpida_se_repite_sin_cambios(crm):
+    gestor = cargado(crm)
+    gestor.registrar_venta(1, 2, date(2025, 10, 5), 4, 12.5)
+    esperado = estado(gestor)
+    gestor.diario.rotar()
+    # el proceso muere tras llevar las ventas al CSV pero antes de borrar el rotado
+    crm.anexar_csv(crm.VENTAS_CSV, [r["fila"] for r in gestor.diario.rotados()])
+    recargado = cargado(crm)
+    assert estado(recargado) == esperado
+    recargado.compactar()
+    assert estado(cargado(crm)) == esperado
+
+
+def test_compactar_anade_en_el_sitio(crm):
+    gestor = cargado(crm)
+    inodo = os.stat(crm.VENTAS_CSV).st_ino
+    gestor.registrar_venta(1, 2, date(2025, 10, 5), 4, 12.5)
+    gestor.compactar()
+    assert os.stat(crm.VENTAS_CSV).st_ino == inodo
+    assert not os.path.exists(crm.VENTAS_CSV + ".tmp")
+
+
+def test_compactacion_cortada_a_mitad_de_linea(crm):
+    gestor = cargado(crm)
+    gestor.registrar_venta(1, 2, date(2025, 10, 5), 4, 12.5)
+    gestor.registrar_venta(2, 1, date(2025, 10, 6), 1, 99.0, id_=1)
+    esperado = estado(gestor)
+    gestor.diario.rotar()
+    # el proceso muere mientras añade: la fila de la venta 5 queda cortada (y con otro precio)
+    with open(crm.VENTAS_CSV, "ab") as f:
+        f.write(b"5;1;2;2025-10-05;4;1")
+    recargado = cargado(crm)
+    assert estado(recargado) == esperado  # el diario rotado se aplica encima
+    recargado.compactar()
+    assert lineas(crm.VENTAS_CSV)[-3:] == ["5;1;2;2025-10-05;4;1", "5;1;2;2025-10-05;4;12.50",
+                                           "1;2;1;2025-10-06;1;99.00"]
+    assert estado(cargado(crm)) == esperado
+
+
+def test_precio_con_mas_decimales_no_se_redondea(crm):
+    gestor = cargado(crm)
+    gestor.registrar_venta(1, 1, date(2025, 10, 5), 1, 0.125)
+    gestor.compactar()
+    assert cargado(crm).ventas.get(5).precio_unitario == 0.125
+
+
+def test_informe_en_streaming_no_toca_el_diario(crm):
+    gestor = cargado(crm)
+    gestor.registrar_venta(1, 2, date(2025, 10, 5), 4, 12.5)
+    with open(crm.DIARIO_WAL, "ab") as f:
+        f.write(b"cola-incompleta")
+    antes = os.path.getsize(crm.DIARIO_WAL)
+    agregador = crm.exportar_informe_streaming()
+    assert os.path.getsize(crm.DIARIO_WAL) == antes
+    assert agregador.num_ventas == 4
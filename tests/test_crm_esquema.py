@@ -0,0 +1,77 @@
+# Validación por bloques del mini-CRM: esquemas por tabla y <tabla>_rechazados.csv.
+
+import csv
+import os
+from datetime import date
+
+import pytest
+
+from conftest import escribir
+from test_crm_diario import cargado
+
+
+def motivos(rechazos):
+    return {linea: motivo for linea, _, motivo in rechazos}
+
+
+def test_bloque_limpio_se_convierte_entero(crm):
+    columnas, rechazos = crm.ESQUEMAS["ventas"].validar([["1", "2", "3", "2025-10-01", "4", "2.5"],
+                                                         ["7", "8", "9", "2025-10-01", "1", "10"]])
+    assert rechazos == []
+    assert columnas["id"] == [1, 7] and columnas["precio_unitario"] == [2.5, 10.0]
+    assert columnas["fecha_venta"] == [date(2025, 10, 1), date(2025, 10, 1)]
+
+
+@pytest.mark.parametrize("fila, motivo", [
+    (["1", "2", "3", "2025-10-01", "4"], "se esperaban 6 campos y hay 5"),
+    (["1", "2", "3", "2025-10-01", "4", "2.5", "x"], "se esperaban 6 campos y hay 7"),
+    (["1", "2", "3", "2025-10-01", "4", "nan"], "precio_unitario: número no válido 'nan'"),
+    (["1", "2", "3", "2025-10-01", "4", "inf"], "precio_unitario: número no válido 'inf'"),
+    (["1", "2", "3", "2025-10-01", "4", "1e400"], "precio_unitario: número no válido '1e400'"),
+    (["1", "2", "3", "2025-10-01", "4", "1_000"], "precio_unitario: número no válido '1_000'"),
+    (["9" * 19, "2", "3", "2025-10-01", "4", "2.5"], f"id: entero no válido '{'9' * 19}'"),
+    (["1", "2", "3", "2025-02-30", "4", "2.5"], "fecha_venta: fecha no válida '2025-02-30'"),
+    (["1", "dos", "3", "ayer", "4", "2.5"], "cliente_id: entero no válido 'dos'"),
+])
+def test_fila_mala_se_rechaza_con_su_motivo(crm, fila, motivo):
+    buena = ["5", "2", "3", "2025-10-01", "4", "2.5"]
+    columnas, rechazos = crm.ESQUEMAS["ventas"].validar([buena, fila, buena], primera_linea=10)
+    assert rechazos == [(11, fila, motivo)]
+    assert columnas["id"] == [5, 5]
+
+
+def test_clientes_email_y_filas_vacias(crm):
+    columnas, rechazos = crm.ESQUEMAS["clientes"].validar([
+        ["1", "Ana", "ana@example.com", "2023-02-10"],
+        [],
+        ["2", "Luis", "luis@", "2024-05-01"],
+        ["3", "Eva", "eva@example.com", "nunca"]])
+    assert columnas["nombre"] == ["Ana"]
+    assert motivos(rechazos) == {3: "email: email no válido 'luis@'", 4: "fecha_alta: fecha no válida 'nunca'"}
+
+
+def test_rechazados_csv_con_linea_y_motivo(crm):
+    escribir(crm.CLIENTES_CSV, ["1;Ana Pérez;ana@example.com;2023-02-10",
+                                "2;Luis;luis@example.com",
+                                "3;Eva;eva@example.com;2024-01-01"])
+    escribir(crm.VENTAS_CSV, ["1;1;1;2025-10-01;2;25.00",
+                              "2;1;1;2025-10-02;1;nan",
+                              "3;1;1;2025-10-03;1;3.00"])
+    gestor = cargado(crm)
+    assert sorted(gestor.clientes) == [1, 3] and sorted(gestor.ventas.keys()) == [1, 3]
+    with open(os.path.join(crm.DATA_DIR, "clientes_rechazados.csv"), encoding="utf-8") as f:
+        assert list(csv.reader(f, delimiter=";")) == [
+            ["linea", "motivo", "fila"],
+            ["2", "se esperaban 4 campos y hay 3", "2", "Luis", "luis@example.com"]]
+    with open(os.path.join(crm.DATA_DIR, "ventas_rechazados.csv"), encoding="utf-8") as f:
+        assert list(csv.reader(f, delimiter=";"))[1][:2] == ["2", "precio_unitario: número no válido 'nan'"]
+    assert not os.path.exists(os.path.join(crm.DATA_DIR, "eventos_rechazados.csv"))
+
+
+def test_rechazados_se_borra_si_ya_no_hay(crm):
+    ruta = os.path.join(crm.DATA_DIR, "ventas_rechazados.csv")
+    cargado(crm)
+    assert os.path.exists(ruta)  # la venta 3 del fixture tiene la fecha mal
+    escribir(crm.VENTAS_CSV, ["1;1;1;2025-10-01;2;25.00"])
+    cargado(crm)
+    assert not os.path.exists(ruta)
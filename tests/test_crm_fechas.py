@@ -0,0 +1,33 @@
+# parse_date: el atajo para 'YYYY-MM-DD' acepta y rechaza lo mismo que strptime.
+
+from datetime import date, datetime
+
+import pytest
+
+from conftest import RUTA_CRM, cargar_modulo
+
+
+@pytest.fixture(scope="module")
+def crm():
+    return cargar_modulo(RUTA_CRM, "exercice_final")
+
+
+@pytest.mark.parametrize("texto", ["2025-10-01", "2024-02-29", "0001-01-01", "2025-1-01", "2025-10-1",
+                                   "２０２５-10-01"])
+def test_fechas_validas(crm, texto):
+    assert crm.parse_date(texto) == datetime.strptime(texto, "%Y-%m-%d").date()
+
+
+@pytest.mark.parametrize("texto", ["2023-02-29", "2025-13-01", "2025-00-10", "fecha-mala", "", "2025/10/01",
+                                   "2025-10-01 "])
+def test_fechas_no_validas(crm, texto):
+    with pytest.raises(ValueError):
+        crm.parse_date(texto)
+
+
+def test_resultado_cacheado(crm):
+    crm.parse_date.cache_clear()
+    assert crm.parse_date("2025-10-01") == date(2025, 10, 1)
+    crm.parse_date("2025-10-01")
+    info = crm.parse_date.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
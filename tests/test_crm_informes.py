@@ -0,0 +1,67 @@
+# Informe resumen del mini-CRM: el modo streaming da lo mismo que el de memoria,
+# y las vistas materializadas cuadran con un recálculo completo.
+
+import os
+from datetime import date
+
+import pytest
+
+from conftest import RAIZ, cargar_modulo
+from test_crm_diario import cargado, lineas
+
+
+def test_streaming_igual_que_en_memoria(crm):
+    cargado(crm).exportar_informe()
+    en_memoria = lineas(crm.INFORME_CSV)
+    os.remove(crm.INFORME_CSV)
+    agregador = crm.exportar_informe_streaming(tam_bloque=2)
+    assert agregador.num_ventas == 3  # la venta con fecha mala no cuenta
+    streaming = lineas(crm.INFORME_CSV)
+    assert streaming[0] == en_memoria[0] == "evento_id;titulo;ingresos_totales"
+    assert sorted(streaming[1:]) == sorted(en_memoria[1:])
+    assert "1;Concierto Rock;71.75" in streaming
+
+
+def test_streaming_con_datos_generados(crm):
+    generadores = cargar_modulo(os.path.join(RAIZ, "benchmarks", "generadores.py"), "generadores")
+    generadores.generar_crm(crm.DATA_DIR, 2000, semilla=5, errores=0.02)
+    cargado(crm).exportar_informe()
+    en_memoria = lineas(crm.INFORME_CSV)
+    crm.exportar_informe_streaming(tam_bloque=300)
+    assert sorted(lineas(crm.INFORME_CSV)[1:]) == sorted(en_memoria[1:])
+
+
+def test_agregados_cuadran_tras_cambios(crm):
+    gestor = cargado(crm)
+    assert gestor.verificar_agregados() == []
+    gestor.registrar_venta(1, 2, date(2025, 10, 5), 4, 12.5)
+    gestor.registrar_venta(2, 1, date(2025, 10, 6), 1, 0.99, id_=1)  # sustituye: cambia el mínimo
+    gestor.registrar_venta(2, 2, date(2025, 10, 7), 2, 500.0, id_=4)  # y el máximo
+    assert gestor.verificar_agregados() == []
+    total, por_evento, _, _, (minimo, maximo, _) = gestor.calcular_estadisticas()
+    assert total == pytest.approx(10.5 + 50.0 + 0.99 + 1000.0)
+    assert por_evento[1] == pytest.approx(0.99)
+    assert (minimo, maximo) == (0.99, 500.0)
+
+
+def test_agregado_desincronizado_se_detecta(crm, capsys):
+    gestor = cargado(crm)
+    gestor.ventas.agregados.ingresos_totales += 1.0
+    diferencias = gestor.verificar_agregados()
+    assert len(diferencias) == 1 and diferencias[0].startswith("ingresos_totales:")
+    assert "agregado desincronizado" in capsys.readouterr().out
+
+
+def test_streaming_cuenta_la_ultima_venta_de_cada_id(crm):
+    gestor = cargado(crm)
+    gestor.registrar_venta(2, 2, date(2025, 10, 6), 1, 99.0, id_=1)  # sustituye la venta 1
+    gestor.registrar_venta(1, 1, date(2025, 10, 7), 10, 0.5, id_=4)  # y la 4
+    gestor.compactar()  # el CSV queda con los ids 1 y 4 repetidos
+    gestor.registrar_venta(1, 2, date(2025, 10, 8), 2, 1000.0, id_=2)  # sustituye la 2 desde el diario
+    cargado(crm).exportar_informe()
+    en_memoria = lineas(crm.INFORME_CSV)
+    agregador = crm.exportar_informe_streaming(tam_bloque=2)
+    assert sorted(lineas(crm.INFORME_CSV)[1:]) == sorted(en_memoria[1:]) == [
+        "1;Concierto Rock;5.00", "2;Feria Tecnología;2099.00"]
+    assert agregador.num_ventas == 3 and agregador.sustituidas == 3
+    assert agregador.tupla_precios() == (0.5, 1000.0, pytest.approx((99.0 + 1000.0 + 0.5) / 3))
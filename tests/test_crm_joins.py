@@ -0,0 +1,57 @@
+# Motor de joins por lotes del mini-CRM: los dos lados de construcción dan lo mismo.
+
+import pytest
+
+from conftest import RUTA_CRM, cargar_modulo
+
+crm = cargar_modulo(RUTA_CRM, "exercice_final")
+
+
+def join_a_mano(izq, der, clave_izq, clave_der, tipo):
+    ultima = {k: j for j, k in enumerate(der[clave_der])}
+    filas = []
+    for i, k in enumerate(izq[clave_izq]):
+        j = ultima.get(k)
+        if j is None and tipo == "inner":
+            continue
+        fila = {c: v[i] for c, v in izq.items()}
+        fila.update({"d_" + c: (None if j is None else v[j]) for c, v in der.items() if c != clave_der})
+        filas.append(fila)
+    return filas
+
+
+def filas(lote):
+    return [dict(zip(lote, valores)) for valores in zip(*lote.values())]
+
+
+CLIENTES = {"id": [3, 1, 2, 1, 7], "nombre": ["c", "a-viejo", "b", "a", "g"]}  # id 1 repetido: gana "a"
+
+
+@pytest.mark.parametrize("tipo", ["inner", "left"])
+@pytest.mark.parametrize("claves", [[1, 2], [9], [1, 1, 3, 9, 2, 7, 7, 5, 2, 3]])
+def test_hash_join_por_ambos_lados(tipo, claves):
+    ventas = {"cliente_id": claves, "cantidad": list(range(len(claves)))}
+    esperado = join_a_mano(ventas, CLIENTES, "cliente_id", "id", tipo)
+    # lote pequeño: se indexa izq; lotes sueltos (tamaño desconocido): se indexa der
+    por_izq = crm.concatenar(crm.hash_join(ventas, CLIENTES, "cliente_id", "id", tipo=tipo, prefijo="d_"))
+    por_der = crm.concatenar(crm.hash_join(iter([ventas]), CLIENTES, "cliente_id", "id", tipo=tipo,
+                                           prefijo="d_"))
+    assert filas(por_izq) == esperado
+    assert filas(por_der) == esperado
+
+
+def test_hash_join_indexa_el_lado_pequeno(monkeypatch):
+    ventas = {"cliente_id": [1, 7], "cantidad": [1, 2]}
+    llamadas = []
+    original = crm._filas_der_indexando_izq
+    monkeypatch.setattr(crm, "_filas_der_indexando_izq", lambda *a: llamadas.append(a) or original(*a))
+    list(crm.hash_join(ventas, CLIENTES, "cliente_id", "id"))
+    assert len(llamadas) == 1
+    grande = {"cliente_id": list(range(20)), "cantidad": list(range(20))}
+    list(crm.hash_join(grande, CLIENTES, "cliente_id", "id", tam_lote=4))
+    assert len(llamadas) == 1
+
+
+def test_tipo_desconocido():
+    with pytest.raises(ValueError):
+        list(crm.hash_join({"k": [1]}, {"k": [1]}, "k", tipo="outer"))
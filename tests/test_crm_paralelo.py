@@ -0,0 +1,70 @@
+# Carga paralela del mini-CRM: mismo estado y misma cuarentena que la secuencial.
+
+import os
+import shutil
+
+import pytest
+
+from conftest import RAIZ, cargar_modulo
+from test_crm_diario import cargado, estado, lineas
+
+TABLAS = ("clientes", "eventos", "ventas")
+
+
+@pytest.fixture
+def generadores():
+    return cargar_modulo(os.path.join(RAIZ, "benchmarks", "generadores.py"), "generadores")
+
+
+def cuarentenas(crm):
+    resultado = {}
+    for tabla in TABLAS:
+        ruta = os.path.join(crm.DATA_DIR, f"{tabla}_rechazados.csv")
+        resultado[tabla] = lineas(ruta) if os.path.exists(ruta) else []
+    return resultado
+
+
+def borrar_cuarentenas(crm):
+    for tabla in TABLAS:
+        ruta = os.path.join(crm.DATA_DIR, f"{tabla}_rechazados.csv")
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+@pytest.mark.parametrize("procesos", [1, 3])
+def test_paralelo_igual_que_secuencial(crm, generadores, monkeypatch, procesos):
+    generadores.generar_crm(crm.DATA_DIR, 3000, semilla=7, errores=0.05)
+    secuencial = cargado(crm)
+    rechazos_secuencial = cuarentenas(crm)
+    assert rechazos_secuencial["ventas"], "el generador debería meter filas inválidas"
+    borrar_cuarentenas(crm)
+
+    monkeypatch.setattr(crm, "TAM_MINIMO_RANGO", 512)  # fuerza varios rangos por fichero
+    assert len(crm.dividir_en_rangos(crm.VENTAS_CSV, 12)) == 12
+    paralelo = crm.GestorMiniCRM()
+    paralelo.cargar_datos_paralelo(procesos=procesos)
+
+    assert estado(paralelo) == estado(secuencial)
+    assert sorted(paralelo.eventos) == sorted(secuencial.eventos)
+    assert cuarentenas(crm) == rechazos_secuencial
+    assert paralelo.verificar_agregados() == []
+
+
+def test_rangos_empiezan_a_principio_de_linea(crm, generadores, monkeypatch):
+    generadores.generar_crm(crm.DATA_DIR, 500, semilla=1)
+    monkeypatch.setattr(crm, "TAM_MINIMO_RANGO", 100)
+    rangos = crm.dividir_en_rangos(crm.VENTAS_CSV, 20)
+    with open(crm.VENTAS_CSV, "rb") as f:
+        datos = f.read()
+    assert rangos[0][0] == 0 and rangos[-1][1] == len(datos)
+    assert all(fin == inicio for (_, fin), (inicio, _) in zip(rangos, rangos[1:]))
+    assert all(datos[inicio - 1:inicio] == b"\n" for inicio, _ in rangos[1:])
+
+
+def test_paralelo_sin_ficheros(crm, capsys):
+    shutil.rmtree(crm.DATA_DIR)
+    os.makedirs(crm.DATA_DIR)
+    gestor = crm.GestorMiniCRM()
+    gestor.cargar_datos_paralelo(procesos=2)
+    assert not gestor.clientes and not gestor.ventas
+    assert "No se encontró" in capsys.readouterr().out
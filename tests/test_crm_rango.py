@@ -0,0 +1,52 @@
+# Índice por fecha de las ventas: filas_en_rango y total_en_rango contra fuerza bruta.
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from test_crm_diario import cargado
+
+FECHAS = [date(2025, 9, 30) + timedelta(days=d) for d in range(0, 40, 3)]
+
+
+def por_fuerza_bruta(gestor, desde, hasta):
+    en_rango = {i: v for i, v in gestor.ventas.items() if desde <= v.fecha_venta <= hasta}
+    return sorted(en_rango), sum(v.cantidad * v.precio_unitario for v in en_rango.values())
+
+
+def comprobar_rangos(gestor):
+    for desde in FECHAS:
+        for hasta in FECHAS:
+            if desde > hasta:
+                continue
+            ids, total = por_fuerza_bruta(gestor, desde, hasta)
+            filas = gestor.ventas.filas_en_rango(desde, hasta)
+            assert sorted(gestor.ventas.ids[f] for f in filas) == ids
+            fechas = [gestor.ventas.fecha[f] for f in filas]
+            assert fechas == sorted(fechas)
+            assert gestor.ventas.total_en_rango(desde, hasta) == pytest.approx(total)
+
+
+def test_rangos_tras_cargar(crm):
+    comprobar_rangos(cargado(crm))
+
+
+def test_rangos_tras_registrar_y_sustituir_ventas(crm):
+    gestor = cargado(crm)
+    rnd = random.Random(0)
+    for _ in range(30):
+        fecha = date(2025, 9, 25) + timedelta(days=rnd.randrange(50))
+        sustituye = rnd.choice([None, None, 1, 2, 4])
+        gestor.registrar_venta(rnd.choice([1, 2]), rnd.choice([1, 2]), fecha, rnd.randint(1, 5),
+                               rnd.choice([10.0, 12.5, 99.99]), id_=sustituye)
+    comprobar_rangos(gestor)
+
+
+def test_rango_vacio_y_dia_suelto(crm):
+    gestor = cargado(crm)
+    assert len(gestor.ventas.filas_en_rango(date(2030, 1, 1), date(2030, 12, 31))) == 0
+    assert gestor.ventas.total_en_rango(date(2030, 1, 1), date(2030, 12, 31)) == 0
+    dia = date(2025, 10, 2)
+    assert [gestor.ventas.ids[f] for f in gestor.ventas.filas_en_rango(dia, dia)] == [2]
+    assert gestor.ventas.total_en_rango(dia, dia) == pytest.approx(10.5)
@@ -0,0 +1,49 @@
+# Snapshot binario del mini-CRM: vigencia, firma de los CSV y ficheros dañados.
+
+import os
+
+import pytest
+
+from test_crm_diario import cargado, estado
+
+
+def test_snapshot_da_el_mismo_estado(crm):
+    esperado = estado(cargado(crm))
+    gestor = crm.GestorMiniCRM()
+    assert gestor.cargar_snapshot() is True
+    assert estado(gestor) == esperado
+
+
+def test_firma_lee_snapshot_con_hash_al_llamarla(crm, monkeypatch):
+    assert all(len(v) == 2 for v in crm.firma_fuentes().values())
+    monkeypatch.setattr(crm, "SNAPSHOT_CON_HASH", True)
+    assert all(len(v) == 3 for v in crm.firma_fuentes().values())
+    assert all(len(v) == 2 for v in crm.firma_fuentes(con_hash=False).values())
+
+
+def test_snapshot_caducado_si_cambia_un_csv(crm):
+    cargado(crm)
+    with open(crm.CLIENTES_CSV, "a", encoding="utf-8") as f:
+        f.write("9;Nuevo;nuevo@example.com;2024-01-01\n")
+    assert crm.GestorMiniCRM().cargar_snapshot() is False
+
+
+@pytest.mark.parametrize("fraccion", [0.0, 0.001, 0.05, 0.5, 0.99])
+def test_snapshot_truncado_cuenta_como_fallo_de_cache(crm, fraccion):
+    esperado = estado(cargado(crm))
+    tam = os.path.getsize(crm.SNAPSHOT_BIN)
+    with open(crm.SNAPSHOT_BIN, "r+b") as f:
+        f.truncate(int(tam * fraccion))
+    gestor = crm.GestorMiniCRM()
+    assert gestor.cargar_snapshot() is False
+    gestor.cargar_datos()  # vuelve a los CSV y reescribe el snapshot
+    assert estado(gestor) == esperado
+    assert crm.GestorMiniCRM().cargar_snapshot() is True
+
+
+def test_cabecera_danada(crm):
+    cargado(crm)
+    with open(crm.SNAPSHOT_BIN, "r+b") as f:
+        f.seek(crm._CABECERA.size)
+        f.write(b"\xff\xfe{")
+    assert crm.abrir_snapshot(crm.SNAPSHOT_BIN) is None
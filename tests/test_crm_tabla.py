@@ -0,0 +1,38 @@
+# TablaVentas: las columnas se comportan como el dict id -> Venta al que sustituyen.
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import RUTA_CRM, cargar_modulo
+
+
+def campos(v):
+    return v.id, v.cliente_id, v.evento_id, v.fecha_venta, v.cantidad, v.precio_unitario
+
+
+@pytest.fixture(scope="module")
+def crm():
+    return cargar_modulo(RUTA_CRM, "exercice_final")
+
+
+def test_tabla_igual_que_un_dict(crm):
+    rnd = random.Random(2)
+    tabla, referencia = crm.TablaVentas(), {}
+    for _ in range(300):
+        id_ = rnd.randint(1, 120)  # ids desordenados y repetidos: sustituyen a la venta anterior
+        venta = crm.Venta(id_, rnd.randint(1, 9), rnd.randint(1, 4), date(2025, 1, 1) + timedelta(rnd.randrange(90)),
+                          rnd.randint(1, 5), rnd.choice([10.0, 12.5, 99.99]))
+        tabla[id_] = venta
+        referencia[id_] = venta
+    assert len(tabla) == len(referencia)
+    assert sorted(tabla) == sorted(referencia)
+    for id_, venta in referencia.items():
+        assert id_ in tabla
+        assert campos(tabla[id_]) == campos(venta)
+    assert [tabla.ids[f] for f in tabla.filas_por_id()] == sorted(referencia)
+    assert tabla.ingresos_totales() == pytest.approx(sum(v.cantidad * v.precio_unitario for v in referencia.values()))
+    assert 1000 not in tabla
+    with pytest.raises(KeyError):
+        tabla[1000]
@@ -0,0 +1,61 @@
+# exercicie1: validación de empleados y modo por lotes.
+
+import io
+import json
+
+import pytest
+
+from conftest import RAIZ, cargar_modulo
+
+ex1 = cargar_modulo(f"{RAIZ}/RA1/EXERCICE 1/exercicie1.py", "exercicie1")
+
+
+def lotes(texto, empleados=None):
+    salida = io.StringIO()
+    ex1.procesar_lotes(io.StringIO(texto), salida, empleados)
+    return [json.loads(linea) for linea in salida.getvalue().splitlines()]
+
+
+def test_importar_no_pide_datos():
+    assert callable(ex1.main)  # cargar el módulo no ha llamado a input()
+
+
+@pytest.mark.parametrize("entrada,salida", [(True, 10), (8, True), (False, True), (8.0, 10), ("8", 10),
+                                            (-1, 10), (8, 24), (10, 10), (12, 8)])
+def test_horas_no_validas(entrada, salida):
+    assert ex1.validar_empleado("Ana", entrada, salida) is not None
+
+
+def test_horas_validas():
+    assert ex1.validar_empleado("Ana", 0, 23) is None
+
+
+def test_resumen():
+    assert ex1.resumen([("Ana", 8, 14), ("Juan", 9, 17), ("Eva", 7, 12)], 8) == (2, "Eva", 12)
+    assert ex1.resumen([], 8) == (0, "", 24)
+
+
+def test_lotes_con_empleados_en_linea_y_por_defecto():
+    respuestas = lotes('{"id": 1, "empleados": [["Ana", 8, 14], ["Juan", 9, 17]], "hora_referencia": 8}\n'
+                       '\n'
+                       '{"id": 2, "hora_referencia": 9}\n',
+                       empleados=[("Eva", 7, 12)])
+    assert respuestas == [
+        {"id": 1, "ok": True, "resultado": {"entradas": 1, "salida_mas_temprana": {"nombre": "Ana", "hora": 14}}},
+        {"id": 2, "ok": True, "resultado": {"entradas": 1, "salida_mas_temprana": {"nombre": "Eva", "hora": 12}}}]
+
+
+@pytest.mark.parametrize("consulta,error", [
+    ({"empleados": [["Ana", True, 14]], "hora_referencia": 8}, "entrada"),
+    ({"empleados": [["Ana", 8, 14]], "hora_referencia": True}, "hora_referencia"),
+    ({"empleados": [["Ana", 8]], "hora_referencia": 8}, "[nombre, entrada, salida]"),
+    ({"hora_referencia": 8}, "no hay empleados"),
+])
+def test_lotes_errores(consulta, error):
+    [respuesta] = lotes(json.dumps(consulta) + "\n")
+    assert respuesta["ok"] is False and error in respuesta["error"]
+
+
+def test_linea_que_no_es_json():
+    [respuesta] = lotes("no es json\n")
+    assert respuesta["id"] is None and respuesta["ok"] is False
@@ -0,0 +1,25 @@
+# Verificación de las cachés de Empleado (HORARIOS_VERIFICAR=1).
+
+import pytest
+
+
+def test_cache_coherente(ex3, monkeypatch):
+    monkeypatch.setattr(ex3, "VERIFICAR_CACHE", True)
+    empleado = ex3.Empleado("Ana")
+    empleado.agregar_registro(ex3.RegistroHorario("Ana", "Lunes", 9, 17))
+    empleado.agregar_registro(ex3.RegistroHorario("Ana", "Lunes", 18, 20))
+    assert empleado.horas_totales() == 10
+    assert empleado.dias_trabajados() == 1
+
+
+def test_cache_desfasada_lanza_excepcion(ex3, monkeypatch):
+    empleado = ex3.Empleado("Ana")
+    empleado.agregar_registro(ex3.RegistroHorario("Ana", "Lunes", 9, 17))
+    empleado._horas += 1
+    empleado._registros_por_dia[99] = 1
+    assert empleado.horas_totales() == 9  # sin verificar se devuelve la caché
+    monkeypatch.setattr(ex3, "VERIFICAR_CACHE", True)
+    with pytest.raises(ex3.CacheDesfasada, match="horas"):
+        empleado.horas_totales()
+    with pytest.raises(ex3.CacheDesfasada, match="días"):
+        empleado.dias_trabajados()
@@ -0,0 +1,48 @@
+# Validación por bloques de horarios.csv en exercice3 y horarios_rechazados.csv.
+
+import csv
+import os
+
+from conftest import escribir
+
+
+def test_validar_bloque_separa_filas_malas(ex3):
+    nombres, dias, entradas, salidas, rechazos = ex3.validar_bloque([
+        ["Ana", "Lunes", "9", "17"],
+        ["Luis", "Lunes", "siete", "16"],
+        ["Eva", "Martes", "9"],
+        [],
+        ["Zoe", "Martes", "12", "12"],
+        ["Leo", "Martes", "8", "24"],
+        ["Mar", "Jueves", "8", "15"]], primera_linea=2)
+    assert nombres == ["Ana", "Mar"] and entradas == [9, 8] and salidas == [17, 15]
+    assert [(linea, motivo) for linea, _, motivo in rechazos] == [
+        (3, "hora_entrada no válida 'siete' (0-23)"),
+        (4, "se esperaban 4 campos y hay 3"),
+        (6, "la hora de entrada debe ser menor que la de salida"),
+        (7, "hora_salida no válida '24' (0-23)")]
+
+
+def test_horarios_rechazados_csv(ex3, capsys):
+    carpeta = os.path.join(os.path.dirname(ex3.__file__), "data")
+    escribir(os.path.join(carpeta, "horarios.csv"), ["nombre_empleado;dia;hora_entrada;hora_salida",
+                                                     "Ana;Lunes;9;17",
+                                                     "Luis;Lunes;x;16",
+                                                     "Eva;Martes;9;17;extra",
+                                                     "Zoe;Martes;18;9"])
+    gestor = ex3.GestorHorarios("horarios.csv")
+    gestor.leer_csv()
+    assert list(gestor.empleados) == ["Ana"]
+    ruta = os.path.join(carpeta, "horarios_rechazados.csv")
+    with open(ruta, encoding="utf-8") as f:
+        assert list(csv.reader(f, delimiter=";")) == [
+            ["linea", "motivo", "fila"],
+            ["3", "hora_entrada no válida 'x' (0-23)", "Luis", "Lunes", "x", "16"],
+            ["4", "se esperaban 4 campos y hay 5", "Eva", "Martes", "9", "17", "extra"],
+            ["5", "la hora de entrada debe ser menor que la de salida", "Zoe", "Martes", "18", "9"]]
+    assert capsys.readouterr().out.count("filas rechazadas") == 1
+
+    escribir(os.path.join(carpeta, "horarios.csv"), ["nombre_empleado;dia;hora_entrada;hora_salida",
+                                                     "Ana;Lunes;9;17"])
+    ex3.GestorHorarios("horarios.csv").leer_csv()
+    assert not os.path.exists(ruta)
@@ -0,0 +1,87 @@
+# Nombres de día en exercice3: normalización, validación y consultas del índice de bits.
+
+import os
+
+import pytest
+
+from conftest import escribir
+
+HORARIOS = ["nombre_empleado;dia;hora_entrada;hora_salida",
+            "Ana;Lunes;9;17",
+            "Luis;Lunes;7;16",
+            "Luis;Miercoles;8;16",
+            "Ana;miércoles;9;12",
+            "Carlos;Viernes;10;18",
+            "Luis;Viernes;8;16",
+            "Eva;Sábado;10;14",
+            "X;Funday;9;10"]
+
+
+@pytest.fixture
+def gestor(ex3):
+    escribir(os.path.join(os.path.dirname(ex3.__file__), "data", "horarios.csv"), HORARIOS)
+    gestor = ex3.GestorHorarios("horarios.csv")
+    gestor.leer_csv()
+    return gestor
+
+
+def test_dia_desconocido_va_a_cuarentena(ex3, gestor):
+    assert len(gestor.registros) == 7
+    ruta = os.path.join(os.path.dirname(ex3.__file__), "data", "horarios_rechazados.csv")
+    with open(ruta, encoding="utf-8") as f:
+        assert "día no válido 'Funday'" in f.read()
+
+
+def test_tildes_y_mayusculas_son_el_mismo_dia(gestor):
+    indice = gestor.indice_dias()
+    assert sorted(indice.dia("Miércoles")) == ["Ana", "Luis"]
+    assert sorted(indice.dia(" MIERCOLES ")) == ["Ana", "Luis"]
+    assert len(indice.todos(["Lunes", "Miércoles"])) == 2
+
+
+def test_dias_entre_semana_incluye_miercoles(gestor):
+    indice = gestor.indice_dias()
+    assert indice.dias(entre_semana=True) == ["Lunes", "Miercoles", "Viernes"]
+    assert indice.dias(entre_semana=False) == ["Sábado"]
+    assert indice.dias(desde="martes", hasta="Viernes") == ["Miercoles", "Viernes"]
+
+
+def test_dia_conocido_sin_registros_da_vacio(gestor):
+    assert len(gestor.indice_dias().dia("Domingo")) == 0
+
+
+@pytest.mark.parametrize("dia", ["Funday", 5, "2024-13-01"])
+def test_dia_no_valido_lanza_value_error(gestor, dia):
+    indice = gestor.indice_dias()
+    with pytest.raises(ValueError, match="día no válido"):
+        indice.dia(dia)
+    with pytest.raises(ValueError, match="día no válido"):
+        indice.dias(desde=dia)
+
+
+def test_consultas_por_lotes(ex3, gestor):
+    assert ex3.responder(gestor, {"op": "conjunto", "todos": ["Miércoles"], "contar": True}) == 2
+    assert ex3.responder(gestor, {"op": "empleados_por_dia", "dia": "miercoles"}) == ["Ana", "Luis"]
+    with pytest.raises(ValueError):
+        ex3.responder(gestor, {"op": "conjunto", "alguno": ["Funday"]})
+
+
+def test_informe_de_una_pasada_normaliza_los_dias(ex3, gestor):
+    informe = ex3.InformeConjuntos(["Miércoles"], ["Viernes"])
+    gestor.generar_informes(informe)
+    assert informe.resultado() == ["Ana"]
+
+
+def test_informe_con_dias_repetidos_en_una_lista(ex3, gestor):
+    informe = ex3.InformeConjuntos(["Lunes", "Viernes", "lunes"], ["Sábado", "SABADO"])
+    gestor.generar_informes(informe)
+    assert informe.resultado() == ["Luis"]
+    assert informe.mascara_todos == 0b011 and informe.mascara_ninguno == 0b100
+
+
+@pytest.mark.parametrize("todos, ninguno", [(["Lunes"], ["lunes"]), (["Viernes", "Miércoles"], ["miercoles"])])
+def test_dia_en_todos_y_en_ninguno_lanza_value_error(ex3, gestor, todos, ninguno):
+    with pytest.raises(ValueError, match="a la vez en 'todos' y en 'ninguno'"):
+        ex3.InformeConjuntos(todos, ninguno)
+    with pytest.raises(ValueError, match="a la vez en 'todos' y en 'ninguno'"):
+        ex3.responder(gestor, {"op": "conjunto", "todos": todos, "ninguno": ninguno})
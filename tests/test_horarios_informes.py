@@ -0,0 +1,54 @@
+# Informes de exercice3: el modo de una pasada da la misma salida que el clásico.
+
+import os
+
+import pytest
+
+from conftest import escribir
+
+HORARIOS = ["nombre_empleado;dia;hora_entrada;hora_salida",
+            "Zoe;Lunes;9;17", "Ana;Lunes;7;16", "Luis;Lunes;8;16", "Ana;Viernes;6;12",
+            "Luis;Viernes;8;16", "Zoe;Sábado;10;14", "Luis;Sábado;10;12", "Luis;Domingo;10;12",
+            "Ana;Martes;25;26"]
+
+
+@pytest.fixture
+def datos(ex3):
+    carpeta = os.path.join(os.path.dirname(ex3.__file__), "data")
+    escribir(os.path.join(carpeta, "horarios.csv"), HORARIOS)
+    return carpeta
+
+
+def leer(carpeta, fichero):
+    with open(os.path.join(carpeta, fichero), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_informe_es_abstracto(ex3):
+    with pytest.raises(TypeError):
+        ex3.Informe()
+
+    class SinProcesar(ex3.Informe):
+        pass
+
+    with pytest.raises(TypeError):
+        SinProcesar()
+
+
+def test_una_pasada_igual_que_el_modo_clasico(ex3, datos, capsys):
+    ex3.main()
+    clasico = capsys.readouterr().out
+    salidas = {f: leer(datos, f) for f in ("madrugadores.csv", "resumen_clases.csv")}
+    ex3.main(una_pasada=True)
+    una_pasada = capsys.readouterr().out
+    assert {f: leer(datos, f) for f in salidas} == salidas
+    assert "  Lunes: Ana, Luis, Zoe" in clasico
+    assert "  Lunes: Ana, Luis, Zoe" in una_pasada
+    for linea in ("Empleados que trabajaron Lunes y Viernes: Ana, Luis",
+                  "Empleados que trabajaron sólo el Sábado: Zoe"):
+        assert linea in clasico and linea in una_pasada
+
+
+def test_empleados_por_dia_en_fichero_ordenados(ex3, datos):
+    ex3.GestorHorarios("horarios.csv").generar_informes(ex3.InformeEmpleadosPorDia("por_dia.csv"))
+    assert leer(datos, "por_dia.csv").splitlines()[1] == "Lunes;Ana, Luis, Zoe"
@@ -0,0 +1,102 @@
+# exercice2: curva de ocupación por minuto (MotorOcupacion), con y sin NumPy.
+
+import random
+
+import pytest
+
+from conftest import RUTA_EX2, cargar_modulo
+
+ex2 = cargar_modulo(RUTA_EX2, "exercice2")
+
+DATOS = {"María": ("08", "16"), "Juan": ("09:15", "17"), "Noche": ("22", "06"),
+         "Tarde": ("14:30", "20"), "Medianoche": ("20", "00"), "Mal": ("25", "10")}
+
+
+@pytest.fixture(params=["numpy", "listas"])
+def motor(request, monkeypatch):
+    """Devuelve la clase con el camino pedido (NumPy o la alternativa con listas)."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(ex2, "np", None)
+    return ex2.MotorOcupacion
+
+
+def a_mano(datos, minuto):
+    return sum(inicio <= minuto < fin for e, s in datos.values() for inicio, fin in ex2.tramos_en_minutos(e, s))
+
+
+def test_curva_por_minuto(motor):
+    curva = motor(DATOS).curva()
+    assert len(curva) == ex2.MINUTOS_DIA
+    assert [int(x) for x in curva] == [a_mano(DATOS, m) for m in range(ex2.MINUTOS_DIA)]
+    assert motor(DATOS).en_minuto(9 * 60 + 14) == 1 and motor(DATOS).en_minuto(9 * 60 + 15) == 2
+
+
+def test_pico_y_su_cache(motor):
+    ocupacion = motor(DATOS)
+    assert ocupacion.pico() == (14 * 60 + 30, 3)  # primer minuto con el máximo
+    assert ocupacion.pico() is ocupacion.pico()
+    ocupacion.agregar_turno("05", "06")
+    assert ocupacion.pico() == (14 * 60 + 30, 3)
+    ocupacion.agregar_turno("15", "16")  # el pico se recalcula tras cada cambio
+    assert ocupacion.pico() == (15 * 60, 4)
+    ocupacion.quitar_turno("15", "16")
+    assert ocupacion.pico() == (14 * 60 + 30, 3)
+
+
+def test_motor_vacio(motor):
+    ocupacion = motor({})
+    assert ocupacion.pico() == (0, 0)
+    assert ocupacion.franjas_insuficientes(1) == [(0, ex2.MINUTOS_DIA)]
+    assert ocupacion.franjas_insuficientes(0) == []
+
+
+@pytest.mark.parametrize("minimo,desde,hasta", [(1, 0, 1440), (2, 0, 1440), (3, 600, 1200), (1, 360, 361),
+                                                 (2, 0, 0), (5, 1000, 1440)])
+def test_franjas_insuficientes(motor, minimo, desde, hasta):
+    faltan = [m for m in range(desde, hasta) if a_mano(DATOS, m) < minimo]
+    esperado = []
+    for m in faltan:
+        if esperado and esperado[-1][1] == m:
+            esperado[-1][1] = m + 1
+        else:
+            esperado.append([m, m + 1])
+    assert motor(DATOS).franjas_insuficientes(minimo, desde, hasta) == [tuple(f) for f in esperado]
+
+
+def test_numpy_y_listas_coinciden(monkeypatch):
+    pytest.importorskip("numpy")
+    con_numpy = ex2.MotorOcupacion(DATOS)
+    monkeypatch.setattr(ex2, "np", None)
+    con_listas = ex2.MotorOcupacion(DATOS)
+    assert [int(x) for x in con_numpy.curva()] == con_listas.curva()
+    assert con_numpy.pico() == con_listas.pico()
+    for minimo in range(5):
+        assert con_numpy.franjas_insuficientes(minimo) == con_listas.franjas_insuficientes(minimo)
+
+
+def test_cambios_incrementales_igual_que_reconstruir(motor, tmp_path):
+    horarios = ex2.Horarios(str(tmp_path / "horarios.json"))
+    ocupacion = horarios.ocupacion()
+    rnd = random.Random(4)
+    nombres = list(horarios.datos) + [f"Extra{i}" for i in range(5)]
+    for _ in range(60):
+        nombre = rnd.choice(nombres)
+        if rnd.random() < 0.3:
+            horarios.quitar(nombre)
+        else:
+            entrada = f"{rnd.randrange(24):02d}:{rnd.choice(['00', '15', '30'])}"
+            horarios.establecer(nombre, entrada, f"{rnd.randrange(24):02d}")
+        assert horarios.ocupacion() is ocupacion  # se actualiza, no se reconstruye
+    reconstruida = motor(horarios.datos)
+    assert [int(x) for x in ocupacion.curva()] == [int(x) for x in reconstruida.curva()]
+    assert ocupacion.pico() == reconstruida.pico()
+    assert ocupacion.franjas_insuficientes(3) == reconstruida.franjas_insuficientes(3)
+
+
+def test_hora_no_valida_no_cambia_la_curva(motor, tmp_path):
+    horarios = ex2.Horarios(str(tmp_path / "horarios.json"))
+    antes = [int(x) for x in horarios.ocupacion().curva()]
+    assert horarios.establecer("María", "25", "10") is False
+    assert [int(x) for x in horarios.ocupacion().curva()] == antes
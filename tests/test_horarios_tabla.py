@@ -0,0 +1,76 @@
+# Almacén columnar de exercice3: TablaRegistros, Internador y Empleado sobre la tabla compartida.
+
+import os
+
+import pytest
+
+from conftest import escribir
+
+HORARIOS = ["nombre_empleado;dia;hora_entrada;hora_salida",
+            "Zoe;Lunes;9;17", "Ana;Lunes;7;16", "Luis;Lunes;8;16", "Ana;Viernes;6;12",
+            "Luis;Viernes;8;16", "Zoe;Sábado;10;14", "Luis;Sábado;10;12"]
+
+
+@pytest.fixture
+def gestor(ex3):
+    escribir(os.path.join(os.path.dirname(ex3.__file__), "data", "horarios.csv"), HORARIOS)
+    gestor = ex3.GestorHorarios("horarios.csv")
+    gestor.leer_csv()
+    return gestor
+
+
+def test_internador_da_ids_consecutivos(ex3):
+    internador = ex3.Internador()
+    assert [internador.id(n) for n in ("Ana", "Luis", "Ana", "Zoe")] == [0, 1, 0, 2]
+    assert internador.nombres == ["Ana", "Luis", "Zoe"] and len(internador) == 3
+
+
+def test_registros_y_empleados_sin_dict(ex3):
+    for objeto in (ex3.RegistroHorario("Ana", "Lunes", 9, 17), ex3.Empleado("Ana")):
+        assert not hasattr(objeto, "__dict__")
+        with pytest.raises(AttributeError):
+            objeto.otro = 1
+
+
+def test_tabla_guarda_cada_nombre_una_vez(gestor):
+    tabla = gestor.registros
+    assert len(tabla) == 7
+    assert tabla.empleados.nombres == ["Zoe", "Ana", "Luis"]
+    assert tabla.dias.nombres == ["Lunes", "Viernes", "Sábado"]
+    assert list(tabla.empleado) == [0, 1, 2, 1, 2, 0, 2]
+    registro = tabla[3]
+    assert (registro.empleado, registro.dia, registro.entrada, registro.salida) == ("Ana", "Viernes", 6, 12)
+    assert registro.empleado is tabla[1].empleado  # mismo objeto cadena: internado
+    assert [r.duracion() for r in tabla] == [8, 9, 8, 6, 8, 4, 2]
+
+
+def test_empleados_comparten_la_tabla_del_gestor(gestor):
+    luis = gestor.empleados["Luis"]
+    assert luis.tabla is gestor.registros
+    assert list(luis.posiciones) == [2, 4, 6]
+    assert [(r.dia, r.entrada, r.salida) for r in luis.registros] == [
+        ("Lunes", 8, 16), ("Viernes", 8, 16), ("Sábado", 10, 12)]
+    assert luis.horas_totales() == luis.recalcular_horas() == 18
+    assert luis.dias_trabajados() == luis.recalcular_dias() == 3
+    assert luis.fila_csv() == ["Luis", 3, 18]
+
+
+def test_empleado_suelto_tiene_su_propia_tabla(ex3):
+    eva = ex3.Empleado("Eva")
+    eva.agregar_registro(ex3.RegistroHorario("Eva", "Lunes", 9, 13))
+    eva.agregar_registro(ex3.RegistroHorario("Eva", "Lunes", 15, 19))
+    eva.agregar_registro(ex3.RegistroHorario("Eva", "Martes", 9, 10))
+    assert len(eva.tabla) == 3 and eva.tabla.dias.nombres == ["Lunes", "Martes"]
+    assert eva.fila_csv() == ["Eva", 2, 9]
+    assert [r.salida for r in eva.registros] == [13, 19, 10]
+
+
+def test_csv_generados_sin_cambios(ex3, gestor):
+    # Bytes que generaba la versión con un RegistroHorario por fila
+    ex3.main()
+    carpeta = os.path.join(os.path.dirname(ex3.__file__), "data")
+    with open(os.path.join(carpeta, "madrugadores.csv"), "rb") as f:
+        assert f.read() == b"Empleado;Hora entrada\r\nAna;7\r\nAna;6\r\n"
+    with open(os.path.join(carpeta, "resumen_clases.csv"), "rb") as f:
+        assert f.read() == ("Empleado;Días trabajados;Horas totales\r\n"
+                            "Zoe;2;12\r\nAna;2;15\r\nLuis;3;18\r\n").encode("utf-8")
@@ -0,0 +1,123 @@
+# exercice2: índice de turnos (barrido y tablas dispersas), curva de ocupación y diario.
+
+import json
+import os
+
+import pytest
+
+from conftest import RUTA_EX2, cargar_modulo
+
+ex2 = cargar_modulo(RUTA_EX2, "exercice2")
+
+DATOS = {"María": ("08", "16"), "Juan": ("09", "17"), "Lucía": ("07", "15"),
+         "Noche": ("22", "06"), "Tarde": ("14:30", "20")}
+
+
+def en_turno_a_mano(datos, hora):
+    return sum(inicio <= hora < fin for e, s in datos.values() for inicio, fin in ex2.tramos(e, s))
+
+
+@pytest.fixture
+def indice():
+    return ex2.IndiceTurnos(DATOS)
+
+
+def test_en_turno_coincide_con_recorrer_los_tramos(indice):
+    for cuarto in range(0, 24 * 4):
+        hora = cuarto / 4
+        assert indice.en_turno(hora) == en_turno_a_mano(DATOS, hora)
+
+
+@pytest.mark.parametrize("desde,hasta", [(0, 24), (7, 9), (8.5, 15), (15, 15.5), (20, 23), (3, 7)])
+def test_ocupacion_en_rango_coincide_con_muestreo(indice, desde, hasta):
+    muestras = [en_turno_a_mano(DATOS, desde + k / 60) for k in range(round((hasta - desde) * 60))]
+    assert indice.ocupacion_maxima(desde, hasta) == max(muestras)
+    assert indice.ocupacion_minima(desde, hasta) == min(muestras)
+
+
+def test_turno_de_noche_cuenta_una_vez():
+    indice = ex2.IndiceTurnos({"a": ("22", "06")})
+    assert indice.en_franja(0, 24) == 1
+    assert indice.en_franja(5, 23) == 1
+    assert indice.en_franja(7, 21) == 0
+
+
+@pytest.mark.parametrize("desde,hasta", [(0, 24), (5, 23), (6, 22), (7, 21), (0, 6), (21.5, 24), (3, 3)])
+def test_en_franja_cuenta_empleados_y_no_tramos(desde, hasta):
+    datos = dict(DATOS, Guardia=("20", "02"), Madrugada=("23:30", "00"))
+    esperado = sum(any(inicio < hasta and fin > desde for inicio, fin in ex2.tramos(e, s))
+                   for e, s in datos.values())
+    assert ex2.IndiceTurnos(datos).en_franja(desde, hasta) == esperado
+
+
+@pytest.mark.parametrize("hora", [0, 7, 10, 14.5, 16, 23.5, 24])
+def test_rango_degenerado_da_la_ocupacion_en_ese_instante(indice, hora):
+    assert indice.ocupacion_maxima(hora, hora) == indice.en_turno(hora)
+    assert indice.ocupacion_minima(hora, hora) == indice.en_turno(hora)
+
+
+def test_rango_al_reves_lanza_value_error(indice):
+    with pytest.raises(ValueError, match="rango no válido"):
+        indice.ocupacion_maxima(12, 10)
+    with pytest.raises(ValueError, match="rango no válido"):
+        indice.ocupacion_minima(12, 10)
+
+
+def test_indice_vacio():
+    indice = ex2.IndiceTurnos({})
+    assert indice.ocupacion_maxima(8, 8) == 0
+    assert indice.ocupacion_maxima(0, 24) == 0
+
+
+def test_consulta_por_lotes_con_rango_degenerado(tmp_path):
+    horarios = ex2.Horarios(str(tmp_path / "horarios.json"))
+    resultado = ex2.responder(horarios, {"op": "ocupacion", "desde": "10", "hasta": "10"})
+    assert resultado == {"maxima": 6, "minima": 6}
+
+
+def test_curva_sigue_a_los_cambios(tmp_path):
+    horarios = ex2.Horarios(str(tmp_path / "horarios.json"))
+    motor = horarios.ocupacion()
+    horarios.establecer("Nuevo", "23", "01")
+    horarios.quitar("María")
+    nuevo = ex2.MotorOcupacion(horarios.datos)
+    assert list(motor.curva()) == list(nuevo.curva())
+
+
+def test_diario_se_reproduce_y_compacta(tmp_path):
+    archivo = str(tmp_path / "horarios.json")
+    horarios = ex2.Horarios(archivo)
+    horarios.establecer("Nuevo", "10", "12")
+    horarios.quitar("Juan")
+    with open(archivo + ".wal", "ab") as f:
+        f.write(b"0000 {cortado")
+    recargado = ex2.Horarios(archivo)
+    assert {k: tuple(v) for k, v in recargado.datos.items()} == horarios.datos
+    recargado.compactar()
+    assert recargado.diario.num_registros == 0
+    assert {k: tuple(v) for k, v in ex2.Horarios(archivo).datos.items()} == horarios.datos
+
+
+def test_lotes_avisos_a_stderr(tmp_path, capsys):
+    archivo = str(tmp_path / "horarios.json")
+    ex2.Horarios(archivo).establecer("Nuevo", "10", "12")
+    with open(archivo + ".wal", "ab") as f:
+        f.write(b"0000 {cortado")
+    consultas = tmp_path / "consultas.jsonl"
+    consultas.write_text('{"id": 1, "op": "en_turno", "hora": "11"}\n', encoding="utf-8")
+    ex2.main_lotes(str(consultas), archivo)
+    salida = capsys.readouterr()
+    assert [json.loads(l) for l in salida.out.splitlines()] == [{"id": 1, "ok": True, "resultado": 8}]  # 7 + Nuevo
+    assert "dañado" in salida.err
+
+
+def test_diario_sin_json_se_aplica_antes_de_guardar(tmp_path):
+    archivo = str(tmp_path / "horarios.json")
+    horarios = ex2.Horarios(archivo)
+    horarios.establecer("Nuevo", "10", "12")
+    horarios.quitar("Juan")
+    os.remove(archivo)  # el JSON se pierde, el diario no
+    recargado = ex2.Horarios(archivo)
+    assert recargado.datos == horarios.datos
+    assert not os.path.exists(archivo + ".wal") or os.path.getsize(archivo + ".wal") == 0
+    assert {k: tuple(v) for k, v in ex2.Horarios(archivo).datos.items()} == horarios.datos
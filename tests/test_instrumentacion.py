@@ -0,0 +1,43 @@
+# instrumentacion.py: métricas por fase, contadores, exportación y perfilado.
+
+import json
+
+import instrumentacion
+
+
+def test_apagada_no_mide_nada(tmp_path):
+    metricas = instrumentacion.Metricas(None)
+    assert metricas.fase("a") is metricas.fase("b")
+    metricas.contar("filas", 10)
+    metricas.contar_fichero("bytes", str(tmp_path))
+    assert metricas.contadores == {} and metricas.fases == {}
+
+
+def test_json_y_prometheus(tmp_path):
+    fichero = tmp_path / "datos.csv"
+    fichero.write_text("abc")
+    metricas = instrumentacion.Metricas(str(tmp_path / "m.json"), "prueba")
+    with metricas.fase("leer"):
+        pass
+    metricas.contar("filas_leidas", 3, "datos")
+    metricas.contar_fichero("bytes_leidos", str(fichero))
+    metricas.contar_fichero("bytes_leidos", str(tmp_path / "no_existe"))
+    metricas.exportar()
+    resultado = json.loads((tmp_path / "m.json").read_text())
+    assert resultado["fases"]["leer"]["llamadas"] == 1
+    assert resultado["contadores"] == {"bytes_leidos": {"datos.csv": 3}, "filas_leidas": {"datos": 3}}
+    texto = metricas.prometheus()
+    assert 'prueba_filas_leidas_total{origen="datos"} 3' in texto
+    assert 'prueba_fase_llamadas_total{fase="leer"} 1' in texto
+
+
+def test_perfilador(tmp_path, monkeypatch):
+    prefijo = str(tmp_path / "perfil")
+    monkeypatch.setenv("PRUEBA_PERFIL", prefijo)
+    perfilada = instrumentacion.perfilador("PRUEBA_PERFIL")(lambda x: x * 2)
+    assert perfilada(21) == 42
+    assert (tmp_path / "perfil.prof").exists()
+    assert (tmp_path / "perfil.memoria.txt").read_text().startswith("pico tracemalloc")
+    monkeypatch.delenv("PRUEBA_PERFIL")
+    funcion = len
+    assert instrumentacion.perfilador("PRUEBA_PERFIL")(funcion) is funcion
@@ -0,0 +1,73 @@
+# Modo por lotes (--lotes): una consulta JSON por línea y una respuesta por línea,
+# con los mensajes de los programas fuera de stdout.
+
+import io
+import json
+import os
+
+from conftest import RUTA_EX2, cargar_modulo, escribir
+from test_horarios_dias import HORARIOS
+
+
+def respuestas(texto):
+    return [json.loads(linea) for linea in texto.splitlines()]
+
+
+def test_horarios_ex2(tmp_path):
+    ex2 = cargar_modulo(RUTA_EX2, "exercice2")
+    horarios = ex2.Horarios(str(tmp_path / "horarios.json"))
+    salida = io.StringIO()
+    ex2.procesar_lotes(horarios, io.StringIO(
+        '{"id": 1, "op": "llegados", "hora": "08:30"}\n'
+        '{"id": 2, "op": "en_turno", "hora": 12.5}\n'
+        '{"id": 3, "op": "establecer", "nombre": "Noche", "entrada": "22", "salida": "06"}\n'
+        '{"id": 4, "op": "en_franja", "desde": 0, "hasta": 24}\n'
+        '{"id": 5, "op": "pico"}\n'
+        '{"id": 6, "op": "insuficientes", "minimo": 1, "desde": "20", "hasta": "23"}\n'
+        '{"id": 7, "op": "quitar", "nombre": "Nadie"}\n'
+        '{"id": 8, "op": "llegados", "hora": "25"}\n'
+        '{"id": 9, "op": "en_turno"}\n'
+        '{"id": 10, "op": "volar"}\n'), salida)
+    r = respuestas(salida.getvalue())
+    assert [x["resultado"] for x in r[:7]] == [
+        4, 8, True, 9, {"hora": "12:00", "personas": 8}, [["20:00", "22:00"]], False]
+    assert [x["ok"] for x in r[7:]] == [False, False, False]
+    assert "falta el campo 'hora'" in r[8]["error"] and "op desconocida" in r[9]["error"]
+
+
+def test_horarios_ex3(ex3, capsys):
+    escribir(os.path.join(os.path.dirname(ex3.__file__), "data", "horarios.csv"), HORARIOS)
+    consultas = os.path.join(os.path.dirname(ex3.__file__), "consultas.jsonl")
+    escribir(consultas, ['{"id": 1, "op": "madrugadores", "hora_referencia": 8}',
+                         '{"id": 2, "op": "resumen", "nombre": "Eva"}',
+                         '{"id": 3, "op": "dias", "entre_semana": true}',
+                         '{"id": 4, "op": "conjunto", "alguno": ["lunes"], "ninguno": ["viernes"]}'])
+    ex3.main_lotes(consultas)
+    salida = capsys.readouterr()
+    r = respuestas(salida.out)
+    assert [x["id"] for x in r] == [1, 2, 3, 4] and all(x["ok"] for x in r)
+    assert r[0]["resultado"] == {"numero": 1, "empleados": ["Luis"]}
+    assert r[1]["resultado"][0] == "Eva"
+    assert r[3]["resultado"] == ["Ana"]
+    assert "rechazad" in salida.err  # el aviso de la fila con 'Funday' va a stderr
+
+
+def test_mini_crm(crm, capsys):
+    consultas = os.path.join(crm.DATA_DIR, "consultas.jsonl")
+    escribir(consultas, [
+        '{"id": 1, "op": "ventas_en_rango", "desde": "2025-10-01", "hasta": "2025-10-02", "detalle": true, "limite": 1}',
+        '{"id": 2, "op": "total_en_rango", "desde": "2025-10-01", "hasta": "2025-10-31"}',
+        '{"id": 3, "op": "alta_clientes", "clientes": [["Eva", "eva@example.com", "2024-01-01"], ["Mal", "x"]]}',
+        '{"id": 4, "op": "estadisticas"}',
+        '{"id": 5, "op": "total_en_rango", "desde": "2025-10-31", "hasta": "2025-10-01"}'])
+    crm.main_lotes(consultas, usar_snapshot=False)
+    salida = capsys.readouterr()
+    r = respuestas(salida.out)
+    assert r[0]["resultado"] == {"numero": 2, "total": 60.5, "ventas": [
+        {"id": 1, "fecha": "2025-10-01", "cliente": "Ana Pérez", "evento": "Concierto Rock",
+         "cantidad": 2, "precio": 25.0, "total": 50.0}]}
+    assert r[1]["resultado"] == 82.25
+    assert r[2]["resultado"] == [3]
+    assert r[3]["resultado"]["ingresos_totales"] == 82.25
+    assert r[4]["ok"] is False and "desde" in r[4]["error"]
+    assert "Datos cargados" in salida.err and "alta 2 ignorada" in salida.err
@@ -0,0 +1,131 @@
+# Medias por app de screentime: modo por bloques (con y sin spill a disco) y
+# modo paralelo frente al cálculo en memoria del notebook.
+
+import os
+
+import pytest
+
+from conftest import RAIZ, RUTA_SCREENTIME, cargar_modulo, escribir
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture(scope="module")
+def st():
+    return cargar_modulo(RUTA_SCREENTIME, "limpieza_screentime")
+
+
+@pytest.fixture(scope="module")
+def ruta_csv(tmp_path_factory):
+    """CSV sintético con nulos, duplicados y fechas mezcladas, pero columnas numéricas limpias."""
+    generadores = cargar_modulo(os.path.join(RAIZ, "benchmarks", "generadores.py"), "generadores")
+    ruta = tmp_path_factory.mktemp("screentime") / "screentime.csv"
+    generadores.generar_screentime(str(ruta), 5000, semilla=3, errores=0.0, duplicados=0.1)
+    return str(ruta)
+
+
+def como_dict(serie):
+    return {str(app): valor for app, valor in serie.items()}
+
+
+def comprobar_iguales(obtenidas, esperadas):
+    for obtenida, esperada in zip(obtenidas, esperadas):
+        assert como_dict(obtenida) == pytest.approx(como_dict(esperada))
+        assert list(obtenida.to_numpy()) == sorted(obtenida.to_numpy(), reverse=True)
+
+
+@pytest.fixture(scope="module")
+def en_memoria(st, ruta_csv):
+    return st.medias_por_app(st.limpiar(st.leer(ruta_csv)))
+
+
+def como_notebook(df):
+    """Los pasos de ficha.ipynb tal cual, para comparar con limpiar()."""
+    df = df.fillna({"screen_time(min)": 0, "notifications": 0})
+    df = df.dropna(subset=["app_name", "screen_time(min)"])
+    df = df.drop_duplicates()
+    df["screen_time(min)"] = df["screen_time(min)"].astype(float)
+    df["notifications"] = pd.to_numeric(df["notifications"], errors="coerce").fillna(0).astype(int)
+    df["date"] = pd.to_datetime(df["date"], errors="coerce", dayfirst=True)
+    df = df.dropna(axis=1, how="all")
+    df["app_name"] = df["app_name"].astype(str).str.strip().str.title().str.replace(" ", "", regex=False)
+    df["app_name_len"] = df["app_name"].str.len()
+    return df.convert_dtypes()
+
+
+@pytest.mark.parametrize("origen", ["ejemplo", "generado", "con_errores"])
+def test_limpiar_igual_que_el_notebook(st, ruta_csv, tmp_path, origen):
+    if origen == "ejemplo":
+        ruta = os.path.join(os.path.dirname(RUTA_SCREENTIME), "screentime_analysis_extended.csv")
+    elif origen == "generado":
+        ruta = ruta_csv
+    else:  # apps vacías y notificaciones con texto suelto
+        generadores = cargar_modulo(os.path.join(RAIZ, "benchmarks", "generadores.py"), "generadores")
+        ruta = str(tmp_path / "errores.csv")
+        generadores.generar_screentime(ruta, 3000, semilla=9, errores=0.05)
+    limpio = st.limpiar(st.leer(ruta))
+    notebook = como_notebook(pd.read_csv(ruta))
+    assert len(limpio) == len(notebook)
+    assert list(limpio.columns) == list(notebook.columns)
+    assert sorted(limpio[st.COL_APP].astype(str).unique()) == sorted(notebook["app_name"].unique())
+    for columna in (st.COL_USUARIO, st.COL_TIEMPO, st.COL_NOTIF, st.COL_LONGITUD):
+        assert limpio[columna].tolist() == notebook[columna].tolist()
+    for obtenida, esperada in zip(st.medias_por_app(limpio), st.medias_por_app(notebook)):
+        assert como_dict(obtenida) == pytest.approx(como_dict(esperada))
+
+
+def test_tipos_compactos_en_vez_de_convert_dtypes(st, ruta_csv):
+    df = st.limpiar(st.leer(ruta_csv))
+    assert isinstance(df[st.COL_APP].dtype, pd.CategoricalDtype)
+    assert df[st.COL_USUARIO].dtype == "int16"  # ids 1000..1099
+    assert df[st.COL_NOTIF].dtype == "int8"  # 0..40
+    assert df[st.COL_LONGITUD].dtype == "int8"
+    assert df[st.COL_TIEMPO].dtype == "float64"
+    assert not any(isinstance(t, pd.api.extensions.ExtensionDtype) and not isinstance(t, pd.CategoricalDtype)
+                   for t in df.dtypes)  # nada de Int64/string de convert_dtypes
+    assert df.memory_usage(deep=True).sum() < como_notebook(pd.read_csv(ruta_csv)).memory_usage(deep=True).sum()
+
+
+def test_reducir_enteros_elige_el_menor_tipo(st):
+    df = st.reducir_enteros(pd.DataFrame({"a": [0, 100], "b": [0, 1000], "c": [0, 100_000], "d": [-1, 1]}))
+    assert [str(t) for t in df.dtypes] == ["int8", "int16", "int32", "int8"]
+
+
+def test_limpiar_normaliza_apps_y_quita_duplicados(st, tmp_path):
+    ruta = tmp_path / "mini.csv"
+    escribir(ruta, ["user_id,app_name,screen_time(min),notifications,date,comentarios",
+                    "1, instagram ,10,2,2024-01-01,",
+                    "1, instagram ,10,2,2024-01-01,",
+                    "2,Instagram,,4,02/01/2024,",
+                    "3,,50,1,2024-01-03,",
+                    "4,Tik tok,30,,2024-01-04,"])
+    df = st.limpiar(st.leer(ruta))
+    assert len(df) == 3
+    assert "comentarios" not in df.columns
+    assert list(df[st.COL_APP].cat.categories) == ["Instagram", "TikTok"]
+    tiempo, notif = st.medias_por_app(df)
+    assert como_dict(tiempo) == {"TikTok": 30.0, "Instagram": 5.0}
+    assert como_dict(notif) == {"Instagram": 3.0, "TikTok": 0.0}
+
+
+@pytest.mark.parametrize("tam_bloque", [700, 100_000])
+def test_bloques_igual_que_en_memoria(st, ruta_csv, en_memoria, tam_bloque):
+    comprobar_iguales(st.medias_por_bloques(ruta_csv, tam_bloque=tam_bloque), en_memoria)
+
+
+def test_bloques_con_spill_igual_que_en_memoria(st, ruta_csv, en_memoria, tmp_path):
+    comprobar_iguales(st.medias_por_bloques(ruta_csv, tam_bloque=700, dir_spill=str(tmp_path), particiones=8),
+                      en_memoria)
+    assert os.listdir(tmp_path) == []  # los ficheros temporales se borran
+
+
+@pytest.mark.parametrize("clave", ["user_id", "date"])
+def test_paralelo_igual_que_en_memoria(st, ruta_csv, en_memoria, clave):
+    comprobar_iguales(st.medias_en_paralelo(ruta_csv, procesos=2, clave=clave, tam_rango=16 << 10), en_memoria)
+
+
+def test_csv_sin_filas(st, tmp_path):
+    ruta = tmp_path / "vacio.csv"
+    escribir(ruta, ["user_id,app_name,screen_time(min),notifications,date,comentarios"])
+    for tiempo, notif in (st.medias_por_bloques(str(ruta)), st.medias_en_paralelo(str(ruta), procesos=2)):
+        assert isinstance(tiempo, pd.Series) and tiempo.empty and notif.empty
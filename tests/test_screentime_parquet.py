@@ -0,0 +1,73 @@
+# Parquet particionado por día de screentime: ida y vuelta, fechas nulas y poda de particiones.
+
+import os
+
+import pytest
+
+from conftest import RUTA_SCREENTIME, cargar_modulo, escribir
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture(scope="module")
+def st():
+    return cargar_modulo(RUTA_SCREENTIME, "limpieza_screentime")
+
+
+@pytest.fixture
+def carpeta(st, tmp_path):
+    ruta = tmp_path / "screentime.csv"
+    escribir(ruta, ["user_id,app_name,screen_time(min),notifications,date,comentarios",
+                    "1,Instagram,10,2,2024-01-13,",
+                    "2, whatsapp ,20,4,2024-01-13,",
+                    "3,YouTube,30,1,2024-01-14,",
+                    "4,Instagram,40,0,2024-01-15,",
+                    "5,YouTube,50,3,no-es-fecha,"])
+    df = st.limpiar(st.leer(ruta))
+    destino = tmp_path / "parquet"
+    st.guardar_parquet(df, destino)
+    return df, destino
+
+
+def test_particiones_por_dia_y_sin_fecha(carpeta):
+    _, destino = carpeta
+    assert sorted(os.listdir(destino)) == ["dia=2024-01-13", "dia=2024-01-14", "dia=2024-01-15",
+                                           "dia=__HIVE_DEFAULT_PARTITION__"]
+
+
+def test_ida_y_vuelta(st, carpeta):
+    df, destino = carpeta
+    leido = st.leer_parquet(destino).sort_values(st.COL_USUARIO).reset_index(drop=True)
+    assert list(leido[st.COL_USUARIO]) == [1, 2, 3, 4, 5]
+    assert list(leido[st.COL_APP].astype(str)) == ["Instagram", "Whatsapp", "Youtube", "Instagram", "Youtube"]
+    assert list(leido[st.COL_TIEMPO]) == list(df.sort_values(st.COL_USUARIO)[st.COL_TIEMPO])
+    assert leido[st.COL_FECHA].isna().sum() == 1
+    assert leido[st.COL_DIA].isna().sum() == 1  # la fila sin fecha vuelve con dia nulo
+    assert leido.loc[leido[st.COL_USUARIO] == 3, st.COL_DIA].item() == "2024-01-14"
+
+
+def test_solo_se_leen_las_particiones_del_rango(st, carpeta):
+    _, destino = carpeta
+    # si se leyera fuera del rango, estos ficheros rotos darían error
+    for dia in ("dia=2024-01-15", "dia=__HIVE_DEFAULT_PARTITION__"):
+        for nombre in os.listdir(destino / dia):
+            (destino / dia / nombre).write_bytes(b"no es parquet")
+    leido = st.leer_parquet(destino, columnas=[st.COL_USUARIO, st.COL_DIA], desde="2024-01-13", hasta="2024-01-14")
+    assert sorted(leido[st.COL_USUARIO]) == [1, 2, 3]
+    assert set(leido[st.COL_DIA]) == {"2024-01-13", "2024-01-14"}
+    medias = st.media_tiempo_por_app_en_rango(destino, "2024-01-14", "2024-01-14")
+    assert {str(k): v for k, v in medias.items()} == {"Youtube": 30.0}
+
+
+def test_filtros_adicionales(st, carpeta):
+    _, destino = carpeta
+    leido = st.leer_parquet(destino, desde="2024-01-13", hasta="2024-01-15", filtros=[(st.COL_NOTIF, ">", 1)])
+    assert sorted(leido[st.COL_USUARIO]) == [1, 2]
+
+
+def test_reescribir_sustituye_los_dias(st, carpeta):
+    df, destino = carpeta
+    st.guardar_parquet(df[df[st.COL_USUARIO] == 1], destino)
+    leido = st.leer_parquet(destino, desde="2024-01-13", hasta="2024-01-13")
+    assert list(leido[st.COL_USUARIO]) == [1]
@@ -0,0 +1,176 @@
+# Servidor HTTP/JSON del mini-CRM: consultas, altas y cabeceras mal formadas.
+
+import asyncio
+import json
+import sys
+
+import pytest
+
+from conftest import RUTA_SERVIDOR, cargar_modulo
+
+
+@pytest.fixture
+def servidor(crm):
+    modulo = cargar_modulo(RUTA_SERVIDOR, "servidor")  # importa el exercice_final del fixture crm
+    gestor = crm.GestorMiniCRM()
+    gestor.cargar_datos(usar_snapshot=False)
+    return modulo.ServidorCRM(gestor, hilos=2)
+
+
+async def peticion(puerto, crudo: bytes):
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    escritor.write(crudo)
+    await escritor.drain()
+    respuesta = await lector.read()
+    escritor.close()
+    cabecera, _, cuerpo = respuesta.partition(b"\r\n\r\n")
+    return int(cabecera.split()[1]), json.loads(cuerpo)
+
+
+def get(ruta):
+    return f"GET {ruta} HTTP/1.1\r\nConnection: close\r\n\r\n".encode()
+
+
+def post(ruta, datos):
+    cuerpo = json.dumps(datos).encode()
+    return (f"POST {ruta} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(cuerpo)}\r\n\r\n"
+            .encode() + cuerpo)
+
+
+def ejecutar(servidor, *peticiones):
+    async def principal():
+        servidor._lanzar_escritora()
+        red = await asyncio.start_server(servidor.conexion, "127.0.0.1", 0)
+        puerto = red.sockets[0].getsockname()[1]
+        try:
+            return [await peticion(puerto, crudo) for crudo in peticiones]
+        finally:
+            servidor._tarea_escritora.cancel()
+            red.close()
+            await red.wait_closed()
+    return asyncio.run(principal())
+
+
+def test_paginas_ordenadas_por_id(servidor):
+    (estado, clientes), (_, ventas) = ejecutar(servidor, get("/clientes?limite=1&desde=1"),
+                                               get("/ventas?limite=2"))
+    assert estado == 200
+    assert clientes["numero"] == 2 and [f["id"] for f in clientes["filas"]] == [2]
+    assert ventas["numero"] == 3 and [f["id"] for f in ventas["filas"]] == [1, 2]
+
+
+def test_alta_visible_al_confirmarse(servidor):
+    (estado, alta), (_, clientes) = ejecutar(
+        servidor, post("/clientes", {"nombre": "Eva", "email": "eva@example.com", "fecha_alta": "2024-01-01"}),
+        get("/clientes"))
+    assert estado == 201 and alta == {"id": 3}
+    assert [f["id"] for f in clientes["filas"]] == [1, 2, 3]
+    assert clientes["filas"][-1]["fecha_alta"] == "2024-01-01"
+    assert servidor.instantanea.version == 1
+
+
+def test_alta_no_valida(servidor):
+    [(estado, respuesta)] = ejecutar(servidor, post("/clientes", {"nombre": "Eva", "email": "x"}))
+    assert estado == 400 and "email" in respuesta["error"]
+
+
+def test_rango_de_ventas_con_nombres(servidor):
+    [(estado, rango)] = ejecutar(servidor, get("/ventas/rango?desde=2025-10-02&hasta=2025-10-03"))
+    assert estado == 200
+    assert [(v["id"], v["cliente"], v["evento"]) for v in rango["ventas"]] == [
+        (2, "Luis Gómez", "Feria Tecnología"), (4, "Luis Gómez", "Concierto Rock")]
+
+
+@pytest.mark.parametrize("longitud", ["abc", "-5", "1.5"])
+def test_content_length_mal_formado(servidor, longitud):
+    crudo = f"POST /clientes HTTP/1.1\r\nContent-Length: {longitud}\r\n\r\n".encode()
+    [(estado, respuesta)] = ejecutar(servidor, crudo)
+    assert estado == 400 and "content-length" in respuesta["error"]
+
+
+def test_instantanea_anterior_no_cambia(crm, servidor):
+    anterior = servidor.instantanea
+    siguiente = anterior.con_clientes([crm.Cliente(10, "Zoe", "zoe@example.com", crm.date(2024, 1, 1))])
+    assert anterior.clientes["id"] == [1, 2]
+    assert siguiente.clientes["id"] == [1, 2, 10]
+    assert siguiente.orden_clientes == [0, 1, 2]
+    desordenada = siguiente.con_clientes([crm.Cliente(5, "Ana", "a@example.com", crm.date(2024, 1, 1))])
+    assert [desordenada.clientes["id"][i] for i in desordenada.orden_clientes] == [1, 2, 5, 10]
+
+
+def test_estadisticas_sin_tocar_el_gestor(servidor):
+    servidor.gestor = None  # las lecturas solo usan la instantánea
+    (estado, estadisticas), (_, rango), (_, ventas) = ejecutar(
+        servidor, get("/estadisticas"), get("/ventas/rango?desde=2025-10-01&hasta=2025-10-01"), get("/ventas"))
+    assert estado == 200
+    assert estadisticas["ingresos_totales"] == pytest.approx(82.25)
+    assert estadisticas["categorias"] == ["Música", "Tecnología"]
+    assert {e["evento_id"]: e["ingresos"] for e in estadisticas["ingresos_por_evento"]} == {1: 71.75, 2: 10.5}
+    assert estadisticas["precios"] == {"min": 7.25, "max": 25.0, "media": pytest.approx(14.25)}
+    assert isinstance(estadisticas["dias_hasta_mas_proximo"], int)
+    assert rango["numero"] == 1 and rango["total"] == 50.0
+    assert ventas["numero"] == 3
+
+
+def test_rangos_identicos_a_la_vez_se_calculan_una_vez(servidor, monkeypatch):
+    modulo = sys.modules[type(servidor).__module__]
+    llamadas = []
+
+    def contar(*args):
+        llamadas.append(args[1:])
+        return {"numero": 0}
+    monkeypatch.setattr(modulo, "consultar_rango", contar)
+
+    async def principal():
+        consulta = ("GET", "/ventas/rango", {"desde": "2025-10-01", "hasta": "2025-10-31"}, b"")
+        return await asyncio.gather(*(servidor.atender(*consulta) for _ in range(5)))
+    assert asyncio.run(principal()) == [(200, {"numero": 0})] * 5
+    assert len(llamadas) == 1
+
+
+def alta(nombre):
+    return post("/clientes", {"nombre": nombre, "email": f"{nombre.lower()}@example.com", "fecha_alta": "2024-01-01"})
+
+
+def fallar(*args, **kwargs):
+    raise RuntimeError("fallo provocado")
+
+
+def test_instantanea_se_rehace_si_falla_la_incremental(servidor, monkeypatch):
+    monkeypatch.setattr(type(servidor.instantanea), "con_clientes", fallar)
+    (estado, respuesta), (_, clientes) = ejecutar(servidor, alta("Eva"), get("/clientes"))
+    assert estado == 201 and respuesta == {"id": 3}
+    assert [f["id"] for f in clientes["filas"]] == [1, 2, 3]
+
+
+def test_fallo_al_publicar_no_deja_peticiones_colgadas(servidor, monkeypatch):
+    modulo = sys.modules[type(servidor).__module__]
+    monkeypatch.setattr(modulo.Instantanea, "con_clientes", fallar)
+    monkeypatch.setattr(modulo.Instantanea, "__init__", fallar)
+    [(estado, respuesta)] = ejecutar(servidor, alta("Eva"))
+    assert estado == 500 and "fallo provocado" in respuesta["error"]
+    monkeypatch.undo()
+    (estado, respuesta), (_, clientes) = ejecutar(servidor, alta("Pau"), get("/clientes"))
+    assert estado == 201 and respuesta == {"id": 4}  # Eva ya estaba en el diario: su id no se reutiliza
+    assert [f["id"] for f in clientes["filas"]] == [1, 2, 3, 4]
+
+
+def test_fallo_al_compactar_no_afecta_a_las_altas(servidor, monkeypatch):
+    monkeypatch.setattr(servidor.gestor, "compactar_si_toca", fallar)
+    respuestas = ejecutar(servidor, alta("Eva"), alta("Pau"))
+    assert respuestas == [(201, {"id": 3}), (201, {"id": 4})]
+
+
+def test_escritora_se_relanza_si_muere(servidor, monkeypatch):
+    obtener = servidor.altas.get
+    llamadas = []
+
+    async def fallar_la_primera():
+        llamadas.append(1)
+        if len(llamadas) == 1:
+            raise RuntimeError("fallo provocado")
+        return await obtener()
+    monkeypatch.setattr(servidor.altas, "get", fallar_la_primera)
+    [(estado, respuesta)] = ejecutar(servidor, alta("Eva"))
+    assert estado == 201 and respuesta == {"id": 3}
+    assert len(llamadas) >= 2